@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Toplu Çıkarım Modülü
+Bu modül, bir klasördeki görüntüleri gruplar halinde modelden geçirir ve sonuçları CSV dosyasına yazar.
+"""
+
+import os
+import csv
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+from inference_backend import BACKENDS, DEFAULT_BACKEND, load_backend
+from preprocessing import BatchPreprocessor, TTA_VIEWS, average_tta, resize_image
+
+# Sınıf isimleri
+CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
+
+# Görüntü boyutu ve batch size
+IMG_SIZE = 224
+BATCH_SIZE = 64
+
+# Görüntü çözme için iş parçacığı sayısı
+DECODE_WORKERS = 4
+
+# Desteklenen görüntü uzantıları
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def iter_image_paths(folder):
+    """Klasördeki (alt klasörler dahil) görüntü dosyalarını sıralı olarak döndürür."""
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+def load_image(path):
+    """Görüntüyü okur, RGB'ye çevirir ve eğitimle aynı şekilde model boyutuna getirir. Okunamazsa None döndürür."""
+    img = cv2.imread(path)
+    if img is None:
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return resize_image(img, IMG_SIZE)
+
+def iter_batches(paths, batch_size=BATCH_SIZE, executor=None, tta_views=1):
+    """Görüntü yollarını gruplar; her grup için (yollar, float32 tensör) çifti üretir.
+
+    Görüntüler iş parçacığı havuzunda çözülür (OpenCV GIL'i bırakır) ve önceden
+    ayrılmış tek bir tampona yazılır; okunamayan dosyalar atlanır. Tampon her grupta
+    yeniden kullanıldığından üretilen tensör bir sonraki gruba geçmeden kullanılmalıdır.
+    tta_views > 1 ise tensör her görüntünün art arda gelen TTA görünümlerini içerir.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
+    preprocessor = BatchPreprocessor(batch_size * tta_views, IMG_SIZE)
+
+    try:
+        batch_paths = []
+        for path in paths:
+            batch_paths.append(path)
+            if len(batch_paths) == batch_size:
+                yield _decode_batch(batch_paths, executor, preprocessor, tta_views)
+                batch_paths = []
+
+        if batch_paths:
+            yield _decode_batch(batch_paths, executor, preprocessor, tta_views)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+def _decode_batch(batch_paths, executor, preprocessor, tta_views=1):
+    """Bir grup görüntüyü paralel çözer ve normalize edilmiş tensöre yazar."""
+    images = list(executor.map(load_image, batch_paths))
+    valid = [(p, img) for p, img in zip(batch_paths, images) if img is not None]
+    valid_images = [img for _, img in valid]
+
+    batch = preprocessor.tta(valid_images, tta_views) if tta_views > 1 else preprocessor(valid_images)
+    return [p for p, _ in valid], batch
+
+def predict_folder(backend, folder, output_csv=None, batch_size=BATCH_SIZE, progress_callback=None, tta_views=1):
+    """Klasördeki tüm görüntüleri gruplar halinde sınıflandırır ve sonuçları CSV'ye yazar.
+
+    Her grup için çıkarım arka ucuna (bkz. inference_backend) tek bir çağrı yapılır;
+    tta_views > 1 ise gruptaki tüm görüntülerin tüm görünümleri aynı çağrıda
+    sınıflandırılır ve görüntü başına ortalanır.
+    progress_callback verilirse her gruptan sonra işlenen görüntü sayısı ve toplam
+    görüntü sayısı ile çağrılır.
+    Özet bilgileri içeren bir sözlük döndürür.
+    """
+    paths = list(iter_image_paths(folder))
+    if output_csv is None:
+        output_csv = os.path.join(folder, 'predictions.csv')
+
+    class_counts = dict.fromkeys(CLASS_NAMES, 0)
+    processed = 0
+    start_time = time.time()
+
+    with open(output_csv, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['image', 'predicted_class', 'confidence'] + CLASS_NAMES)
+
+        for batch_paths, batch in iter_batches(paths, batch_size, tta_views=tta_views):
+            if len(batch_paths) == 0:
+                continue
+
+            # Grup için tek model çağrısı
+            probabilities = backend.predict(batch)
+            if tta_views > 1:
+                probabilities = average_tta(probabilities, tta_views)
+            pred_indices = np.argmax(probabilities, axis=1)
+
+            for path, probs, idx in zip(batch_paths, probabilities, pred_indices):
+                class_counts[CLASS_NAMES[idx]] += 1
+                writer.writerow(
+                    [os.path.relpath(path, folder), CLASS_NAMES[idx], f"{probs[idx]:.6f}"]
+                    + [f"{p:.6f}" for p in probs]
+                )
+
+            processed += len(batch_paths)
+            if progress_callback:
+                progress_callback(processed, len(paths))
+
+    elapsed = time.time() - start_time
+
+    return {
+        'output_csv': output_csv,
+        'total_images': len(paths),
+        'processed_images': processed,
+        'class_counts': class_counts,
+        'elapsed': elapsed,
+        'images_per_second': processed / elapsed if elapsed > 0 else 0.0
+    }
+
+def main():
+    """Ana işlev: Komut satırından bir klasörü toplu olarak analiz eder."""
+    parser = argparse.ArgumentParser(description="Klasördeki kan hücresi görüntülerini toplu olarak sınıflandırır.")
+    parser.add_argument('folder', help="Görüntülerin bulunduğu klasör")
+    parser.add_argument('--output', default=None, help="Sonuç CSV dosyası (varsayılan: <klasör>/predictions.csv)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Bir model çağrısındaki görüntü sayısı")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help="Çıkarım arka ucu")
+    parser.add_argument('--model', default=None, help="Model dosyası (varsayılan: arka uca göre models/ altındaki model)")
+    parser.add_argument('--num-threads', type=int, default=None, help="TFLite yorumlayıcısının iş parçacığı sayısı")
+    parser.add_argument('--tta', type=int, default=1, choices=range(1, len(TTA_VIEWS) + 1), metavar='N',
+                        help=f"Görüntü başına ortalanacak çevrilmiş/döndürülmüş görünüm sayısı (1-{len(TTA_VIEWS)})")
+    args = parser.parse_args()
+
+    backend = load_backend(args.backend, args.model, args.num_threads)
+
+    def report_progress(done, total):
+        print(f"\r{done}/{total} görüntü işlendi", end='', flush=True)
+
+    summary = predict_folder(backend, args.folder, args.output, args.batch_size, report_progress, args.tta)
+
+    print()
+    print(f"Sonuçlar kaydedildi: {summary['output_csv']}")
+    print(f"İşlenen görüntü: {summary['processed_images']}/{summary['total_images']}")
+    print(f"Toplam süre: {summary['elapsed']:.2f} saniye ({summary['images_per_second']:.1f} görüntü/saniye)")
+    for class_name, count in summary['class_counts'].items():
+        print(f"{class_name}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Çıkarım Performans Ölçüm Modülü
+Bu modül, test veri seti üzerinde Keras ve TFLite çıkarımının gecikme, verim ve bellek kullanımını ölçer ve JSON olarak kaydeder.
+"""
+
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import numpy as np
+
+from batch_inference import iter_image_paths, load_image
+from inference_backend import KerasBackend, TFLiteBackend, MODEL_PATH, TFLITE_MODEL_PATH
+from preprocessing import BatchPreprocessor, TTA_VIEWS, average_tta, preprocess_batch
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+TEST_DIR = os.path.join(DATA_DIR, 'processed', 'test')
+MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
+RESULTS_PATH = os.path.join(MODELS_DIR, 'benchmark_results.json')
+
+# Ölçüm ayarları
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64, 128)
+THREAD_COUNTS = (1, 2, 4)
+WARMUP_RUNS = 5
+MEASURE_RUNS = 30
+MAX_IMAGES = 256
+
+# TTA ölçümünde denenecek görünüm sayıları ve batch boyutları (görüntü cinsinden)
+TTA_VIEW_COUNTS = (1, 2, 4, 8)
+TTA_BATCH_SIZES = (1, 32)
+
+def load_test_images(max_images=MAX_IMAGES, raw=False):
+    """Test setinden en fazla max_images görüntüyü normalize edilmiş float32 dizi olarak yükler.
+
+    raw True ise görüntüler ön işlemeden, model boyutunda uint8 olarak döndürülür.
+    """
+    paths = list(iter_image_paths(TEST_DIR))
+    # Sınıflar dengeli temsil edilsin diye dosyalar eşit aralıklarla seçilir
+    step = max(1, len(paths) // max_images)
+    paths = paths[::step][:max_images]
+    images = [load_image(p) for p in paths]
+    return np.stack(images) if raw else preprocess_batch(images)
+
+def current_rss_mb():
+    """Sürecin anlık bellek kullanımını (RSS, MB) döndürür."""
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def peak_rss_mb():
+    """Sürecin başlangıçtan bu yana en yüksek bellek kullanımını (MB) döndürür."""
+    # Linux'ta ru_maxrss KB cinsindendir
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def make_batch(images, batch_size):
+    """Görüntülerden istenen boyutta bir batch oluşturur (gerekirse görüntüler tekrarlanır)."""
+    indices = np.arange(batch_size) % len(images)
+    return np.ascontiguousarray(images[indices])
+
+def run_benchmark(name, predict_fn, images, batch_size, warmup=WARMUP_RUNS, runs=MEASURE_RUNS, **config):
+    """Bir yapılandırmayı ölçer; ısınma çağrıları istatistiklere dahil edilmez."""
+    batch = make_batch(images, batch_size)
+
+    for _ in range(warmup):
+        predict_fn(batch)
+
+    timings = np.empty(runs)
+    for i in range(runs):
+        t0 = time.perf_counter()
+        predict_fn(batch)
+        timings[i] = time.perf_counter() - t0
+
+    p50, p95, p99 = np.percentile(timings * 1000, [50, 95, 99])
+    result = {
+        'name': name,
+        'batch_size': batch_size,
+        **config,
+        'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99, 'mean': timings.mean() * 1000},
+        'latency_per_image_ms': p50 / batch_size,
+        'images_per_second': batch_size * runs / timings.sum(),
+        'rss_mb': current_rss_mb(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    print(f"{name:<16}{config.get('num_threads') or '-':>8}{batch_size:>8}"
+          f"{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{result['images_per_second']:>12.1f}{result['peak_rss_mb']:>12.1f}")
+
+    return result
+
+def benchmark_keras(images, batch_sizes, model_path=MODEL_PATH):
+    """Keras modelini predict ve doğrudan __call__ ile ölçer."""
+    backend = KerasBackend(model_path)
+    model = backend.model
+
+    results = []
+    for batch_size in batch_sizes:
+        results.append(run_benchmark(
+            'keras_predict', lambda x: model.predict(x, batch_size=len(x), verbose=0), images, batch_size
+        ))
+        results.append(run_benchmark(
+            'keras_call', lambda x: model(x, training=False).numpy(), images, batch_size
+        ))
+    return results
+
+def benchmark_tflite(images, batch_sizes, thread_counts, model_path=TFLITE_MODEL_PATH):
+    """TFLite yorumlayıcısını farklı iş parçacığı sayıları ve batch boyutlarıyla ölçer."""
+    results = []
+    for num_threads in thread_counts:
+        backend = TFLiteBackend(model_path, num_threads=num_threads)
+        for batch_size in batch_sizes:
+            results.append(run_benchmark(
+                'tflite', backend.predict, images, batch_size,
+                num_threads=num_threads, model=os.path.basename(model_path)
+            ))
+    return results
+
+def benchmark_tta(backend, raw_images, view_counts, batch_sizes=TTA_BATCH_SIZES):
+    """TTA'nın görünüm sayısına göre uçtan uca gecikmesini ve tek görünüme göre ek yükünü ölçer.
+
+    Ölçüm, arayüz ve toplu çıkarımdaki gibi görünüm üretimi, tüm görünümler için tek
+    model çağrısı ve ortalamayı kapsar.
+    """
+    preprocessor = BatchPreprocessor(max(batch_sizes) * max(view_counts))
+
+    results = []
+    for batch_size in batch_sizes:
+        baseline = None
+        for num_views in sorted(view_counts):
+            result = run_benchmark(
+                f'tta_{backend.name}',
+                lambda x, n=num_views: average_tta(backend.predict(preprocessor.tta(x, n)), n),
+                raw_images, batch_size, views=num_views
+            )
+            baseline = baseline or result['latency_ms']['p50']
+            result['overhead'] = result['latency_ms']['p50'] / baseline
+            results.append(result)
+
+    print(f"{'Arka uç':<10}{'Batch':>8}{'Görünüm':>10}{'p50 ms':>10}{'Ek yük':>10}")
+    for r in results:
+        print(f"{backend.name:<10}{r['batch_size']:>8}{r['views']:>10}{r['latency_ms']['p50']:>10.2f}{r['overhead']:>9.2f}x")
+
+    return results
+
+def main():
+    """Ana işlev: Seçilen yapılandırmaları ölçer ve sonuçları JSON olarak kaydeder."""
+    parser = argparse.ArgumentParser(description="Keras ve TFLite çıkarım performansını ölçer.")
+    parser.add_argument('--backends', nargs='*', choices=('keras', 'tflite'), default=['keras', 'tflite'],
+                        help="Ölçülecek arka uçlar (bellek ölçümünü ayırmak için ayrı çalıştırılabilir)")
+    parser.add_argument('--batch-sizes', nargs='*', type=int, default=list(BATCH_SIZES), help="Ölçülecek batch boyutları")
+    parser.add_argument('--threads', nargs='*', type=int, default=list(THREAD_COUNTS), help="TFLite iş parçacığı sayıları")
+    parser.add_argument('--tflite-model', default=TFLITE_MODEL_PATH, help="Ölçülecek TFLite modeli")
+    parser.add_argument('--keras-model', default=MODEL_PATH, help="Ölçülecek Keras modeli")
+    parser.add_argument('--output', default=RESULTS_PATH, help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument('--tta-views', nargs='*', type=int, default=None,
+                        help=f"TTA gecikme ek yükünü bu görünüm sayıları için ölç (değer verilmezse "
+                             f"{', '.join(map(str, TTA_VIEW_COUNTS))}; en fazla {len(TTA_VIEWS)})")
+    args = parser.parse_args()
+
+    images = load_test_images()
+    print(f"{len(images)} test görüntüsü yüklendi.")
+    print(f"{'Yapılandırma':<16}{'Thread':>8}{'Batch':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'Görüntü/s':>12}{'Tepe MB':>12}")
+
+    results = []
+    if 'keras' in args.backends:
+        results += benchmark_keras(images, args.batch_sizes, args.keras_model)
+    if 'tflite' in args.backends:
+        results += benchmark_tflite(images, args.batch_sizes, args.threads, args.tflite_model)
+
+    if args.tta_views is not None:
+        raw_images = load_test_images(raw=True)
+        view_counts = args.tta_views or TTA_VIEW_COUNTS
+        if 'keras' in args.backends:
+            results += benchmark_tta(KerasBackend(args.keras_model), raw_images, view_counts)
+        if 'tflite' in args.backends:
+            results += benchmark_tta(TFLiteBackend(args.tflite_model), raw_images, view_counts)
+
+    import tensorflow as tf
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'tensorflow': tf.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'settings': {
+            'images': len(images),
+            'warmup_runs': WARMUP_RUNS,
+            'measure_runs': MEASURE_RUNS
+        },
+        'results': results
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Sonuçlar kaydedildi: {args.output}")
+
+if __name__ == "__main__":
+    main()
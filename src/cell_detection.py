@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Hücre Tespit Modülü
+Bu modül, tam bir yayma görüntüsünde hücre adaylarını bulur ve tüm adayları tek bir toplu model çağrısıyla sınıflandırır.
+"""
+
+import argparse
+import numpy as np
+import cv2
+
+from inference_backend import BACKENDS, DEFAULT_BACKEND, load_backend
+from preprocessing import preprocess_batch
+
+# Sınıf isimleri
+CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
+
+# Görüntü boyutu
+IMG_SIZE = 224
+
+# Aday bölge filtreleri (piksel cinsinden alan sınırları, en uzun kenar ve kutu kenar payı)
+MIN_CELL_AREA = 60
+MAX_CELL_AREA = 20000
+MAX_CELL_SIDE = 200
+BOX_MARGIN = 4
+
+# Sınıflara göre kutu renkleri (RGB, arayüzdeki grafik renkleriyle aynı)
+CLASS_COLORS = {
+    'Platelets': (128, 0, 128),
+    'RBC': (255, 0, 0),
+    'WBC': (0, 0, 255)
+}
+
+def propose_cells(img, min_area=MIN_CELL_AREA, max_area=MAX_CELL_AREA, margin=BOX_MARGIN, max_side=MAX_CELL_SIDE):
+    """RGB görüntüde eşikleme ve kontur analiziyle hücre adaylarını bulur.
+
+    Boyanmış hücreler arka plandan daha koyu olduğundan gri görüntü Otsu yöntemiyle
+    ters eşiklenir. Alan filtresine ek olarak uzun kenarı max_side'ı aşan (uzamış
+    kümeler) adaylar elenir. (N, 4) boyutunda [xmin, ymin, xmax, ymax] kutuları döndürür.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    # Gürültüyü temizle ve hücre içindeki boşlukları kapat
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=2)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return np.empty((0, 4), dtype=np.int32)
+
+    # Tüm konturların kutularını tek seferde hesapla ve alan filtresi uygula
+    rects = np.array([cv2.boundingRect(c) for c in contours], dtype=np.int32)
+    areas = rects[:, 2] * rects[:, 3]
+    sides = rects[:, 2:4].max(axis=1)
+    rects = rects[(areas >= min_area) & (areas <= max_area) & (sides <= max_side)]
+
+    h, w = img.shape[:2]
+    boxes = np.empty((len(rects), 4), dtype=np.int32)
+    boxes[:, 0] = rects[:, 0] - margin
+    boxes[:, 1] = rects[:, 1] - margin
+    boxes[:, 2] = rects[:, 0] + rects[:, 2] + margin
+    boxes[:, 3] = rects[:, 1] + rects[:, 3] + margin
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, w)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, h)
+
+    return boxes
+
+def crop_cells(img, boxes):
+    """Kutulardaki hücreleri keser ve tek bir normalize edilmiş float32 tensöre yazar."""
+    # Kesitler görüntünün görünümleridir; kopyalanmadan doğrudan ön işlenir
+    crops = [img[ymin:ymax, xmin:xmax] for xmin, ymin, xmax, ymax in boxes]
+    return preprocess_batch(crops, size=IMG_SIZE)
+
+def detect_cells(backend, img, boxes=None):
+    """Yayma görüntüsündeki hücreleri tespit eder ve sınıflandırır.
+
+    Tüm aday kesitler çıkarım arka ucuna tek bir çağrıda verilir. Kutular, etiketler,
+    güven oranları, olasılıklar ve sınıf başına hücre sayılarını içeren bir sözlük döndürür.
+    """
+    if boxes is None:
+        boxes = propose_cells(img)
+
+    counts = dict.fromkeys(CLASS_NAMES, 0)
+    if len(boxes) == 0:
+        return {
+            'boxes': boxes,
+            'labels': [],
+            'confidences': np.empty(0, dtype=np.float32),
+            'probabilities': np.empty((0, len(CLASS_NAMES)), dtype=np.float32),
+            'counts': counts
+        }
+
+    probabilities = backend.predict(crop_cells(img, boxes))
+    pred_indices = np.argmax(probabilities, axis=1)
+    labels = [CLASS_NAMES[i] for i in pred_indices]
+
+    for index, count in zip(*np.unique(pred_indices, return_counts=True)):
+        counts[CLASS_NAMES[index]] = int(count)
+
+    return {
+        'boxes': boxes,
+        'labels': labels,
+        'confidences': probabilities[np.arange(len(boxes)), pred_indices],
+        'probabilities': probabilities,
+        'counts': counts
+    }
+
+def draw_detections(img, detections, thickness=2):
+    """Tespit edilen hücrelerin kutularını ve etiketlerini görüntünün bir kopyasına çizer."""
+    annotated = img.copy()
+    for (xmin, ymin, xmax, ymax), label in zip(detections['boxes'], detections['labels']):
+        color = CLASS_COLORS[label]
+        cv2.rectangle(annotated, (int(xmin), int(ymin)), (int(xmax), int(ymax)), color, thickness)
+        cv2.putText(annotated, label, (int(xmin), max(int(ymin) - 3, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1, cv2.LINE_AA)
+
+    return annotated
+
+def main():
+    """Ana işlev: Komut satırından bir yayma görüntüsündeki hücreleri tespit eder."""
+    parser = argparse.ArgumentParser(description="Yayma görüntüsündeki kan hücrelerini tespit eder ve sayar.")
+    parser.add_argument('image', help="Tam alan yayma görüntüsü")
+    parser.add_argument('--output', default=None, help="İşaretlenmiş görüntünün kaydedileceği dosya")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help="Çıkarım arka ucu")
+    parser.add_argument('--model', default=None, help="Model dosyası (varsayılan: arka uca göre models/ altındaki model)")
+    parser.add_argument('--num-threads', type=int, default=None, help="TFLite yorumlayıcısının iş parçacığı sayısı")
+    args = parser.parse_args()
+
+    img = cv2.imread(args.image)
+    if img is None:
+        raise SystemExit(f"Görüntü okunamadı: {args.image}")
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    backend = load_backend(args.backend, args.model, args.num_threads)
+    detections = detect_cells(backend, img)
+
+    print(f"Tespit edilen hücre sayısı: {len(detections['boxes'])}")
+    for class_name, count in detections['counts'].items():
+        print(f"{class_name}: {count}")
+
+    if args.output:
+        annotated = draw_detections(img, detections)
+        cv2.imwrite(args.output, cv2.cvtColor(annotated, cv2.COLOR_RGB2BGR))
+        print(f"İşaretlenmiş görüntü kaydedildi: {args.output}")
+
+if __name__ == "__main__":
+    main()
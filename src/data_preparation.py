@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Veri Hazırlama Modülü
+Bu modül, Kaggle ve BCCD veri setlerindeki etiketli hücreleri kırparak data/processed altında eğitim, test ve doğrulama bölümlerini oluşturur.
+
+Hazırlama artımlıdır: her kaynak görüntünün özeti, kutuları ve her kırpıntının
+bölümü data/processed/manifest.json dosyasında tutulur. Sonraki çalıştırmalarda
+yalnızca yeni eklenen veya değişen görüntüler kırpılır, silinen görüntülerin
+kırpıntıları kaldırılır. Bölüm ataması kaynak görüntünün kimliğinden türetildiği için
+çalıştırmalar arasında değişmez ve aynı görüntünün tüm hücreleri aynı bölüme düşer.
+
+Bölüm dizinlerinde manifest'te olmayan dosyalar (ör. eski tam hazırlamanın
+<Sınıf>_NNNN.png kırpıntıları) yeni kırpıntılarla karışmaması için data/processed/legacy
+altına taşınır; --clean veya --rebuild ile silinir.
+"""
+
+import os
+import csv
+import json
+import time
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import cv2
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from prediction_cache import hash_file
+from preprocessing import resize_image
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+KAGGLE_DIR = os.path.join(DATA_DIR, 'kaggle')
+KAGGLE_IMAGES_DIR = os.path.join(KAGGLE_DIR, 'images')
+KAGGLE_ANNOTATIONS_PATH = os.path.join(KAGGLE_DIR, 'annotations.csv')
+BCCD_DIR = os.path.join(DATA_DIR, 'github', 'BCCD_Dataset', 'BCCD')
+BCCD_ANNOTATIONS_DIR = os.path.join(BCCD_DIR, 'Annotations')
+BCCD_IMAGES_DIR = os.path.join(BCCD_DIR, 'JPEGImages')
+PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+MANIFEST_PATH = os.path.join(PROCESSED_DATA_DIR, 'manifest.json')
+LEGACY_DIR = os.path.join(PROCESSED_DATA_DIR, 'legacy')
+DATASET_INFO_PATH = os.path.join(PROCESSED_DATA_DIR, 'dataset_info.csv')
+
+# Kırpıntıların kaydedileceği boyut (eğitimde yeniden boyutlandırma gerekmez); 0 ise özgün boyut
+IMG_SIZE = 224
+
+# Sınıf isimleri ve veri setlerindeki etiketlerin karşılıkları
+CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
+LABEL_MAP = {'platelets': 'Platelets', 'rbc': 'RBC', 'wbc': 'WBC'}
+
+# Bölümler ve oranları (eğitim %70, test %15, doğrulama %15)
+SPLITS = ('train', 'test', 'validation')
+SPLIT_RATIOS = (0.70, 0.15, 0.15)
+
+# Kırpma için süreç sayısı
+CROP_WORKERS = os.cpu_count()
+
+MANIFEST_VERSION = 3
+
+def load_kaggle_annotations():
+    """Kaggle annotations.csv dosyasını {kaynak kimliği: {'path', 'boxes'}} biçiminde okur.
+
+    Satırlar görüntüye göre gruplanır; her görüntünün kutuları tek seferde listeye çevrilir.
+    """
+    if not os.path.exists(KAGGLE_ANNOTATIONS_PATH):
+        return {}
+
+    annotations = pd.read_csv(KAGGLE_ANNOTATIONS_PATH)
+    annotations['label'] = annotations['label'].str.strip().str.lower().map(LABEL_MAP)
+    annotations = annotations.dropna(subset=['label'])
+
+    columns = ['xmin', 'ymin', 'xmax', 'ymax', 'label']
+    return {
+        f"kaggle/{image}": {
+            'path': os.path.join(KAGGLE_IMAGES_DIR, image),
+            'boxes': group[columns].values.tolist()
+        }
+        for image, group in annotations.groupby('image', sort=False)
+    }
+
+def load_bccd_annotations():
+    """BCCD veri setinin Pascal VOC XML etiketlerini {kaynak kimliği: {'path', 'boxes'}} biçiminde okur."""
+    sources = {}
+    if not os.path.isdir(BCCD_ANNOTATIONS_DIR):
+        return sources
+
+    for filename in sorted(os.listdir(BCCD_ANNOTATIONS_DIR)):
+        if not filename.endswith('.xml'):
+            continue
+        root = ET.parse(os.path.join(BCCD_ANNOTATIONS_DIR, filename)).getroot()
+        image_name = os.path.splitext(root.findtext('filename', filename))[0] + '.jpg'
+
+        boxes = []
+        for obj in root.iter('object'):
+            label = LABEL_MAP.get(obj.findtext('name', '').strip().lower())
+            box = obj.find('bndbox')
+            if label is None or box is None:
+                continue
+            boxes.append([float(box.findtext(k)) for k in ('xmin', 'ymin', 'xmax', 'ymax')] + [label])
+
+        sources[f"bccd/{image_name}"] = {'path': os.path.join(BCCD_IMAGES_DIR, image_name), 'boxes': boxes}
+
+    return sources
+
+def collect_sources():
+    """Tüm veri setlerindeki kaynak görüntüleri ve kutularını toplar; dosyası olmayan kaynaklar atlanır."""
+    sources = {}
+    sources.update(load_kaggle_annotations())
+    sources.update(load_bccd_annotations())
+    return {k: v for k, v in sources.items() if os.path.exists(v['path'])}
+
+def crop_key(source_id, box):
+    """Kırpıntının kaynak ve tamsayı kutudan oluşan kalıcı anahtarı."""
+    xmin, ymin, xmax, ymax = (int(round(v)) for v in box[:4])
+    return f"{source_id}:{xmin},{ymin},{xmax},{ymax}:{box[4]}"
+
+def assign_split(source_id):
+    """Kaynak görüntü kimliğinin özetinden bölüm seçer.
+
+    Aynı görüntünün hücreleri her çalıştırmada aynı bölüme düşer; böylece bir
+    görüntüdeki hücrelerin bir kısmı eğitimde, bir kısmı testte yer almaz.
+    """
+    fraction = int(hashlib.sha1(source_id.encode('utf-8')).hexdigest()[:8], 16) / 2**32
+    for split, bound in zip(SPLITS, np.cumsum(SPLIT_RATIOS)):
+        if fraction < bound:
+            return split
+    return SPLITS[-1]
+
+def crop_file_name(source_id, index):
+    """Kaynak kimliğinden türetilen kırpıntı dosya adı (ör. kaggle_image-100_007.png)."""
+    dataset, image_name = source_id.split('/', 1)
+    return f"{dataset}_{os.path.splitext(image_name)[0]}_{index:03d}.png"
+
+def clip_boxes(boxes, width, height):
+    """Float (N, 4) kutuları tek NumPy işlemiyle yuvarlar ve görüntü sınırlarına kırpar.
+
+    (tamsayı kutular, geçerli kutu maskesi) döndürür; alanı sıfır olan kutular geçersizdir.
+    """
+    boxes = np.rint(np.asarray(boxes, dtype=np.float64).reshape(-1, 4))
+    boxes = np.clip(boxes, 0, [width, height, width, height]).astype(np.int32)
+    valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    return boxes, valid
+
+def crop_source(task):
+    """Süreç havuzu işi: bir kaynak görüntüyü bir kez çözer ve tüm kutularını kırpıp kaydeder.
+
+    task = (görüntü yolu, (N, 4) kutular, N çıkış yolu, kırpıntı boyutu). Kırpıntılar
+    kırpıntı boyutuna eğitimle aynı enterpolasyonla getirilerek yazılır. Her kutu için
+    kırpıntının yazılıp yazılmadığını (geçersiz kutular atlanır) liste olarak döndürür.
+    """
+    image_path, boxes, output_paths, crop_size = task
+    img = cv2.imread(image_path)
+    if img is None:
+        raise IOError(f"Görüntü okunamadı: {image_path}")
+
+    h, w = img.shape[:2]
+    boxes, valid = clip_boxes(boxes, w, h)
+
+    # Yeniden boyutlandırma için tek tampon
+    resized = np.empty((crop_size, crop_size, 3), dtype=np.uint8) if crop_size else None
+    for (xmin, ymin, xmax, ymax), output_path in zip(boxes[valid], np.asarray(output_paths)[valid]):
+        crop = img[ymin:ymax, xmin:xmax]
+        if crop_size:
+            crop = resize_image(crop, crop_size, out=resized)
+        cv2.imwrite(output_path, crop)
+
+    return valid.tolist()
+
+def load_manifest(path=MANIFEST_PATH, crop_size=IMG_SIZE):
+    """Önceki çalıştırmanın manifest dosyasını okur; yoksa boş manifest döndürür.
+
+    Sürüm veya kırpıntı boyutu değiştiyse tüm görüntüler yeniden kırpılır; kaynak
+    düzeyindeki bölüm atamaları (sürüm 3 ve sonrası) korunur.
+    """
+    empty = {'version': MANIFEST_VERSION, 'crop_size': crop_size, 'sources': {}}
+    if not os.path.exists(path):
+        return empty
+
+    with open(path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('version') == MANIFEST_VERSION and manifest.get('crop_size') == crop_size:
+        return manifest
+
+    print("Manifest sürümü veya kırpıntı boyutu farklı; tüm görüntüler yeniden kırpılacak.")
+    for entry in manifest.get('sources', {}).values():
+        # Özet boşaltılır; bölümler plan_crops'ta korunur
+        entry['hash'] = None
+    empty['sources'] = manifest.get('sources', {})
+    return empty
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+def source_hash(source, previous):
+    """Kaynak dosyanın özetini döndürür; boyut ve değişiklik zamanı aynıysa önceki özet kullanılır."""
+    stat = os.stat(source['path'])
+    if previous and previous.get('hash') and previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime:
+        return previous['hash'], stat
+    return hash_file(source['path']), stat
+
+def plan_crops(source_id, source, split):
+    """Bir kaynağın kırpıntı kayıtlarını oluşturur; tüm kırpıntılar kaynağın bölümüne yazılır."""
+    crops = []
+    for index, box in enumerate(source['boxes']):
+        key = crop_key(source_id, box)
+        crops.append({
+            'key': key,
+            'box': box[:4],
+            'label': box[4],
+            'split': split,
+            'file': os.path.join(split, box[4], crop_file_name(source_id, index))
+        })
+    return crops
+
+def remove_crops(entry):
+    """Manifest kaydındaki kırpıntı dosyalarını siler."""
+    for crop in entry.get('crops', []):
+        path = os.path.join(PROCESSED_DATA_DIR, crop['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+def is_crop_fresh(crop):
+    """Kırpıntı dosyası yerinde mi? Geçersiz kutu nedeniyle atlanan kırpıntılar güncel sayılır."""
+    return crop.get('skipped', False) or os.path.exists(os.path.join(PROCESSED_DATA_DIR, crop['file']))
+
+def find_unmanaged_files(manifest):
+    """Bölüm dizinlerinde manifest'te olmayan (ör. eski tam hazırlamadan kalan) dosyaları bulur."""
+    managed = {c['file'] for entry in manifest['sources'].values() for c in entry['crops']}
+    unmanaged = []
+    for split in SPLITS:
+        for class_name in CLASS_NAMES:
+            class_dir = os.path.join(PROCESSED_DATA_DIR, split, class_name)
+            if not os.path.isdir(class_dir):
+                continue
+            for filename in os.listdir(class_dir):
+                rel_path = os.path.join(split, class_name, filename)
+                if rel_path not in managed:
+                    unmanaged.append(rel_path)
+    return unmanaged
+
+def set_aside_unmanaged(manifest, delete=False):
+    """Manifest dışındaki dosyaları yükleyicilerin okumadığı LEGACY_DIR altına taşır veya siler.
+
+    Bölüm dizinleri eğitimde bütün olarak okunduğundan bu dosyalar yerinde kalırsa
+    yeni kırpıntılarla karışır; aynı hücrenin kopyaları hem eğitim hem test
+    bölümüne düşebilir ve dataset_info.csv'deki sayılar yüklenen veriyle uyuşmaz.
+    """
+    unmanaged = find_unmanaged_files(manifest)
+    for rel_path in unmanaged:
+        path = os.path.join(PROCESSED_DATA_DIR, rel_path)
+        if delete:
+            os.remove(path)
+        else:
+            target = os.path.join(LEGACY_DIR, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+
+    if unmanaged:
+        action = "silindi" if delete else f"{LEGACY_DIR} altına taşındı"
+        print(f"Bölüm dizinlerindeki manifest dışı {len(unmanaged)} dosya {action}.")
+    return unmanaged
+
+def write_dataset_info(manifest):
+    """Manifest'teki kırpıntılardan sınıf/bölüm sayılarını dataset_info.csv dosyasına yazar ve grafiğini çizer."""
+    counts = {(c, s): 0 for s in SPLITS for c in CLASS_NAMES}
+    for entry in manifest['sources'].values():
+        for crop in entry['crops']:
+            if os.path.exists(os.path.join(PROCESSED_DATA_DIR, crop['file'])):
+                counts[(crop['label'], crop['split'])] += 1
+
+    with open(DATASET_INFO_PATH, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Class', 'Split', 'Count'])
+        for split in SPLITS:
+            for class_name in ['RBC', 'WBC', 'Platelets']:
+                writer.writerow([class_name, split.capitalize(), counts[(class_name, split)]])
+
+    # Veri seti dağılımı grafiği
+    x = np.arange(len(CLASS_NAMES))
+    width = 0.25
+    plt.figure(figsize=(10, 6))
+    for i, split in enumerate(SPLITS):
+        plt.bar(x + (i - 1) * width, [counts[(c, split)] for c in CLASS_NAMES], width, label=split.capitalize())
+    plt.xticks(x, CLASS_NAMES)
+    plt.ylabel('Görüntü Sayısı')
+    plt.title('Veri Seti Dağılımı')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(PROCESSED_DATA_DIR, 'data_distribution.png'))
+    plt.close()
+
+    return counts
+
+def prepare_dataset(workers=CROP_WORKERS, rebuild=False, clean=False, crop_size=IMG_SIZE):
+    """Kırpıntıları artımlı olarak günceller ve manifest ile dataset_info.csv dosyalarını yazar."""
+    manifest = load_manifest(crop_size=crop_size)
+    if rebuild:
+        manifest['sources'] = {}
+    previous_sources = manifest['sources']
+    sources = collect_sources()
+    print(f"{len(sources)} kaynak görüntü bulundu.")
+
+    # Eski hazırlamadan kalan dosyalar yeni kırpıntılarla karışmamalı
+    set_aside_unmanaged(manifest, delete=clean or rebuild)
+
+    # Kaldırılan kaynakların kırpıntılarını sil
+    removed = [s for s in previous_sources if s not in sources]
+    for source_id in removed:
+        remove_crops(previous_sources[source_id])
+
+    new_sources = {}
+    tasks = []
+    task_sources = []
+    for source_id, source in sorted(sources.items()):
+        previous = previous_sources.get(source_id)
+        digest, stat = source_hash(source, previous)
+        split = (previous or {}).get('split') or assign_split(source_id)
+        crops = plan_crops(source_id, source, split)
+
+        entry = {
+            'path': os.path.relpath(source['path'], DATA_DIR),
+            'hash': digest,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'split': split,
+            'crops': crops
+        }
+        new_sources[source_id] = entry
+
+        # Görüntü ve kutuları değişmediyse ve kırpıntılar yerindeyse atla
+        unchanged = (
+            previous is not None
+            and previous.get('hash') == digest
+            and [(c['key'], c['file']) for c in previous['crops']] == [(c['key'], c['file']) for c in crops]
+            and all(is_crop_fresh(c) for c in previous['crops'])
+        )
+        if unchanged:
+            # Atlanan kutu işaretleri önceki kayıttan taşınır
+            entry['crops'] = previous['crops']
+            continue
+
+        if previous is not None:
+            remove_crops(previous)
+        for crop in crops:
+            os.makedirs(os.path.join(PROCESSED_DATA_DIR, os.path.dirname(crop['file'])), exist_ok=True)
+        tasks.append((
+            source['path'],
+            np.array([c['box'] for c in crops], dtype=np.float64),
+            [os.path.join(PROCESSED_DATA_DIR, c['file']) for c in crops],
+            crop_size
+        ))
+        task_sources.append(source_id)
+
+    print(f"Kırpılacak görüntü: {len(tasks)} (değişmeyen: {len(sources) - len(tasks)}, silinen: {len(removed)})")
+
+    written = skipped = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(crop_source, tasks, chunksize=max(1, len(tasks) // (4 * workers)))
+            for source_id, valid in zip(task_sources, results):
+                # Geçersiz kutular manifest'te işaretlenir; aksi halde kaynak her çalıştırmada yeniden kırpılır
+                for crop, ok in zip(new_sources[source_id]['crops'], valid):
+                    if not ok:
+                        crop['skipped'] = True
+                written += sum(valid)
+                skipped += len(valid) - sum(valid)
+    print(f"{written} hücre kırpıldı (geçersiz kutu nedeniyle atlanan: {skipped}).")
+
+    manifest['sources'] = new_sources
+    save_manifest(manifest)
+
+    counts = write_dataset_info(manifest)
+    for class_name in CLASS_NAMES:
+        print(f"{class_name}: " + ", ".join(f"{s} {counts[(class_name, s)]}" for s in SPLITS))
+
+    return manifest
+
+def main():
+    """Ana işlev: Veri setini artımlı olarak hazırlar."""
+    parser = argparse.ArgumentParser(description="Etiketli hücreleri kırparak eğitim/test/doğrulama bölümlerini artımlı olarak oluşturur.")
+    parser.add_argument('--workers', type=int, default=CROP_WORKERS, help="Kırpma için süreç sayısı")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Manifest'i yok sayıp bölüm dizinlerini boşalt ve tüm görüntüleri yeniden kırp")
+    parser.add_argument('--clean', action='store_true',
+                        help=f"Bölüm dizinlerindeki manifest dışı dosyaları {LEGACY_DIR} altına taşımak yerine sil")
+    parser.add_argument('--crop-size', type=int, default=IMG_SIZE,
+                        help="Kırpıntıların kaydedileceği kare boyut (0: özgün boyutta kaydet)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    prepare_dataset(args.workers, args.rebuild, args.clean, args.crop_size)
+    end_time = time.time()
+
+    print(f"Veri hazırlama süresi: {end_time - start_time:.2f} saniye")
+
+    # Zaman bilgisini dosyaya kaydet
+    with open(os.path.join(PROJECT_DIR, 'time_tracking.md'), 'a') as f:
+        f.write(f"- Veri hazırlama: Başlangıç - {time.strftime('%d Nisan %Y %H:%M:%S', time.localtime(start_time))}, Bitiş - {time.strftime('%d Nisan %Y %H:%M:%S', time.localtime(end_time))}, Süre - {end_time - start_time:.2f} saniye\n")
+
+if __name__ == "__main__":
+    main()
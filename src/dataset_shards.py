@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Veri Seti Parçası (Shard) Oluşturma Modülü
+Bu modül, işlenmiş veri setinin her bölümünü bellek eşlemeli okunabilen tek bir uint8 dizisine paketler.
+"""
+
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+from tqdm import tqdm
+
+from preprocessing import resize_image
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+SHARDS_DIR = os.path.join(PROCESSED_DATA_DIR, 'shards')
+
+# Görüntü boyutu
+IMG_SIZE = 224
+
+# Sınıf isimleri
+CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
+
+# Paketlenecek veri bölümleri
+SPLITS = ('train', 'validation', 'test')
+
+# Görüntü çözme için iş parçacığı sayısı
+DECODE_WORKERS = 8
+
+# Desteklenen görüntü uzantıları
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def list_split_files(directory):
+    """Bölüm dizinindeki dosya yollarını ve CLASS_NAMES sırasına göre etiketlerini döndürür."""
+    filepaths = []
+    labels = []
+    for class_index, class_name in enumerate(CLASS_NAMES):
+        class_dir = os.path.join(directory, class_name)
+        for filename in sorted(os.listdir(class_dir)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                filepaths.append(os.path.join(class_dir, filename))
+                labels.append(class_index)
+
+    return filepaths, np.array(labels, dtype=np.int32)
+
+def load_resized_image(path):
+    """Görüntüyü RGB olarak okur ve eğitimle aynı enterpolasyonla IMG_SIZE boyutuna getirir."""
+    img = cv2.imread(path)
+    if img is None:
+        raise IOError(f"Görüntü okunamadı: {path}")
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return resize_image(img, IMG_SIZE)
+
+def build_shard(split_name):
+    """Bir veri bölümünü images.npy, labels.npy ve paths.txt dosyalarından oluşan bir parçaya paketler."""
+    split_dir = os.path.join(PROCESSED_DATA_DIR, split_name)
+    shard_dir = os.path.join(SHARDS_DIR, split_name)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    filepaths, labels = list_split_files(split_dir)
+    print(f"{split_name}: {len(filepaths)} görüntü paketleniyor...")
+
+    # Görüntüleri doğrudan disk üzerindeki diziye yaz; tüm bölüm belleğe alınmaz
+    images_path = os.path.join(shard_dir, 'images.npy')
+    tmp_path = images_path + '.tmp.npy'
+    images = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                       shape=(len(filepaths), IMG_SIZE, IMG_SIZE, 3))
+
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as executor:
+        for i, img in enumerate(tqdm(executor.map(load_resized_image, filepaths), total=len(filepaths))):
+            images[i] = img
+
+    images.flush()
+    del images
+    os.replace(tmp_path, images_path)
+
+    np.save(os.path.join(shard_dir, 'labels.npy'), labels)
+    with open(os.path.join(shard_dir, 'paths.txt'), 'w') as f:
+        f.write("\n".join(os.path.relpath(p, PROCESSED_DATA_DIR) for p in filepaths) + "\n")
+
+    size_mb = os.path.getsize(images_path) / 2**20
+    print(f"{split_name} parçası kaydedildi: {shard_dir} ({size_mb:.1f} MB)")
+
+def main():
+    """Ana işlev: İşlenmiş veri setinin bölümlerini parçalara dönüştürür."""
+    parser = argparse.ArgumentParser(description="İşlenmiş veri bölümlerini bellek eşlemeli uint8 parçalara paketler.")
+    parser.add_argument('--splits', nargs='*', choices=SPLITS, default=list(SPLITS), help="Paketlenecek bölümler")
+    args = parser.parse_args()
+
+    for split_name in args.splits:
+        build_shard(split_name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Dağıtık Eğitim Modülü
+Bu modül, eğitimin birden fazla CPU makinesinde (veya tek makinede birden fazla süreçte) MultiWorkerMirroredStrategy ile çalıştırılmasını sağlar.
+
+Küme yapılandırması TensorFlow'un standart TF_CONFIG ortam değişkeninden okunur.
+model_training.py bu değişkeni --workers/--task-index argümanlarından oluşturabilir
+veya --local-workers ile aynı makinede her çalışan için ayrı bir süreç başlatabilir.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+import numpy as np
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
+SCALING_REPORT_PATH = os.path.join(MODELS_DIR, 'scaling_report.json')
+
+def build_tf_config(workers, task_index):
+    """Çalışan adres listesi ve bu sürecin sırasından TF_CONFIG sözlüğü oluşturur."""
+    return {
+        'cluster': {'worker': list(workers)},
+        'task': {'type': 'worker', 'index': task_index}
+    }
+
+def read_tf_config():
+    """TF_CONFIG ortam değişkenini sözlük olarak döndürür; tanımlı değilse boş sözlük döner."""
+    return json.loads(os.environ.get('TF_CONFIG', '{}'))
+
+def num_workers():
+    """Kümedeki çalışan sayısını döndürür (dağıtık değilse 1)."""
+    cluster = read_tf_config().get('cluster', {})
+    return len(cluster.get('worker', [])) + len(cluster.get('chief', [])) or 1
+
+def worker_index():
+    """Bu sürecin veri parçası sırasını döndürür (varsa 'chief' görevi 0 kabul edilir)."""
+    config = read_tf_config()
+    task = config.get('task', {})
+    if task.get('type') == 'chief':
+        return 0
+    offset = len(config.get('cluster', {}).get('chief', []))
+    return offset + task.get('index', 0)
+
+def is_chief():
+    """Checkpoint, rapor ve dışa aktarma dosyalarını yazacak süreç bu mu?
+
+    Ayrı bir 'chief' görevi yoksa TensorFlow kuralı gereği 0 numaralı çalışan şeftir.
+    """
+    config = read_tf_config()
+    task = config.get('task', {})
+    if not task:
+        return True
+    if task.get('type') == 'chief':
+        return True
+    return task.get('type') == 'worker' and task.get('index') == 0 and 'chief' not in config.get('cluster', {})
+
+def create_strategy(workers=None, task_index=0):
+    """Dağıtım stratejisini oluşturur.
+
+    workers verilirse TF_CONFIG bu listeden oluşturulur. Birden fazla çalışan varsa
+    CPU'lar arasında halka (ring) toplama kullanan MultiWorkerMirroredStrategy,
+    aksi halde varsayılan (tek süreç) strateji döndürülür.
+    """
+    import tensorflow as tf
+
+    if workers:
+        os.environ['TF_CONFIG'] = json.dumps(build_tf_config(workers, task_index))
+
+    if num_workers() == 1:
+        return tf.distribute.get_strategy()
+
+    options = tf.distribute.experimental.CommunicationOptions(
+        implementation=tf.distribute.experimental.CommunicationImplementation.RING
+    )
+    strategy = tf.distribute.MultiWorkerMirroredStrategy(communication_options=options)
+    print(f"Dağıtık eğitim: {num_workers()} çalışan, bu süreç {worker_index()}. çalışan"
+          f"{' (şef)' if is_chief() else ''}")
+    return strategy
+
+def find_free_ports(count):
+    """Yerel makinede kullanılmayan count adet TCP portu bulur."""
+    sockets = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('localhost', 0))
+            sockets.append(s)
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+def launch_local_workers(count, script, args):
+    """Aynı makinede count adet çalışan süreci başlatır ve hepsinin bitmesini bekler.
+
+    Her süreç aynı betiği aynı argümanlarla, kendi TF_CONFIG değeriyle çalıştırır.
+    Çoklu makine kurulumunu tek bir makinede denemek için kullanılır. Tüm süreçler
+    başarıyla biterse True döner.
+    """
+    workers = [f'localhost:{port}' for port in find_free_ports(count)]
+    processes = []
+    for index in range(count):
+        env = dict(os.environ, TF_CONFIG=json.dumps(build_tf_config(workers, index)))
+        processes.append(subprocess.Popen([sys.executable, script] + list(args), env=env))
+        print(f"Çalışan {index} başlatıldı (pid {processes[-1].pid}, {workers[index]})")
+
+    return_codes = [p.wait() for p in processes]
+    for index, code in enumerate(return_codes):
+        if code != 0:
+            print(f"Çalışan {index} hata koduyla sonlandı: {code}")
+
+    return all(code == 0 for code in return_codes)
+
+def record_scaling(workers, global_batch_size, history, report_path=SCALING_REPORT_PATH):
+    """Bu çalıştırmanın verimini kaydeder ve tek çalışanlı çalıştırmaya göre ölçekleme verimliliğini döndürür.
+
+    Verim, ilk epoch (grafik izleme ve kümeye bağlanma) hariç epoch başına işlenen
+    örnek sayısından hesaplanır. Sonuçlar çalışan sayısına göre scaling_report.json
+    dosyasında tutulur; verimlilik = N çalışanlı verim / (N * tek çalışanlı verim).
+    """
+    epoch_times = history.history.get('epoch_time', [])
+    if not epoch_times:
+        return None
+
+    steps = history.params.get('steps') or 0
+    steady_epoch_time = float(np.mean(epoch_times[1:])) if len(epoch_times) > 1 else float(epoch_times[0])
+
+    report = {'runs': {}}
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            report = json.load(f)
+
+    report['runs'][str(workers)] = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'workers': workers,
+        'global_batch_size': global_batch_size,
+        'steps_per_epoch': steps,
+        'steady_epoch_time': steady_epoch_time,
+        'images_per_second': steps * global_batch_size / steady_epoch_time
+    }
+
+    baseline = report['runs'].get('1')
+    for run in report['runs'].values():
+        run['speedup'] = run['images_per_second'] / baseline['images_per_second'] if baseline else None
+        run['scaling_efficiency'] = run['speedup'] / run['workers'] if baseline else None
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'Çalışan':>8}{'Global batch':>14}{'Epoch s':>10}{'Görüntü/s':>12}{'Hızlanma':>10}{'Verimlilik':>12}")
+    for run in sorted(report['runs'].values(), key=lambda r: r['workers']):
+        speedup = f"{run['speedup']:.2f}x" if run['speedup'] is not None else '-'
+        efficiency = f"{run['scaling_efficiency'] * 100:.0f}%" if run['scaling_efficiency'] is not None else '-'
+        print(f"{run['workers']:>8}{run['global_batch_size']:>14}{run['steady_epoch_time']:>10.2f}"
+              f"{run['images_per_second']:>12.1f}{speedup:>10}{efficiency:>12}")
+    if baseline is None:
+        print("Ölçekleme verimliliği için aynı ayarlarla tek çalışanlı bir çalıştırma da yapın.")
+
+    return report['runs'][str(workers)]['scaling_efficiency']
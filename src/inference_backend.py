@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Çıkarım Arka Uçları
+Bu modül, arayüz ve toplu çıkarım için Keras veya TensorFlow Lite modelini aynı arabirimle çalıştırır.
+"""
+
+import os
+import numpy as np
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
+MODEL_PATH = os.path.join(MODELS_DIR, 'optimized_mobilenet.h5')
+TFLITE_MODEL_PATH = os.path.join(MODELS_DIR, 'model.tflite')
+
+# Görüntü boyutu
+IMG_SIZE = 224
+
+# Kullanılabilir arka uçlar
+BACKENDS = ('keras', 'tflite')
+DEFAULT_BACKEND = 'keras'
+
+class KerasBackend:
+    """Tam Keras modelini (.h5) kullanan çıkarım arka ucu."""
+
+    name = 'keras'
+
+    def __init__(self, model_path=MODEL_PATH):
+        from tensorflow.keras.models import load_model
+
+        self.model_path = model_path
+        # Çıkarım için derleme gerekmez; eğitimdeki özel metrikler (ArgmaxRecall) yüklenmez
+        self.model = load_model(model_path, compile=False)
+
+    def predict(self, batch):
+        """(N, IMG_SIZE, IMG_SIZE, 3) float32 tensör için (N, sınıf) olasılıkları döndürür."""
+        return np.asarray(self.model.predict_on_batch(batch))
+
+class TFLiteBackend:
+    """Dışa aktarılmış TFLite modelini tf.lite.Interpreter ile çalıştıran çıkarım arka ucu.
+
+    Giriş ve çıkış tensörleri bir kez ayrılır ve aynı batch boyutundaki çağrılarda
+    yeniden kullanılır; batch boyutu değiştiğinde tensörler yeniden boyutlandırılır.
+    """
+
+    name = 'tflite'
+
+    def __init__(self, model_path=TFLITE_MODEL_PATH, num_threads=None):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = output_details['index']
+
+        self._batch_size = None
+        self._allocate(1)
+
+    def _allocate(self, batch_size):
+        """Giriş ve çıkış tensörlerini verilen batch boyutu için ayırır."""
+        self.interpreter.resize_tensor_input(self._input_index, [batch_size, IMG_SIZE, IMG_SIZE, 3])
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+    def predict(self, batch):
+        """(N, IMG_SIZE, IMG_SIZE, 3) float32 tensör için (N, sınıf) olasılıkları döndürür."""
+        if len(batch) != self._batch_size:
+            self._allocate(len(batch))
+
+        # Girişi doğrudan yorumlayıcının tamponuna yaz (ara kopya olmadan)
+        self.interpreter.tensor(self._input_index)()[...] = batch
+        self.interpreter.invoke()
+
+        return self.interpreter.get_tensor(self._output_index)
+
+def load_backend(name=DEFAULT_BACKEND, model_path=None, num_threads=None):
+    """İsmi verilen çıkarım arka ucunu yükler."""
+    if name == 'keras':
+        return KerasBackend(model_path or MODEL_PATH)
+    if name == 'tflite':
+        return TFLiteBackend(model_path or TFLITE_MODEL_PATH, num_threads=num_threads)
+
+    raise ValueError(f"Bilinmeyen çıkarım arka ucu: {name} (seçenekler: {', '.join(BACKENDS)})")
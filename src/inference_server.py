@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Çıkarım Sunucusu
+Bu modül, modeli bir kez yükleyip yerel HTTP üzerinden hizmet veren ve eşzamanlı istekleri mikro-batch'lerde toplayan bir sunucu sağlar.
+
+Uç noktalar:
+    POST /predict  Gövde: ham görüntü dosyası (PNG/JPEG). Yanıt: sınıf ve olasılıklar (JSON)
+    GET  /metrics  Kuyruk derinliği, batch boyutu dağılımı ve gecikme histogramları (JSON)
+    GET  /health   Sunucunun çalıştığını doğrular
+"""
+
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import cv2
+
+from inference_backend import BACKENDS, DEFAULT_BACKEND, load_backend
+from preprocessing import preprocess_batch
+
+# Sınıf isimleri
+CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
+
+# Görüntü boyutu
+IMG_SIZE = 224
+
+# Sunucu ayarları
+HOST = '127.0.0.1'
+PORT = 8080
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 5.0
+REQUEST_TIMEOUT = 30.0
+
+# Gecikme histogramı kova sınırları (ms); son kova sınırsızdır
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+def decode_image(data):
+    """Ham görüntü baytlarını çözer ve normalize edilmiş (IMG_SIZE, IMG_SIZE, 3) float32 diziye çevirir."""
+    if not data:
+        raise ValueError("İstek gövdesi boş")
+    try:
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except cv2.error:
+        img = None
+    if img is None:
+        raise ValueError("Görüntü çözülemedi")
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return preprocess_batch([img], size=IMG_SIZE)[0]
+
+class LatencyHistogram:
+    """Sabit kovalı, iş parçacığı güvenli gecikme histogramı."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value_ms):
+        """Bir gecikme ölçümünü ilgili kovaya ekler."""
+        index = int(np.searchsorted(self.buckets, value_ms, side='left'))
+        with self.lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum_ms += value_ms
+
+    def snapshot(self):
+        """Histogramın anlık görüntüsünü sözlük olarak döndürür."""
+        with self.lock:
+            labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+            return {
+                'count': self.total,
+                'mean_ms': self.sum_ms / self.total if self.total else 0.0,
+                'buckets_ms': dict(zip(labels, self.counts))
+            }
+
+class MicroBatcher:
+    """Eşzamanlı istekleri toplayıp tek model çağrısıyla çalıştıran mikro-batch düzenleyici.
+
+    İlk istek geldikten sonra en fazla max_wait_ms kadar beklenir veya max_batch_size
+    isteğe ulaşılınca batch hemen çalıştırılır. Model yalnızca bu iş parçacığından
+    çağrıldığı için TFLite yorumlayıcısı gibi iş parçacığı güvenli olmayan arka uçlar
+    da kullanılabilir.
+    """
+
+    def __init__(self, backend, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+
+        # Ölçümler
+        self.request_latency = LatencyHistogram()
+        self.inference_latency = LatencyHistogram()
+        self.batch_sizes = [0] * (max_batch_size + 1)
+        self.batches = 0
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, img):
+        """Ön işlenmiş bir görüntüyü kuyruğa ekler ve sonucu taşıyacak Future döndürür."""
+        future = Future()
+        self.requests.put((img, future))
+        return future
+
+    def _collect(self):
+        """Kuyruktan bir batch oluşturacak kadar istek toplar."""
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            images = np.stack([img for img, _ in batch])
+
+            t0 = time.perf_counter()
+            try:
+                probabilities = self.backend.predict(images)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.inference_latency.observe((time.perf_counter() - t0) * 1000)
+
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+
+            for (_, future), probs in zip(batch, probabilities):
+                future.set_result(np.array(probs))
+
+    def metrics(self):
+        """Kuyruk derinliği, batch dağılımı ve gecikme histogramlarını döndürür."""
+        return {
+            'queue_depth': self.requests.qsize(),
+            'batches': self.batches,
+            'batch_size_histogram': {str(size): count for size, count in enumerate(self.batch_sizes) if count},
+            'request_latency': self.request_latency.snapshot(),
+            'inference_latency': self.inference_latency.snapshot()
+        }
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """/predict, /metrics ve /health uç noktalarını sunan HTTP işleyicisi."""
+
+    # Sunucu başlatılırken atanır
+    batcher = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send_json(200, self.batcher.metrics())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': 'Bulunamadı'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'Bulunamadı'})
+            return
+
+        start_time = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length <= 0:
+                raise ValueError("İstek gövdesi boş (Content-Length eksik veya 0)")
+            img = decode_image(self.rfile.read(length))
+        except (ValueError, cv2.error) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            probabilities = self.batcher.submit(img).result(timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            self._send_json(500, {'error': f"Tahmin yapılamadı: {e}"})
+            return
+
+        self.batcher.request_latency.observe((time.perf_counter() - start_time) * 1000)
+
+        pred_class_idx = int(np.argmax(probabilities))
+        self._send_json(200, {
+            'class': CLASS_NAMES[pred_class_idx],
+            'confidence': float(probabilities[pred_class_idx]),
+            'probabilities': {name: float(p) for name, p in zip(CLASS_NAMES, probabilities)}
+        })
+
+    def log_message(self, format, *args):
+        # Her istek için satır yazma; ölçümler /metrics üzerinden izlenir
+        pass
+
+def main():
+    """Ana işlev: Modeli yükler ve çıkarım sunucusunu başlatır."""
+    parser = argparse.ArgumentParser(description="Kan hücresi sınıflandırması için mikro-batch'li HTTP çıkarım sunucusu.")
+    parser.add_argument('--host', default=HOST, help="Dinlenecek adres")
+    parser.add_argument('--port', type=int, default=PORT, help="Dinlenecek port")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help="Çıkarım arka ucu")
+    parser.add_argument('--model', default=None, help="Model dosyası (varsayılan: arka uca göre models/ altındaki model)")
+    parser.add_argument('--num-threads', type=int, default=None, help="TFLite yorumlayıcısının iş parçacığı sayısı")
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE, help="Bir model çağrısındaki en fazla istek")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS, help="Batch doldurmak için en fazla bekleme süresi (ms)")
+    args = parser.parse_args()
+
+    backend = load_backend(args.backend, args.model, args.num_threads)
+    print(f"Model yüklendi ({backend.name} arka ucu).")
+
+    InferenceRequestHandler.batcher = MicroBatcher(backend, args.max_batch_size, args.max_wait_ms)
+    server = ThreadingHTTPServer((args.host, args.port), InferenceRequestHandler)
+
+    print(f"Çıkarım sunucusu çalışıyor: http://{args.host}:{args.port} "
+          f"(en fazla {args.max_batch_size} istek/batch, {args.max_wait_ms} ms bekleme)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nSunucu durduruluyor...")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
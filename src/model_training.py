@@ -7,21 +7,31 @@ Bu modül, hazırlanan veri seti üzerinde kan hücresi tespit modelini eğitir.
 """
 
 import os
+import sys
 import time
+import json
+import gzip
+import argparse
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications import MobileNetV2
-from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, Input
 from tensorflow.keras.models import Model
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
-from sklearn.metrics import classification_report, confusion_matrix
 import cv2
 from tqdm import tqdm
 
+from inference_backend import TFLiteBackend
+from training_profiler import TrainingProfiler
+from preprocessing import RESCALE, INTERPOLATION
+from distributed_training import (create_strategy, is_chief, num_workers, worker_index,
+                                  launch_local_workers, record_scaling)
+from training_state import TrainingState, CHECKPOINT_DIR, SAVE_EVERY_STEPS
+
 # Zaman takibi için başlangıç zamanını kaydet
 start_time = time.time()
 
@@ -32,6 +42,7 @@ PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
 TRAIN_DIR = os.path.join(PROCESSED_DATA_DIR, 'train')
 TEST_DIR = os.path.join(PROCESSED_DATA_DIR, 'test')
 VALIDATION_DIR = os.path.join(PROCESSED_DATA_DIR, 'validation')
+SHARDS_DIR = os.path.join(PROCESSED_DATA_DIR, 'shards')
 MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
 
 # Model dizinini oluştur
@@ -46,13 +57,80 @@ EPOCHS = 20
 NUM_CLASSES = 3
 CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
 
+# Veri yükleyici seçenekleri: Keras ImageDataGenerator, tf.data hattı veya
+# dataset_shards.py ile oluşturulan bellek eşlemeli parçalar
+DATA_LOADERS = ('generator', 'tfdata', 'shards')
+DATA_LOADER = 'generator'
+
+# tf.data önbelleği için dizin (None ise çözülmüş görüntüler bellekte tutulur)
+TFDATA_CACHE_DIR = None
+
+# Sınıf dengeleme seçenekleri: örnekleme yapılmaz, sınıflar eşit olasılıkla örneklenir
+# ('balanced') veya büyük sınıflar epoch başına MAX_SAMPLES_PER_CLASS ile sınırlanır ('capped')
+SAMPLING_MODES = ('none', 'balanced', 'capped')
+SAMPLING = 'none'
+MAX_SAMPLES_PER_CLASS = 1000
+DATASET_INFO_PATH = os.path.join(PROCESSED_DATA_DIR, 'dataset_info.csv')
+
+# Dondurulmuş omurga özniteliklerinin önbellek dizini
+FEATURE_CACHE_DIR = os.path.join(MODELS_DIR, 'feature_cache')
+FEATURE_CACHE_TAG = f'mobilenetv2_imagenet_{IMG_SIZE}'
+
+# Desteklenen görüntü uzantıları
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# TFLite niceleme (quantization) seçenekleri
+QUANTIZATION_MODES = ('dynamic', 'float16', 'int8')
+REPRESENTATIVE_SAMPLES = 200
+LATENCY_RUNS = 100
+LATENCY_WARMUP = 10
+
+# Hesaplama hassasiyeti (Keras karma hassasiyet politikaları) ve XLA derlemesi
+PRECISION_MODES = ('float32', 'mixed_bfloat16', 'mixed_float16')
+PRECISION = 'float32'
+JIT_COMPILE = False
+
+# bfloat16 hesaplamayı donanımda destekleyen CPU özellikleri (/proc/cpuinfo bayrakları)
+BF16_CPU_FLAGS = ('avx512_bf16', 'amx_bf16')
+
+# Her hassasiyet/XLA modunun epoch sürelerinin biriktirildiği rapor
+TRAINING_MODES_REPORT = os.path.join(MODELS_DIR, 'training_modes.csv')
+
+# İsteğe bağlı budama (tensorflow_model_optimization): denenecek seyreklik seviyeleri, ince
+# ayar sonrası toparlanma epoch'ları ve dışa aktarılacak seviye için kabul edilen doğruluk kaybı
+PRUNING_SPARSITY_LEVELS = (0.3, 0.5, 0.7)
+PRUNING_STRUCTURES = ('unstructured', '2:4')
+PRUNING_EPOCHS = 3
+PRUNING_LEARNING_RATE = 0.00001
+PRUNING_MAX_ACCURACY_DROP = 0.01
+PRUNING_REPORT_PATH = os.path.join(MODELS_DIR, 'pruning_report.txt')
+
+# Bilgi damıtma: eğitilmiş model öğretmen olarak küçük bir MobileNetV2 öğrenciye aktarılır
+TEACHER_MODEL_PATH = os.path.join(MODELS_DIR, 'optimized_mobilenet.h5')
+TEACHER_TFLITE_PATH = os.path.join(MODELS_DIR, 'model.tflite')
+STUDENT_MODEL_PATH = os.path.join(MODELS_DIR, 'student_mobilenet.h5')
+STUDENT_TFLITE_PATH = os.path.join(MODELS_DIR, 'student.tflite')
+DISTILLATION_REPORT_PATH = os.path.join(MODELS_DIR, 'distillation_report.txt')
+STUDENT_ALPHA = 0.35
+STUDENT_IMG_SIZE = 128
+STUDENT_IMG_SIZES = (96, 128, 160)
+DISTILL_TEMPERATURE = 4.0
+# Toplam kayıpta gerçek etiketlerin payı; kalanı öğretmenin yumuşak hedeflerinden gelir
+DISTILL_LABEL_WEIGHT = 0.1
+DISTILL_EPOCHS = 30
+
+# Değerlendirme sonuçları ve metriklerin yeniden hesaplanması için test seti olasılıkları
+EVALUATION_RESULTS_PATH = os.path.join(MODELS_DIR, 'evaluation_results.txt')
+EVALUATION_PROBABILITIES_PATH = os.path.join(MODELS_DIR, 'evaluation_probabilities.npy')
+EVALUATION_LABELS_PATH = os.path.join(MODELS_DIR, 'evaluation_labels.npy')
+
 def create_data_generators():
     """Eğitim, doğrulama ve test veri üreteçlerini oluşturur."""
     print("Veri üreteçleri oluşturuluyor...")
     
     # Veri artırma (data augmentation) için ImageDataGenerator
     train_datagen = ImageDataGenerator(
-        rescale=1./255,
+        rescale=RESCALE,
         rotation_range=20,
         width_shift_range=0.2,
         height_shift_range=0.2,
@@ -63,8 +141,8 @@ def create_data_generators():
     )
     
     # Doğrulama ve test için sadece ölçeklendirme yapılır
-    valid_datagen = ImageDataGenerator(rescale=1./255)
-    test_datagen = ImageDataGenerator(rescale=1./255)
+    valid_datagen = ImageDataGenerator(rescale=RESCALE)
+    test_datagen = ImageDataGenerator(rescale=RESCALE)
     
     # Eğitim veri üreteci
     train_generator = train_datagen.flow_from_directory(
@@ -72,6 +150,7 @@ def create_data_generators():
         target_size=(IMG_SIZE, IMG_SIZE),
         batch_size=BATCH_SIZE,
         class_mode='categorical',
+        interpolation=INTERPOLATION,
         shuffle=True
     )
     
@@ -81,6 +160,7 @@ def create_data_generators():
         target_size=(IMG_SIZE, IMG_SIZE),
         batch_size=BATCH_SIZE,
         class_mode='categorical',
+        interpolation=INTERPOLATION,
         shuffle=False
     )
     
@@ -90,18 +170,440 @@ def create_data_generators():
         target_size=(IMG_SIZE, IMG_SIZE),
         batch_size=BATCH_SIZE,
         class_mode='categorical',
+        interpolation=INTERPOLATION,
         shuffle=False
     )
     
     return train_generator, validation_generator, test_generator
 
-def build_model():
-    """MobileNetV2 tabanlı transfer öğrenme modeli oluşturur."""
+class TFDataSplit:
+    """Bir veri bölümünün tf.data hattını ve ImageDataGenerator ile uyumlu üst bilgilerini tutar.
+    
+    Eğitim ve değerlendirme işlevleri samples, classes ve class_indices alanlarını
+    flow_from_directory üreteçlerinde olduğu gibi kullanabilir.
+    """
+    
+    def __init__(self, dataset, filepaths, classes, batch_size, epoch_samples=None):
+        self.dataset = dataset
+        self.filepaths = filepaths
+        self.classes = classes
+        self.class_indices = {name: i for i, name in enumerate(CLASS_NAMES)}
+        self.samples = len(filepaths)
+        self.batch_size = batch_size
+        # Sınıf dengeleme kullanıldığında bir epoch'ta görülen örnek sayısı
+        self.epoch_samples = epoch_samples or self.samples
+    
+    def __len__(self):
+        """Bir geçişteki batch sayısı."""
+        return int(np.ceil(self.samples / self.batch_size))
+    
+    def reset(self):
+        """ImageDataGenerator arabirimiyle uyum için; tf.data her geçişte baştan başlar."""
+    
+    def distribute(self, strategy, class_weight=None):
+        """Hattı her çalışanın yalnızca kendi parçasını okuduğu dağıtık veri setine çevirir.
+        
+        Hat zaten çalışan başına parçalanmış ve çalışan batch boyutuyla gruplanmış
+        olduğundan tf.distribute'un otomatik parçalama ve yeniden gruplama adımları
+        kullanılmaz. Dağıtık veri setleri class_weight desteklemediği için sınıf
+        ağırlıkları örnek ağırlığı olarak hatta eklenir.
+        """
+        dataset = self.dataset
+        if class_weight is not None:
+            weights = tf.constant([class_weight[i] for i in range(NUM_CLASSES)], dtype=tf.float32)
+            dataset = dataset.map(lambda x, y: (x, y, tf.gather(weights, tf.argmax(y, axis=-1))))
+        
+        self.dataset = strategy.distribute_datasets_from_function(lambda input_context: dataset)
+
+def list_split_files(directory):
+    """Bölüm dizinindeki dosya yollarını ve CLASS_NAMES sırasına göre etiketlerini döndürür."""
+    filepaths = []
+    labels = []
+    for class_index, class_name in enumerate(CLASS_NAMES):
+        class_dir = os.path.join(directory, class_name)
+        for filename in sorted(os.listdir(class_dir)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                filepaths.append(os.path.join(class_dir, filename))
+                labels.append(class_index)
+    
+    return filepaths, np.array(labels, dtype=np.int32)
+
+def _decode_image(path, label):
+    """Görüntüyü çözer ve model boyutuna getirir; önbellek boyutu için uint8 olarak tutar."""
+    img = tf.io.read_file(path)
+    img = tf.io.decode_image(img, channels=3, expand_animations=False)
+    # flow_from_directory ve çıkarım yollarıyla aynı enterpolasyon
+    img = tf.image.resize(img, (IMG_SIZE, IMG_SIZE), method=INTERPOLATION)
+    img = tf.cast(img, tf.uint8)
+    return img, tf.one_hot(label, NUM_CLASSES)
+
+def build_augmentation():
+    """Eğitim verisi için batch üzerinde çalışan veri artırma katmanlarını oluşturur.
+    
+    create_data_generators içindeki döndürme, kaydırma, yakınlaştırma ve yatay çevirme
+    ayarlarına karşılık gelir (kesme/shear için hazır bir katman yoktur).
+    """
+    return tf.keras.Sequential([
+        tf.keras.layers.RandomFlip('horizontal'),
+        tf.keras.layers.RandomRotation(20 / 360, fill_mode='nearest'),
+        tf.keras.layers.RandomTranslation(0.2, 0.2, fill_mode='nearest'),
+        tf.keras.layers.RandomZoom(0.2, fill_mode='nearest')
+    ])
+
+def sample_by_class(class_datasets, class_counts, sampling, max_samples_per_class=MAX_SAMPLES_PER_CLASS):
+    """Sınıf başına ayrılmış veri setlerini seçilen dengeleme yöntemiyle birleştirir.
+    
+    Her sınıf kendi içinde karıştırılıp tekrarlanır ve sample_from_datasets ile
+    örneklenir. (veri seti, epoch başına örnek sayısı) döndürür.
+    """
+    class_counts = np.asarray(class_counts)
+    
+    if sampling == 'balanced':
+        # Her sınıf eşit olasılıkla; epoch uzunluğu değişmez, azınlık sınıfları tekrar örneklenir
+        weights = np.ones(len(class_counts)) / len(class_counts)
+        epoch_samples = int(class_counts.sum())
+    elif sampling == 'capped':
+        # Büyük sınıflar (RBC) epoch başına max_samples_per_class örnekle sınırlanır
+        capped_counts = np.minimum(class_counts, max_samples_per_class)
+        weights = capped_counts / capped_counts.sum()
+        epoch_samples = int(capped_counts.sum())
+    else:
+        raise ValueError(f"Bilinmeyen örnekleme yöntemi: {sampling} (seçenekler: {', '.join(SAMPLING_MODES)})")
+    
+    class_datasets = [
+        ds.shuffle(int(count), reshuffle_each_iteration=True).repeat()
+        for ds, count in zip(class_datasets, class_counts)
+    ]
+    dataset = tf.data.Dataset.sample_from_datasets(class_datasets, weights=weights.tolist())
+    
+    return dataset, epoch_samples
+
+def shard_epoch_samples(labels, sampling, max_samples_per_class, num_shards):
+    """Parçalanmış eğitimde her çalışanın bir epoch'ta göreceği örnek sayısı.
+    
+    Tüm çalışanların aynı sayıda adım atması (toplu iletişimde kilitlenmemesi) için
+    çalışanın kendi parçasından değil tüm bölümden hesaplanır.
+    """
+    counts = np.bincount(labels, minlength=NUM_CLASSES)
+    if sampling == 'capped':
+        counts = np.minimum(counts, max_samples_per_class)
+    return int(counts.sum()) // num_shards
+
+def compute_class_weights():
+    """dataset_info.csv dosyasındaki eğitim sayılarından sınıf ağırlıklarını hesaplar.
+    
+    Ağırlıklar toplam / (sınıf sayısı * sınıf örnek sayısı) ile hesaplanır ve
+    model.fit için {sınıf indeksi: ağırlık} sözlüğü olarak döndürülür.
+    """
+    info = pd.read_csv(DATASET_INFO_PATH)
+    train_counts = info[info['Split'].str.lower() == 'train'].set_index('Class')['Count']
+    counts = np.array([train_counts[name] for name in CLASS_NAMES], dtype=np.float64)
+    weights = counts.sum() / (NUM_CLASSES * counts)
+    
+    print("Sınıf ağırlıkları: " + ", ".join(f"{n}={w:.2f}" for n, w in zip(CLASS_NAMES, weights)))
+    
+    return {i: float(w) for i, w in enumerate(weights)}
+
+def decode_files(filepaths, labels, cache_name):
+    """Dosya listesini paralel çözen ve çözülmüş görüntüleri önbelleğe alan veri seti kurar.
+    
+    TFDATA_CACHE_DIR tanımlıysa önbellek cache_name adıyla diske yazılır; her
+    veri seti kendi önbellek dosyasını kullanmalıdır (tf.data aynı dosyaya
+    birden fazla yineleyicinin yazmasına izin vermez).
+    """
+    dataset = tf.data.Dataset.from_tensor_slices((filepaths, labels))
+    dataset = dataset.map(_decode_image, num_parallel_calls=tf.data.AUTOTUNE)
+    
+    # Çözülmüş ve yeniden boyutlandırılmış görüntüleri ilk epoch'tan sonra önbellekten oku
+    if TFDATA_CACHE_DIR:
+        os.makedirs(TFDATA_CACHE_DIR, exist_ok=True)
+        return dataset.cache(os.path.join(TFDATA_CACHE_DIR, cache_name))
+    return dataset.cache()
+
+def make_tf_dataset(directory, training=False, split_name=None, sampling='none',
+                    max_samples_per_class=MAX_SAMPLES_PER_CLASS, num_shards=1, shard_index=0):
+    """Bir bölüm dizini için paralel çözme, önbellek ve prefetch kullanan tf.data hattı kurar.
+    
+    num_shards > 1 ise dosya listesi çalışanlar arasında bölünür ve hat yalnızca
+    shard_index numaralı parçayı çözer.
+    """
+    all_filepaths, all_labels = list_split_files(directory)
+    filepaths, labels = all_filepaths[shard_index::num_shards], all_labels[shard_index::num_shards]
+    
+    cache_name = split_name or os.path.basename(directory)
+    if num_shards > 1:
+        cache_name += f'_{shard_index}of{num_shards}'
+    
+    epoch_samples = None
+    if training and sampling != 'none':
+        # Dosya listesi çözmeden önce sınıflara ayrılır; her sınıfın kendi kaynağı ve
+        # önbelleği olur, azınlık sınıfı tekrarlanırken tüm bölüm yeniden taranmaz
+        paths = np.array(filepaths, dtype=str)
+        class_datasets = [
+            decode_files(paths[labels == c], labels[labels == c], f'{cache_name}_{CLASS_NAMES[c]}')
+            for c in range(NUM_CLASSES)
+        ]
+        dataset, epoch_samples = sample_by_class(
+            class_datasets, np.bincount(labels, minlength=NUM_CLASSES), sampling, max_samples_per_class // num_shards
+        )
+    else:
+        dataset = decode_files(filepaths, labels, cache_name)
+        if training:
+            dataset = dataset.shuffle(len(filepaths), reshuffle_each_iteration=True).repeat()
+    
+    if training and num_shards > 1:
+        epoch_samples = shard_epoch_samples(all_labels, sampling, max_samples_per_class, num_shards)
+    
+    dataset = dataset.batch(BATCH_SIZE)
+    dataset = prepare_batches(dataset, training)
+    
+    return TFDataSplit(dataset, filepaths, labels, BATCH_SIZE, epoch_samples)
+
+def prepare_batches(dataset, training=False):
+    """uint8 batch'leri ölçeklendirir, eğitimde veri artırma uygular ve prefetch ekler."""
+    if training:
+        augmentation = build_augmentation()
+        dataset = dataset.map(
+            lambda x, y: (augmentation(tf.cast(x, tf.float32) * RESCALE, training=True), y),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+    else:
+        dataset = dataset.map(
+            lambda x, y: (tf.cast(x, tf.float32) * RESCALE, y),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+    
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+def load_shard(split_name):
+    """dataset_shards.py ile oluşturulan parçayı bellek eşlemeli olarak açar.
+    
+    Görüntü dizisi kopyalanmadan diskten eşlenir; (görüntüler, etiketler, dosya yolları) döndürür.
+    """
+    shard_dir = os.path.join(SHARDS_DIR, split_name)
+    images = np.load(os.path.join(shard_dir, 'images.npy'), mmap_mode='r')
+    labels = np.load(os.path.join(shard_dir, 'labels.npy'))
+    with open(os.path.join(shard_dir, 'paths.txt')) as f:
+        filepaths = [os.path.join(PROCESSED_DATA_DIR, line.rstrip('\n')) for line in f if line.strip()]
+    
+    return images, labels, filepaths
+
+def make_shard_dataset(split_name, training=False, sampling='none', max_samples_per_class=MAX_SAMPLES_PER_CLASS,
+                       num_shards=1, shard_index=0):
+    """Bellek eşlemeli bir parçadan batch'ler okuyan tf.data hattı kurar.
+    
+    Hat yalnızca indeksleri karıştırır; her batch parçadan tek bir dilimleme ile
+    okunur, böylece eğitim ve değerlendirme sırasında görüntü dosyalarına erişilmez.
+    num_shards > 1 ise indeksler çalışanlar arasında bölünür.
+    """
+    images, labels, filepaths = load_shard(split_name)
+    indices = np.arange(len(labels), dtype=np.int64)[shard_index::num_shards]
+    
+    def read_batch(indices):
+        # Sıralı indeksler diskten ardışık okumayı sağlar
+        indices = np.sort(indices)
+        return images[indices], labels[indices]
+    
+    def load_batch(indices):
+        x, y = tf.numpy_function(read_batch, [indices], [tf.uint8, tf.int32])
+        x.set_shape([None, IMG_SIZE, IMG_SIZE, 3])
+        y.set_shape([None])
+        return x, tf.one_hot(y, NUM_CLASSES)
+    
+    epoch_samples = None
+    if training and sampling != 'none':
+        # Dengeleme yalnızca indeksler üzerinde yapılır
+        class_datasets = [
+            tf.data.Dataset.from_tensor_slices(indices[labels[indices] == c])
+            for c in range(NUM_CLASSES)
+        ]
+        dataset, epoch_samples = sample_by_class(
+            class_datasets, np.bincount(labels[indices], minlength=NUM_CLASSES), sampling,
+            max_samples_per_class // num_shards
+        )
+    else:
+        dataset = tf.data.Dataset.from_tensor_slices(indices)
+        if training:
+            dataset = dataset.shuffle(len(indices), reshuffle_each_iteration=True).repeat()
+    
+    if training and num_shards > 1:
+        epoch_samples = shard_epoch_samples(labels, sampling, max_samples_per_class, num_shards)
+    
+    dataset = dataset.batch(BATCH_SIZE)
+    dataset = dataset.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = prepare_batches(dataset, training)
+    
+    return TFDataSplit(dataset, [filepaths[i] for i in indices], labels[indices], BATCH_SIZE, epoch_samples)
+
+def create_shard_datasets(sampling='none', max_samples_per_class=MAX_SAMPLES_PER_CLASS, num_shards=1, shard_index=0):
+    """Eğitim, doğrulama ve test için bellek eşlemeli parçalardan veri hatları oluşturur."""
+    print("Veri parçalarından veri hatları oluşturuluyor...")
+    
+    train_data = make_shard_dataset('train', training=True, sampling=sampling,
+                                    max_samples_per_class=max_samples_per_class,
+                                    num_shards=num_shards, shard_index=shard_index)
+    validation_data = make_shard_dataset('validation')
+    test_data = make_shard_dataset('test')
+    
+    for name, data in (('Eğitim', train_data), ('Doğrulama', validation_data), ('Test', test_data)):
+        print(f"{name}: {data.samples} görüntü, {NUM_CLASSES} sınıf")
+    
+    return train_data, validation_data, test_data
+
+def create_tf_datasets(sampling='none', max_samples_per_class=MAX_SAMPLES_PER_CLASS, num_shards=1, shard_index=0):
+    """Eğitim, doğrulama ve test için tf.data hatlarını oluşturur."""
+    print("tf.data veri hatları oluşturuluyor...")
+    
+    train_data = make_tf_dataset(TRAIN_DIR, training=True, split_name='train', sampling=sampling,
+                                 max_samples_per_class=max_samples_per_class,
+                                 num_shards=num_shards, shard_index=shard_index)
+    validation_data = make_tf_dataset(VALIDATION_DIR, split_name='validation')
+    test_data = make_tf_dataset(TEST_DIR, split_name='test')
+    
+    for name, data in (('Eğitim', train_data), ('Doğrulama', validation_data), ('Test', test_data)):
+        print(f"{name}: {data.samples} görüntü, {NUM_CLASSES} sınıf")
+    
+    return train_data, validation_data, test_data
+
+def create_data_loaders(loader=DATA_LOADER, sampling=SAMPLING, max_samples_per_class=MAX_SAMPLES_PER_CLASS,
+                        num_shards=1, shard_index=0):
+    """Seçilen yükleyiciyle ('generator', 'tfdata' veya 'shards') eğitim, doğrulama ve test verilerini oluşturur.
+    
+    Sınıf dengeli örnekleme ve eğitim verisinin çalışanlar arasında parçalanması
+    (num_shards > 1) yalnızca tf.data tabanlı yükleyicilerde kullanılabilir.
+    """
+    if loader == 'generator':
+        if sampling != 'none':
+            raise ValueError("Sınıf dengeli örnekleme için 'tfdata' veya 'shards' yükleyicisi gereklidir")
+        if num_shards > 1:
+            raise ValueError("Dağıtık eğitim için 'tfdata' veya 'shards' yükleyicisi gereklidir")
+        return create_data_generators()
+    if loader == 'tfdata':
+        return create_tf_datasets(sampling, max_samples_per_class, num_shards, shard_index)
+    if loader == 'shards':
+        return create_shard_datasets(sampling, max_samples_per_class, num_shards, shard_index)
+    
+    raise ValueError(f"Bilinmeyen veri yükleyici: {loader} (seçenekler: {', '.join(DATA_LOADERS)})")
+
+def fit_input(data):
+    """model.fit/evaluate/predict için veri kaynağını döndürür."""
+    if isinstance(data, TFDataSplit):
+        return data.dataset
+    return data
+
+def steps_per_epoch(data):
+    """Bir eğitim epoch'undaki adım sayısını döndürür (dengeleme kullanılıyorsa kısaltılmış)."""
+    return getattr(data, 'epoch_samples', data.samples) // BATCH_SIZE
+
+class ArgmaxRecall(tf.keras.metrics.Metric):
+    """Bir sınıfın duyarlılığını (recall) olasılık eşiği yerine argmax tahminden hesaplar.
+    
+    tf.keras.metrics.Recall(class_id=i) sınıfı olasılığı 0.5'i geçtiğinde tahmin edilmiş
+    sayar; üç sınıfta 0.5'in altında kalan doğru tahminler kaçırılmış görünür. Bu metrik
+    karışıklık matrisi ve sınıflandırma raporuyla aynı tanımı kullanır.
+    """
+    
+    def __init__(self, class_id, name=None, **kwargs):
+        super().__init__(name=name or f'recall_{class_id}', **kwargs)
+        self.class_id = class_id
+        self.true_positives = self.add_weight(name='true_positives', initializer='zeros')
+        self.actual_positives = self.add_weight(name='actual_positives', initializer='zeros')
+    
+    def update_state(self, y_true, y_pred, sample_weight=None):
+        actual = tf.cast(tf.equal(tf.argmax(y_true, axis=-1), self.class_id), self.dtype)
+        hits = actual * tf.cast(tf.equal(tf.argmax(y_pred, axis=-1), self.class_id), self.dtype)
+        if sample_weight is not None:
+            sample_weight = tf.reshape(tf.cast(sample_weight, self.dtype), tf.shape(actual))
+            actual *= sample_weight
+            hits *= sample_weight
+        self.true_positives.assign_add(tf.reduce_sum(hits))
+        self.actual_positives.assign_add(tf.reduce_sum(actual))
+    
+    def result(self):
+        return tf.math.divide_no_nan(self.true_positives, self.actual_positives)
+    
+    def reset_state(self):
+        self.true_positives.assign(0.0)
+        self.actual_positives.assign(0.0)
+    
+    def get_config(self):
+        return {**super().get_config(), 'class_id': self.class_id}
+
+def training_metrics():
+    """Doğruluk ve her sınıf için argmax tahmine göre duyarlılık (recall) metriklerini döndürür."""
+    return ['accuracy'] + [
+        ArgmaxRecall(class_id=i, name=f'recall_{name}')
+        for i, name in enumerate(CLASS_NAMES)
+    ]
+
+def iterate_batches(data):
+    """Veri kaynağı üzerinde tek bir geçiş yaparak (x, y) numpy batch'leri üretir."""
+    if isinstance(data, TFDataSplit):
+        yield from data.dataset.as_numpy_iterator()
+    else:
+        for i in range(len(data)):
+            yield data[i]
+
+def profiled_fit_input(data, profiler, phase):
+    """Eğitim girdisini ve profil callback'lerini döndürür; profil yoksa girdi değişmez."""
+    train_input = fit_input(data)
+    if profiler is None:
+        return train_input, []
+    
+    train_input, input_marker = profiler.wrap_input(train_input, (IMG_SIZE, IMG_SIZE, 3), NUM_CLASSES)
+    return train_input, profiler.callbacks(phase, input_marker)
+
+def state_callbacks(state, phase, tracked_callbacks):
+    """Tam durum checkpoint callback'ini döndürür; callback listesinin sonuna eklenmelidir."""
+    return [state.callback(phase, tracked_callbacks)] if state is not None else []
+
+class EpochTimeCallback(tf.keras.callbacks.Callback):
+    """Her epoch'un duvar saati süresini eğitim geçmişine 'epoch_time' olarak ekler."""
+    
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+    
+    def on_epoch_end(self, epoch, logs=None):
+        epoch_time = time.perf_counter() - self._epoch_start
+        if logs is not None:
+            logs['epoch_time'] = epoch_time
+        print(f"Epoch {epoch + 1} süresi: {epoch_time:.2f} saniye")
+
+def cpu_supports_bfloat16():
+    """İşlemcinin bfloat16 matris işlemlerini donanımda (AVX512_BF16 veya AMX) destekleyip desteklemediğini döndürür."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return any(flag in flags for flag in BF16_CPU_FLAGS)
+
+def configure_precision(precision=PRECISION):
+    """Keras hesaplama hassasiyeti politikasını ayarlar ve uygulanan politikayı döndürür.
+    
+    Model oluşturulmadan önce çağrılmalıdır. bfloat16 yalnızca GPU varsa veya CPU
+    bfloat16'yı donanımda destekliyorsa açılır; aksi halde öykünme float32'den yavaş
+    olacağından float32 ile devam edilir.
+    """
+    if precision == 'mixed_bfloat16' and not tf.config.list_physical_devices('GPU') and not cpu_supports_bfloat16():
+        print("İşlemci bfloat16 desteklemiyor (AVX512_BF16/AMX yok); float32 ile devam ediliyor.")
+        precision = 'float32'
+    
+    tf.keras.mixed_precision.set_global_policy(precision)
+    print(f"Hesaplama hassasiyeti: {precision}")
+    return precision
+
+def build_model(jit_compile=JIT_COMPILE, weights='imagenet'):
+    """MobileNetV2 tabanlı transfer öğrenme modeli oluşturur.
+    
+    Katmanlar genel hassasiyet politikasını kullanır; sayısal kararlılık için son
+    softmax katmanı her zaman float32 çalışır.
+    """
     print("Model oluşturuluyor...")
     
     # MobileNetV2 temel modelini yükle (ImageNet ağırlıkları ile)
     base_model = MobileNetV2(
-        weights='imagenet',
+        weights=weights,
         include_top=False,
         input_shape=(IMG_SIZE, IMG_SIZE, 3)
     )
@@ -115,7 +617,7 @@ def build_model():
     x = GlobalAveragePooling2D()(x)
     x = Dense(128, activation='relu')(x)
     x = Dropout(0.5)(x)
-    predictions = Dense(NUM_CLASSES, activation='softmax')(x)
+    predictions = Dense(NUM_CLASSES, activation='softmax', dtype='float32')(x)
     
     # Modeli oluştur
     model = Model(inputs=base_model.input, outputs=predictions)
@@ -124,13 +626,33 @@ def build_model():
     model.compile(
         optimizer=Adam(learning_rate=0.001),
         loss='categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=training_metrics(),
+        jit_compile=jit_compile
     )
     
     return model, base_model
 
-def train_model(model, train_generator, validation_generator):
-    """Modeli eğitir ve eğitim geçmişini döndürür."""
+def to_float32_model(model):
+    """Karma hassasiyetle veya dağıtık eğitilmiş modelin ağırlıklarını float32, yerel bir kopyaya aktarır.
+    
+    Değişkenler karma hassasiyette de float32 tutulduğu için ağırlıklar doğrudan
+    kopyalanır; böylece dışa aktarılan .h5 ve TFLite modelleri float32 kalır.
+    Dağıtık eğitimde BatchNorm hareketli istatistikleri SyncOnRead değişkenler olduğundan
+    get_weights tüm çalışanlar arasında toplu bir işlemdir; bu işlev her çalışanda
+    çağrılmalıdır. Kopya dağıtım stratejisi dışında oluşturulur, sonrasında şef çalışan
+    değerlendirmeyi diğer çalışanları beklemeden yapabilir.
+    """
+    tf.keras.mixed_precision.set_global_policy('float32')
+    float_model, _ = build_model(weights=None)
+    float_model.set_weights(model.get_weights())
+    return float_model
+
+def train_model(model, train_generator, validation_generator, class_weight=None, profiler=None, state=None):
+    """Modeli eğitir ve eğitim geçmişini döndürür.
+    
+    state verilirse tam eğitim durumu periyodik olarak kaydedilir ve yarıda kalmış
+    bir aşama son kaydedilen epoch'tan devam eder.
+    """
     print("Model eğitimi başlatılıyor...")
     
     # Eğitim sırasında en iyi modeli kaydetmek için callback
@@ -159,19 +681,174 @@ def train_model(model, train_generator, validation_generator):
         verbose=1
     )
     
+    # Profil etkinse eğitim girdisi zamanlanır
+    train_input, profile_callbacks = profiled_fit_input(train_generator, profiler, 'train')
+    
     # Modeli eğit
     history = model.fit(
-        train_generator,
-        steps_per_epoch=train_generator.samples // BATCH_SIZE,
+        train_input,
+        steps_per_epoch=steps_per_epoch(train_generator),
         epochs=EPOCHS,
-        validation_data=validation_generator,
+        initial_epoch=state.initial_epoch('train') if state is not None else 0,
+        validation_data=fit_input(validation_generator),
         validation_steps=validation_generator.samples // BATCH_SIZE,
-        callbacks=[checkpoint, early_stopping, reduce_lr]
+        class_weight=class_weight,
+        # Kaydetme BatchNorm istatistiklerini tüm çalışanlardan topladığı için checkpoint her
+        # çalışanda çalışır; Keras şef olmayan çalışanların dosyalarını geçici yollara yazar
+        callbacks=[checkpoint, early_stopping, reduce_lr, EpochTimeCallback()] + profile_callbacks
+        + state_callbacks(state, 'train', [checkpoint, early_stopping, reduce_lr])
+    )
+    
+    if state is not None:
+        history = state.complete('train', model, history)
+    
+    return history
+
+def build_feature_extractor(base_model):
+    """Dondurulmuş omurganın havuzlanmış (GlobalAveragePooling) özniteliklerini üreten model."""
+    pooled = GlobalAveragePooling2D()(base_model.output)
+    return Model(inputs=base_model.input, outputs=pooled)
+
+def extract_features(feature_extractor, directory, split_name):
+    """Bir bölümün omurga özniteliklerini hesaplar ve diskte önbelleğe alır.
+    
+    Öznitelikler features_<bölüm>.npy dosyasında, satırların hangi dosyaya ait olduğu
+    ise dosya yolu ve değiştirilme zamanı (mtime) ile birlikte features_<bölüm>.json
+    dizininde tutulur. Sonraki çalıştırmalarda yalnızca yeni veya değişmiş dosyaların
+    öznitelikleri hesaplanır. Bellek eşlemeli öznitelik dizisini ve etiketleri döndürür.
+    """
+    os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+    features_path = os.path.join(FEATURE_CACHE_DIR, f'features_{split_name}.npy')
+    index_path = os.path.join(FEATURE_CACHE_DIR, f'features_{split_name}.json')
+    
+    filepaths, labels = list_split_files(directory)
+    mtimes = [os.path.getmtime(p) for p in filepaths]
+    
+    # Önceki önbelleği yükle
+    cached_rows = {}
+    cached_features = None
+    if os.path.exists(index_path) and os.path.exists(features_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if index.get('backbone') == FEATURE_CACHE_TAG:
+            cached_rows = index['files']
+            cached_features = np.load(features_path, mmap_mode='r')
+    
+    missing = [i for i, (p, m) in enumerate(zip(filepaths, mtimes))
+               if p not in cached_rows or cached_rows[p][0] != m]
+    
+    if not missing and len(cached_rows) == len(filepaths):
+        rows = np.array([cached_rows[p][1] for p in filepaths])
+        if np.array_equal(rows, np.arange(len(filepaths))):
+            print(f"Öznitelik önbelleği kullanılıyor: {split_name} ({len(filepaths)} görüntü)")
+            return cached_features, labels
+    
+    print(f"Öznitelikler hesaplanıyor: {split_name} ({len(missing)}/{len(filepaths)} görüntü)")
+    
+    # Yeni veya değişmiş dosyaların özniteliklerini hesapla
+    new_features = {}
+    if missing:
+        dataset = tf.data.Dataset.from_tensor_slices(([filepaths[i] for i in missing], labels[missing]))
+        dataset = dataset.map(_decode_image, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.map(lambda x, y: tf.cast(x, tf.float32) * RESCALE, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+        
+        offset = 0
+        for batch in tqdm(dataset, total=int(np.ceil(len(missing) / BATCH_SIZE))):
+            batch_features = feature_extractor.predict_on_batch(batch)
+            for j, feature in enumerate(np.asarray(batch_features)):
+                new_features[missing[offset + j]] = feature
+            offset += len(batch_features)
+    
+    # Önbelleği dosya sırasına göre yeniden yaz
+    feature_dim = feature_extractor.output_shape[-1]
+    tmp_path = features_path + '.tmp.npy'
+    features = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(len(filepaths), feature_dim))
+    for i, path in enumerate(filepaths):
+        if i in new_features:
+            features[i] = new_features[i]
+        else:
+            features[i] = cached_features[cached_rows[path][1]]
+    features.flush()
+    del features, cached_features
+    os.replace(tmp_path, features_path)
+    
+    with open(index_path, 'w') as f:
+        json.dump({
+            'backbone': FEATURE_CACHE_TAG,
+            'files': {p: [m, i] for i, (p, m) in enumerate(zip(filepaths, mtimes))}
+        }, f)
+    
+    return np.load(features_path, mmap_mode='r'), labels
+
+def train_head_on_features(model, base_model, class_weight=None, profiler=None, jit_compile=JIT_COMPILE, state=None):
+    """İlk eğitim aşamasını önbelleğe alınmış omurga öznitelikleri üzerinde yürütür.
+    
+    Omurga dondurulmuş olduğundan yalnızca Dense/Dropout başlığı eğitilir. Başlık
+    katmanları tam modelle paylaşıldığı için öğrenilen ağırlıklar doğrudan modele
+    yansır. Öznitelikler artırılmamış görüntülerden çıkarılır; veri artırma yalnızca
+    ince ayar aşamasında uygulanır.
+    """
+    print("Model başlığı önbelleğe alınmış öznitelikler üzerinde eğitiliyor...")
+    
+    feature_extractor = build_feature_extractor(base_model)
+    train_features, train_labels = extract_features(feature_extractor, TRAIN_DIR, 'train')
+    val_features, val_labels = extract_features(feature_extractor, VALIDATION_DIR, 'validation')
+    
+    # Tam modelin sınıflandırma katmanlarını (Dense, Dropout, Dense) paylaşan başlık modeli
+    feature_input = Input(shape=(train_features.shape[1],))
+    x = feature_input
+    for layer in model.layers[-3:]:
+        x = layer(x)
+    head_model = Model(inputs=feature_input, outputs=x)
+    
+    head_model.compile(
+        optimizer=Adam(learning_rate=0.001),
+        loss='categorical_crossentropy',
+        metrics=training_metrics(),
+        jit_compile=jit_compile
+    )
+    
+    # Erken durdurma callback'i
+    early_stopping = EarlyStopping(
+        monitor='val_loss',
+        patience=5,
+        restore_best_weights=True,
+        verbose=1
+    )
+    
+    # Öğrenme oranını azaltma callback'i
+    reduce_lr = ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=0.2,
+        patience=3,
+        min_lr=0.00001,
+        verbose=1
+    )
+    
+    history = head_model.fit(
+        train_features,
+        tf.keras.utils.to_categorical(train_labels, NUM_CLASSES),
+        batch_size=BATCH_SIZE,
+        epochs=EPOCHS,
+        initial_epoch=state.initial_epoch('train') if state is not None else 0,
+        shuffle=True,
+        validation_data=(val_features, tf.keras.utils.to_categorical(val_labels, NUM_CLASSES)),
+        class_weight=class_weight,
+        callbacks=[early_stopping, reduce_lr, EpochTimeCallback()] + (profiler.callbacks('train_head') if profiler else [])
+        + state_callbacks(state, 'train', [early_stopping, reduce_lr])
     )
     
+    # En iyi başlık ağırlıkları tam modelde; train_model ile aynı dosyaya kaydet
+    model.save(os.path.join(MODELS_DIR, 'best_model.h5'))
+    
+    if state is not None:
+        history = state.complete('train', model, history)
+    
     return history
 
-def fine_tune_model(model, base_model, train_generator, validation_generator):
+def fine_tune_model(model, base_model, train_generator, validation_generator, class_weight=None, profiler=None,
+                    jit_compile=JIT_COMPILE, state=None):
     """Modelin son katmanlarını ince ayarlar."""
     print("Model ince ayarı başlatılıyor...")
     
@@ -183,7 +860,8 @@ def fine_tune_model(model, base_model, train_generator, validation_generator):
     model.compile(
         optimizer=Adam(learning_rate=0.0001),
         loss='categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=training_metrics(),
+        jit_compile=jit_compile
     )
     
     # İnce ayar için checkpoint
@@ -212,47 +890,102 @@ def fine_tune_model(model, base_model, train_generator, validation_generator):
         verbose=1
     )
     
+    # Profil etkinse eğitim girdisi zamanlanır
+    train_input, profile_callbacks = profiled_fit_input(train_generator, profiler, 'fine_tune')
+    
     # İnce ayar eğitimi
     fine_tune_history = model.fit(
-        train_generator,
-        steps_per_epoch=train_generator.samples // BATCH_SIZE,
+        train_input,
+        steps_per_epoch=steps_per_epoch(train_generator),
         epochs=10,
-        validation_data=validation_generator,
+        initial_epoch=state.initial_epoch('fine_tune') if state is not None else 0,
+        validation_data=fit_input(validation_generator),
         validation_steps=validation_generator.samples // BATCH_SIZE,
-        callbacks=[fine_tune_checkpoint, fine_tune_early_stopping, fine_tune_reduce_lr]
+        class_weight=class_weight,
+        # Checkpoint tüm çalışanlarda çalışır (bkz. train_model)
+        callbacks=[fine_tune_checkpoint, fine_tune_early_stopping, fine_tune_reduce_lr, EpochTimeCallback()]
+        + profile_callbacks
+        + state_callbacks(state, 'fine_tune', [fine_tune_checkpoint, fine_tune_early_stopping, fine_tune_reduce_lr])
     )
     
+    if state is not None:
+        fine_tune_history = state.complete('fine_tune', model, fine_tune_history)
+    
     return fine_tune_history
 
-def evaluate_model(model, test_generator):
-    """Modeli test veri seti üzerinde değerlendirir."""
-    print("Model değerlendiriliyor...")
+def predict_test_set(model, test_generator):
+    """Test setini tek geçişte modelden geçirir; olasılıkları ve gerçek sınıfları .npy olarak kaydeder."""
+    test_generator.reset()
+    probabilities = np.asarray(model.predict(fit_input(test_generator)), dtype=np.float32)
+    y_true = np.asarray(test_generator.classes, dtype=np.int64)
     
-    # Test veri seti üzerinde değerlendirme
-    test_loss, test_accuracy = model.evaluate(test_generator)
-    print(f"Test doğruluğu: {test_accuracy:.4f}")
-    print(f"Test kaybı: {test_loss:.4f}")
+    np.save(EVALUATION_PROBABILITIES_PATH, probabilities)
+    np.save(EVALUATION_LABELS_PATH, y_true)
+    return y_true, probabilities
+
+def load_test_predictions():
+    """Son değerlendirmede kaydedilen gerçek sınıfları ve olasılıkları yükler."""
+    return np.load(EVALUATION_LABELS_PATH), np.load(EVALUATION_PROBABILITIES_PATH)
+
+def compute_metrics(y_true, probabilities, num_classes=NUM_CLASSES):
+    """Olasılıklardan kayıp, doğruluk, karmaşıklık matrisi ve sınıf başına metrikleri hesaplar.
     
-    # Tahminleri al
-    test_generator.reset()
-    y_pred = model.predict(test_generator)
-    y_pred_classes = np.argmax(y_pred, axis=1)
+    Kayıp, Keras'ın categorical_crossentropy hesabıyla aynı kırpmayı kullanır.
+    """
+    y_pred = np.argmax(probabilities, axis=1)
+    true_probabilities = probabilities[np.arange(len(y_true)), y_true]
+    loss = float(-np.mean(np.log(np.clip(true_probabilities, 1e-7, 1 - 1e-7))))
     
-    # Gerçek sınıfları al
-    y_true = test_generator.classes
+    # Karmaşıklık matrisi: (gerçek, tahmin) çiftlerinin tek bincount ile sayımı
+    cm = np.bincount(y_true * num_classes + y_pred, minlength=num_classes ** 2).reshape(num_classes, num_classes)
     
-    # Sınıf etiketlerini al
-    class_labels = list(test_generator.class_indices.keys())
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros_like(tp), where=precision + recall > 0)
     
-    # Sınıflandırma raporu
-    report = classification_report(y_true, y_pred_classes, target_names=class_labels)
-    print("Sınıflandırma Raporu:")
-    print(report)
+    return {
+        'loss': loss,
+        'accuracy': float(tp.sum() / max(cm.sum(), 1)),
+        'confusion_matrix': cm,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'support': support
+    }
+
+def format_classification_report(metrics, class_labels, digits=2):
+    """Metriklerden sklearn.metrics.classification_report ile aynı biçimde metin rapor oluşturur."""
+    precision, recall, f1, support = metrics['precision'], metrics['recall'], metrics['f1'], metrics['support']
+    total = support.sum()
+    weights = support / max(total, 1)
     
-    # Karmaşıklık matrisi
-    cm = confusion_matrix(y_true, y_pred_classes)
+    rows = [(name, p, r, f, s) for name, p, r, f, s in zip(class_labels, precision, recall, f1, support)]
+    averages = [
+        ('macro avg', precision.mean(), recall.mean(), f1.mean(), total),
+        ('weighted avg', precision @ weights, recall @ weights, f1 @ weights, total)
+    ]
+    
+    width = max(len(name) for name in list(class_labels) + ['weighted avg'])
+    headers = ['precision', 'recall', 'f1-score', 'support']
+    row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+    
+    report = ("{:>{width}s} " + " {:>9}" * len(headers)).format('', *headers, width=width) + "\n\n"
+    for row in rows:
+        report += row_fmt.format(*row, width=width, digits=digits)
+    report += "\n"
+    report += ("{:>{width}s} " + " {:>9}" * 2 + " {:>9.{digits}f} {:>9}\n").format(
+        'accuracy', '', '', metrics['accuracy'], total, width=width, digits=digits
+    )
+    for row in averages:
+        report += row_fmt.format(*row, width=width, digits=digits)
     
-    # Sonuçları görselleştir
+    return report
+
+def plot_confusion_matrix(cm, class_labels, path):
+    """Karmaşıklık matrisini hücre değerleriyle birlikte çizer ve kaydeder."""
     plt.figure(figsize=(10, 8))
     plt.imshow(cm, interpolation='nearest', cmap=plt.cm.Blues)
     plt.title('Karmaşıklık Matrisi')
@@ -261,23 +994,38 @@ def evaluate_model(model, test_generator):
     plt.xticks(tick_marks, class_labels, rotation=45)
     plt.yticks(tick_marks, class_labels)
     
-    # Matris değerlerini ekle
-    thresh = cm.max() / 2.
-    for i in range(cm.shape[0]):
-        for j in range(cm.shape[1]):
-            plt.text(j, i, format(cm[i, j], 'd'),
-                     horizontalalignment="center",
-                     color="white" if cm[i, j] > thresh else "black")
+    # Hücre konumları ve yazı renkleri tek seferde hesaplanır
+    rows, cols = np.indices(cm.shape)
+    colors = np.where(cm > cm.max() / 2., 'white', 'black')
+    for i, j, value, color in zip(rows.ravel(), cols.ravel(), cm.ravel(), colors.ravel()):
+        plt.text(j, i, str(value), horizontalalignment="center", color=color)
     
     plt.tight_layout()
     plt.ylabel('Gerçek Sınıf')
     plt.xlabel('Tahmin Edilen Sınıf')
     
     # Grafiği kaydet
-    plt.savefig(os.path.join(MODELS_DIR, 'confusion_matrix.png'))
+    plt.savefig(path)
+    plt.close()
+
+def report_evaluation(y_true, probabilities, class_labels=CLASS_NAMES):
+    """Olasılıklardan tüm metrikleri hesaplar; raporu, karmaşıklık matrisini ve sonuç dosyasını yazar."""
+    metrics = compute_metrics(y_true, probabilities, len(class_labels))
+    test_loss, test_accuracy = metrics['loss'], metrics['accuracy']
+    print(f"Test doğruluğu: {test_accuracy:.4f}")
+    print(f"Test kaybı: {test_loss:.4f}")
+    
+    # Sınıflandırma raporu
+    report = format_classification_report(metrics, class_labels)
+    print("Sınıflandırma Raporu:")
+    print(report)
+    
+    # Karmaşıklık matrisi
+    cm = metrics['confusion_matrix']
+    plot_confusion_matrix(cm, class_labels, os.path.join(MODELS_DIR, 'confusion_matrix.png'))
     
     # Değerlendirme sonuçlarını dosyaya kaydet
-    with open(os.path.join(MODELS_DIR, 'evaluation_results.txt'), 'w') as f:
+    with open(EVALUATION_RESULTS_PATH, 'w') as f:
         f.write(f"Test Doğruluğu: {test_accuracy:.4f}\n")
         f.write(f"Test Kaybı: {test_loss:.4f}\n\n")
         f.write("Sınıflandırma Raporu:\n")
@@ -285,6 +1033,21 @@ def evaluate_model(model, test_generator):
     
     return test_accuracy, report, cm
 
+def evaluate_model(model, test_generator):
+    """Modeli test veri seti üzerinde değerlendirir.
+    
+    Test seti yalnızca bir kez çözülüp modelden geçirilir. Olasılıklar
+    evaluation_results.txt dosyasının yanına kaydedilir; kayıp, doğruluk, rapor ve
+    karmaşıklık matrisi bu olasılıklardan hesaplanır ve --reevaluate ile model
+    çalıştırılmadan yeniden üretilebilir.
+    """
+    print("Model değerlendiriliyor...")
+    
+    y_true, probabilities = predict_test_set(model, test_generator)
+    class_labels = list(test_generator.class_indices.keys())
+    
+    return report_evaluation(y_true, probabilities, class_labels)
+
 def plot_training_history(history, fine_tune_history=None):
     """Eğitim geçmişini görselleştirir."""
     print("Eğitim geçmişi görselleştiriliyor...")
@@ -337,47 +1100,815 @@ def plot_training_history(history, fine_tune_history=None):
     plt.tight_layout()
     plt.savefig(os.path.join(MODELS_DIR, 'training_history.png'))
 
-def optimize_model(model):
-    """Modeli optimize eder ve kaydeder."""
+def save_epoch_report(history, fine_tune_history=None):
+    """Her epoch'un süresini, kayıp/doğruluk ve sınıf başına duyarlılık değerlerini CSV'ye yazar."""
+    frames = []
+    for phase, h in (('initial', history), ('fine_tune', fine_tune_history)):
+        if h is None:
+            continue
+        frame = pd.DataFrame(h.history)
+        frame.insert(0, 'epoch', np.arange(1, len(frame) + 1))
+        frame.insert(0, 'phase', phase)
+        frames.append(frame)
+    
+    report = pd.concat(frames, ignore_index=True)
+    report.to_csv(os.path.join(MODELS_DIR, 'epoch_report.csv'), index=False)
+    
+    # Süre ve doğrulama duyarlılığı özetini yazdır
+    columns = [c for c in ['phase', 'epoch', 'epoch_time'] + [f'val_recall_{n}' for n in CLASS_NAMES] if c in report]
+    print(report[columns].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    
+    return report
+
+def record_training_mode(precision, jit_compile, loader, history, fine_tune_history=None):
+    """Bu çalıştırmanın hassasiyet/XLA moduna göre epoch sürelerini training_modes.csv dosyasına ekler.
+    
+    İlk epoch grafik izleme ve XLA derlemesini içerdiğinden ayrı, kalan epoch'ların
+    ortalaması ayrı yazılır; modlar bu ortalama üzerinden karşılaştırılmalıdır.
+    """
+    rows = []
+    for phase, h in (('initial', history), ('fine_tune', fine_tune_history)):
+        epoch_times = h.history.get('epoch_time', []) if h is not None else []
+        if not epoch_times:
+            continue
+        rows.append({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'precision': precision,
+            'jit_compile': jit_compile,
+            'loader': loader,
+            'phase': phase,
+            'epochs': len(epoch_times),
+            'first_epoch_time': epoch_times[0],
+            'steady_epoch_time': np.mean(epoch_times[1:]) if len(epoch_times) > 1 else epoch_times[0],
+            'val_accuracy': h.history['val_accuracy'][-1] if 'val_accuracy' in h.history else None
+        })
+    
+    if not rows:
+        return
+    
+    report = pd.DataFrame(rows)
+    report.to_csv(TRAINING_MODES_REPORT, mode='a', index=False, header=not os.path.exists(TRAINING_MODES_REPORT))
+    print(report[['precision', 'jit_compile', 'phase', 'first_epoch_time', 'steady_epoch_time']]
+          .to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+def representative_dataset(num_samples=REPRESENTATIVE_SAMPLES):
+    """Tam tamsayı niceleme için eğitim setinden temsilî örnekler üretir."""
+    datagen = ImageDataGenerator(rescale=RESCALE)
+    generator = datagen.flow_from_directory(
+        TRAIN_DIR,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        interpolation=INTERPOLATION,
+        batch_size=1,
+        class_mode=None,
+        shuffle=True,
+        seed=42
+    )
+    
+    def gen():
+        for i in range(min(num_samples, generator.samples)):
+            yield [generator[i].astype(np.float32)]
+    
+    return gen
+
+def convert_to_tflite(model, quantization=None, sparse=False):
+    """Keras modelini verilen niceleme yöntemiyle TFLite formatına dönüştürür.
+    
+    sparse True ise budanmış ağırlıklar TFLite'ın seyrek tensör biçiminde saklanır.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    
+    if quantization == 'dynamic':
+        # Ağırlıklar int8, aktivasyonlar float32
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        # Tam tamsayı niceleme; giriş/çıkış float32 kalır, böylece arka uçlar değişmeden kullanılabilir
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset()
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif quantization is not None:
+        raise ValueError(f"Bilinmeyen niceleme yöntemi: {quantization}")
+    
+    if sparse:
+        converter.optimizations = list(converter.optimizations) + [tf.lite.Optimize.EXPERIMENTAL_SPARSITY]
+    
+    return converter.convert()
+
+def measure_latency(predict_fn, sample):
+    """Tek görüntülük tahmin gecikmesinin ortalamasını ve p95 değerini (ms) ölçer."""
+    for _ in range(LATENCY_WARMUP):
+        predict_fn(sample)
+    
+    timings = np.empty(LATENCY_RUNS)
+    for i in range(LATENCY_RUNS):
+        t0 = time.perf_counter()
+        predict_fn(sample)
+        timings[i] = (time.perf_counter() - t0) * 1000
+    
+    return timings.mean(), np.percentile(timings, 95)
+
+def evaluate_predict_fn(predict_fn, test_generator):
+    """Verilen tahmin işlevinin test veri setindeki doğruluğunu hesaplar."""
+    correct = 0
+    total = 0
+    for x, y in iterate_batches(test_generator):
+        y_pred = predict_fn(x.astype(np.float32))
+        correct += np.sum(np.argmax(y_pred, axis=1) == np.argmax(y, axis=1))
+        total += len(x)
+    
+    return correct / total
+
+def write_quantization_report(results, filename='quantization_report.txt'):
+    """Niceleme karşılaştırma raporunu evaluation_results.txt dosyasının yanına yazar."""
+    baseline_accuracy = results[0]['accuracy']
+    
+    lines = [
+        "TFLite Niceleme Raporu",
+        "",
+        f"{'Model':<22}{'Boyut (MB)':>12}{'Ort. (ms)':>12}{'p95 (ms)':>12}{'Doğruluk':>12}{'Fark':>10}"
+    ]
+    for r in results:
+        if r['accuracy'] is None:
+            accuracy, delta = '-', '-'
+        else:
+            accuracy = f"{r['accuracy']:.4f}"
+            delta = '-' if baseline_accuracy is None else f"{r['accuracy'] - baseline_accuracy:+.4f}"
+        lines.append(
+            f"{r['name']:<22}{r['size_mb']:>12.2f}{r['latency_mean']:>12.2f}{r['latency_p95']:>12.2f}{accuracy:>12}{delta:>10}"
+        )
+    
+    report = "\n".join(lines) + "\n"
+    print(report)
+    
+    with open(os.path.join(MODELS_DIR, filename), 'w') as f:
+        f.write(report)
+    
+    return report
+
+def optimize_model(model, test_generator=None, quantization_modes=(), keras_accuracy=None, name='model',
+                   keras_filename='optimized_mobilenet.h5', sparse=False):
+    """Modeli optimize eder ve kaydeder.
+    
+    quantization_modes içindeki her yöntem ('dynamic', 'float16', 'int8') için ayrıca
+    models/<name>_<yöntem>.tflite dosyası üretilir ve boyut, CPU gecikmesi ve test
+    doğruluğu float modelle karşılaştırılarak quantization_report.txt dosyasına yazılır.
+    keras_accuracy verilirse (evaluate_model sonucu) float model yeniden değerlendirilmez.
+    name ve keras_filename, ana modelin dosyalarının üzerine yazmadan başka bir modeli
+    (ör. damıtılmış öğrenci) dışa aktarmak için kullanılır. sparse True ise (budanmış
+    model) TFLite modelleri seyrek biçimde kaydedilir.
+    """
     print("Model optimize ediliyor...")
     
     # Modeli TensorFlow Lite formatına dönüştür
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    tflite_model = converter.convert()
+    tflite_model = convert_to_tflite(model, sparse=sparse)
     
     # TFLite modelini kaydet
-    with open(os.path.join(MODELS_DIR, 'model.tflite'), 'wb') as f:
+    with open(os.path.join(MODELS_DIR, f'{name}.tflite'), 'wb') as f:
         f.write(tflite_model)
     
     # Optimize edilmiş modeli kaydet
-    model.save(os.path.join(MODELS_DIR, 'optimized_mobilenet.h5'))
+    model.save(os.path.join(MODELS_DIR, keras_filename))
+    
+    if quantization_modes:
+        # Gecikme ölçümü için tek görüntülük örnek
+        if test_generator is not None:
+            sample = next(iterate_batches(test_generator))[0][:1].astype(np.float32)
+        else:
+            sample = np.random.rand(1, IMG_SIZE, IMG_SIZE, 3).astype(np.float32)
+        
+        # Float Keras modeli referans olarak kullanılır
+        keras_mean, keras_p95 = measure_latency(model.predict_on_batch, sample)
+        results = [{
+            'name': 'keras (float32)',
+            'size_mb': os.path.getsize(os.path.join(MODELS_DIR, keras_filename)) / 2**20,
+            'latency_mean': keras_mean,
+            'latency_p95': keras_p95,
+            'accuracy': keras_accuracy if keras_accuracy is not None else (
+                evaluate_predict_fn(model.predict_on_batch, test_generator) if test_generator is not None else None
+            )
+        }]
+        
+        variants = [('float32', f'{name}.tflite')]
+        for mode in quantization_modes:
+            print(f"TFLite modeli nicelleniyor: {mode}")
+            filename = f'{name}_{mode}.tflite'
+            with open(os.path.join(MODELS_DIR, filename), 'wb') as f:
+                f.write(convert_to_tflite(model, mode, sparse))
+            variants.append((mode, filename))
+        
+        for mode, filename in variants:
+            path = os.path.join(MODELS_DIR, filename)
+            backend = TFLiteBackend(path)
+            latency_mean, latency_p95 = measure_latency(backend.predict, sample)
+            results.append({
+                'name': f'tflite ({mode})',
+                'size_mb': os.path.getsize(path) / 2**20,
+                'latency_mean': latency_mean,
+                'latency_p95': latency_p95,
+                'accuracy': evaluate_predict_fn(backend.predict, test_generator) if test_generator is not None else None
+            })
+        
+        write_quantization_report(results, 'quantization_report.txt' if name == 'model' else f'{name}_quantization_report.txt')
     
     print("Model optimizasyonu tamamlandı ve kaydedildi.")
 
+def import_tfmot():
+    """İsteğe bağlı tensorflow_model_optimization paketini içe aktarır."""
+    try:
+        import tensorflow_model_optimization as tfmot
+    except ImportError:
+        raise ImportError("Budama için tensorflow-model-optimization paketi gereklidir "
+                          "(pip install tensorflow-model-optimization)")
+    return tfmot
+
+def count_flops(model):
+    """Conv2D, DepthwiseConv2D ve Dense katmanlarının görüntü başına FLOP ve ağırlık sayılarını hesaplar.
+    
+    Her çıkış konumunda çekirdeğin her ağırlığı bir çarpma-toplama (2 FLOP) yapar;
+    sıfır ağırlıklar seyrek çekirdeklerin atlayabileceği işlemler olarak ayrıca sayılır.
+    """
+    counts = {'dense_flops': 0, 'flops': 0, 'weights': 0, 'nonzero_weights': 0}
+    for layer in model.layers:
+        if not isinstance(layer, (tf.keras.layers.Conv2D, tf.keras.layers.DepthwiseConv2D, Dense)):
+            continue
+        kernel = layer.get_weights()[0]
+        nonzero = int(np.count_nonzero(kernel))
+        positions = int(np.prod(layer.output_shape[1:-1]))
+        counts['dense_flops'] += 2 * positions * kernel.size
+        counts['flops'] += 2 * positions * nonzero
+        counts['weights'] += kernel.size
+        counts['nonzero_weights'] += nonzero
+    
+    return counts
+
+def prune_to_sparsity(model, train_generator, validation_generator, sparsity, structure='unstructured',
+                      class_weight=None, epochs=PRUNING_EPOCHS):
+    """Modelin bir kopyasını büyüklüğe göre hedef seyrekliğe kadar budar ve kısa bir ince ayarla toparlar.
+    
+    Seyreklik son epoch hariç polinom takvimle artırılır; son epoch hedef seyreklikte
+    toparlanma içindir. '2:4' yapısında her dört ağırlıktan en küçük ikisi sıfırlanır
+    (seyreklik 0.5 olur). Budama sarmalayıcıları kaldırılmış, derlenmiş model döndürülür.
+    """
+    tfmot = import_tfmot()
+    print(f"Model budanıyor: hedef seyreklik {sparsity:.0%} ({structure})")
+    
+    steps = steps_per_epoch(train_generator)
+    schedule = tfmot.sparsity.keras.PolynomialDecay(
+        initial_sparsity=0.0,
+        final_sparsity=sparsity,
+        begin_step=0,
+        end_step=max(1, steps * (epochs - 1)),
+        frequency=max(1, min(100, steps // 4))
+    )
+    prune_params = {'pruning_schedule': schedule}
+    if structure == '2:4':
+        prune_params['sparsity_m_by_n'] = (2, 4)
+    
+    # Özgün model sonraki seviyeler için değişmeden kalır
+    clone = tf.keras.models.clone_model(model)
+    clone.set_weights(model.get_weights())
+    pruned = tfmot.sparsity.keras.prune_low_magnitude(clone, **prune_params)
+    
+    pruned.compile(
+        optimizer=Adam(learning_rate=PRUNING_LEARNING_RATE),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    pruned.fit(
+        fit_input(train_generator),
+        steps_per_epoch=steps,
+        epochs=epochs,
+        validation_data=fit_input(validation_generator),
+        validation_steps=validation_generator.samples // BATCH_SIZE,
+        class_weight=class_weight,
+        callbacks=[tfmot.sparsity.keras.UpdatePruningStep(), EpochTimeCallback()]
+    )
+    
+    stripped = tfmot.sparsity.keras.strip_pruning(pruned)
+    stripped.compile(
+        optimizer=Adam(learning_rate=PRUNING_LEARNING_RATE),
+        loss='categorical_crossentropy',
+        metrics=training_metrics()
+    )
+    return stripped
+
+def measure_pruned_model(model, target_sparsity, test_generator, sample):
+    """Budanmış modeli seyrek TFLite olarak dışa aktarır; FLOP, boyut, gecikme ve doğruluğunu ölçer."""
+    tflite_model = convert_to_tflite(model, sparse=target_sparsity > 0)
+    path = os.path.join(MODELS_DIR, f'pruned_{round(target_sparsity * 100):02d}.tflite')
+    with open(path, 'wb') as f:
+        f.write(tflite_model)
+    
+    counts = count_flops(model)
+    backend = TFLiteBackend(path)
+    latency_mean, latency_p95 = measure_latency(backend.predict, sample)
+    
+    return {
+        'target': target_sparsity,
+        'sparsity': 1 - counts['nonzero_weights'] / counts['weights'],
+        'mflops': counts['flops'] / 1e6,
+        'dense_mflops': counts['dense_flops'] / 1e6,
+        'size_mb': len(tflite_model) / 2**20,
+        'gzip_mb': len(gzip.compress(tflite_model)) / 2**20,
+        'latency_mean': latency_mean,
+        'latency_p95': latency_p95,
+        'accuracy': evaluate_predict_fn(backend.predict, test_generator),
+        'path': path
+    }
+
+def write_pruning_report(results, selected):
+    """Seyreklik seviyelerinin karşılaştırma tablosunu yazdırır ve pruning_report.txt dosyasına kaydeder."""
+    baseline_accuracy = results[0]['accuracy']
+    
+    lines = [
+        "Budama Raporu (TFLite, float32)",
+        "",
+        f"{'Hedef':>7}{'Seyreklik':>11}{'MFLOP':>10}{'Boyut (MB)':>12}{'gzip (MB)':>11}"
+        f"{'Ort. (ms)':>11}{'p95 (ms)':>10}{'Doğruluk':>10}{'Fark':>9}"
+    ]
+    for r in results:
+        marker = ' *' if r is selected else ''
+        lines.append(
+            f"{r['target']:>7.0%}{r['sparsity']:>11.1%}{r['mflops']:>10.1f}{r['size_mb']:>12.2f}{r['gzip_mb']:>11.2f}"
+            f"{r['latency_mean']:>11.2f}{r['latency_p95']:>10.2f}{r['accuracy']:>10.4f}"
+            f"{r['accuracy'] - baseline_accuracy:>+9.4f}{marker}"
+        )
+    lines += ["", "* dışa aktarılan model (model.tflite)"]
+    
+    report = "\n".join(lines) + "\n"
+    print(report)
+    
+    with open(PRUNING_REPORT_PATH, 'w') as f:
+        f.write(report)
+    
+    return report
+
+def prune_model(model, train_generator, validation_generator, test_generator, sparsity_levels=PRUNING_SPARSITY_LEVELS,
+                structure='unstructured', class_weight=None, max_accuracy_drop=PRUNING_MAX_ACCURACY_DROP):
+    """İnce ayarlı modeli her seyreklik seviyesinde budar, ölçer ve dışa aktarılacak modeli seçer.
+    
+    Doğruluğu budanmamış modelden en fazla max_accuracy_drop düşük olan en seyrek model
+    seçilir; uygun seviye yoksa budanmamış model kullanılır. (seçilen model, seyrek
+    TFLite dönüşümü gerekip gerekmediği) çiftini döndürür.
+    """
+    if structure == '2:4':
+        # m:n yapısında seyreklik yapı tarafından belirlenir
+        sparsity_levels = (0.5,)
+    
+    sample = next(iterate_batches(test_generator))[0][:1].astype(np.float32)
+    models = [model]
+    results = [measure_pruned_model(model, 0.0, test_generator, sample)]
+    for sparsity in sorted(sparsity_levels):
+        pruned = prune_to_sparsity(model, train_generator, validation_generator, sparsity, structure, class_weight)
+        models.append(pruned)
+        results.append(measure_pruned_model(pruned, sparsity, test_generator, sample))
+    
+    baseline_accuracy = results[0]['accuracy']
+    selected = max(
+        (i for i, r in enumerate(results) if r['accuracy'] >= baseline_accuracy - max_accuracy_drop),
+        key=lambda i: results[i]['target']
+    )
+    write_pruning_report(results, results[selected])
+    
+    return models[selected], results[selected]['target'] > 0
+
+def build_student_model(alpha=STUDENT_ALPHA, input_size=STUDENT_IMG_SIZE):
+    """Damıtma için küçük MobileNetV2 öğrenci modeli oluşturur.
+    
+    Giriş, öğretmen ve tüm çıkarım yollarıyla aynı (IMG_SIZE, IMG_SIZE, 3) ölçeklenmiş
+    görüntüdür; öğrenci görüntüyü kendi içinde input_size boyutuna küçültür. Böylece
+    arka uçlar, önbellek ve ön işleme değişmeden öğrenciyi de çalıştırabilir.
+    (softmax çıkışlı öğrenci, logit çıkışlı aynı model) çiftini döndürür.
+    """
+    print(f"Öğrenci model oluşturuluyor (MobileNetV2 alpha={alpha}, {input_size}x{input_size})...")
+    
+    inputs = Input(shape=(IMG_SIZE, IMG_SIZE, 3))
+    x = tf.keras.layers.Resizing(input_size, input_size)(inputs) if input_size != IMG_SIZE else inputs
+    
+    backbone = MobileNetV2(
+        weights='imagenet',
+        include_top=False,
+        alpha=alpha,
+        input_tensor=x,
+        input_shape=(input_size, input_size, 3)
+    )
+    
+    x = GlobalAveragePooling2D()(backbone.output)
+    x = Dropout(0.2)(x)
+    logits = Dense(NUM_CLASSES, dtype='float32', name='student_logits')(x)
+    predictions = tf.keras.layers.Activation('softmax', dtype='float32', name='predictions')(logits)
+    
+    return Model(inputs=inputs, outputs=predictions), Model(inputs=inputs, outputs=logits)
+
+class Distiller(Model):
+    """Öğrenciyi gerçek etiketler ve öğretmenin yumuşak hedefleriyle birlikte eğiten model.
+    
+    Öğretmen softmax olasılıkları verdiğinden logit'leri log(p) olarak elde edilir
+    (softmax sabit kaymadan etkilenmez); yumuşak hedefler softmax(log(p) / T) olur.
+    Damıtma kaybı, gradyan ölçeği sıcaklıktan bağımsız kalsın diye T^2 ile çarpılır.
+    Tahmin ve değerlendirmede yalnızca öğrenci çalışır.
+    """
+    
+    def __init__(self, student, student_logits, teacher, temperature=DISTILL_TEMPERATURE,
+                 label_weight=DISTILL_LABEL_WEIGHT):
+        super().__init__()
+        self.student = student
+        self.student_logits = student_logits
+        self.teacher = teacher
+        self.teacher.trainable = False
+        self.temperature = temperature
+        self.label_weight = label_weight
+        
+        self.loss_tracker = tf.keras.metrics.Mean(name='loss')
+        self.label_loss_tracker = tf.keras.metrics.Mean(name='label_loss')
+        self.distillation_loss_tracker = tf.keras.metrics.Mean(name='distillation_loss')
+        self.accuracy_metric = tf.keras.metrics.CategoricalAccuracy(name='accuracy')
+    
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.label_loss_tracker, self.distillation_loss_tracker, self.accuracy_metric]
+    
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+    
+    def _compute_losses(self, x, y, sample_weight, training):
+        logits = self.student_logits(x, training=training)
+        teacher_probabilities = self.teacher(x, training=False)
+        soft_targets = tf.nn.softmax(tf.math.log(tf.maximum(teacher_probabilities, 1e-7)) / self.temperature)
+        
+        label_loss = tf.keras.losses.categorical_crossentropy(y, logits, from_logits=True)
+        distillation_loss = tf.keras.losses.kl_divergence(
+            soft_targets, tf.nn.softmax(logits / self.temperature)
+        ) * self.temperature ** 2
+        
+        per_sample = self.label_weight * label_loss + (1 - self.label_weight) * distillation_loss
+        if sample_weight is not None:
+            per_sample *= tf.cast(tf.reshape(sample_weight, [-1]), per_sample.dtype)
+        
+        return tf.reduce_mean(per_sample), label_loss, distillation_loss, logits
+    
+    def _update_metrics(self, loss, label_loss, distillation_loss, y, logits, sample_weight):
+        self.loss_tracker.update_state(loss)
+        self.label_loss_tracker.update_state(label_loss, sample_weight)
+        self.distillation_loss_tracker.update_state(distillation_loss, sample_weight)
+        self.accuracy_metric.update_state(y, tf.nn.softmax(logits), sample_weight)
+        return {m.name: m.result() for m in self.metrics}
+    
+    def train_step(self, data):
+        x, y, sample_weight = tf.keras.utils.unpack_x_y_sample_weight(data)
+        with tf.GradientTape() as tape:
+            loss, label_loss, distillation_loss, logits = self._compute_losses(x, y, sample_weight, training=True)
+        
+        variables = self.student.trainable_variables
+        self.optimizer.apply_gradients(zip(tape.gradient(loss, variables), variables))
+        return self._update_metrics(loss, label_loss, distillation_loss, y, logits, sample_weight)
+    
+    def test_step(self, data):
+        x, y, sample_weight = tf.keras.utils.unpack_x_y_sample_weight(data)
+        loss, label_loss, distillation_loss, logits = self._compute_losses(x, y, sample_weight, training=False)
+        return self._update_metrics(loss, label_loss, distillation_loss, y, logits, sample_weight)
+
+def distill_model(teacher, train_generator, validation_generator, class_weight=None, alpha=STUDENT_ALPHA,
+                  input_size=STUDENT_IMG_SIZE, temperature=DISTILL_TEMPERATURE, label_weight=DISTILL_LABEL_WEIGHT,
+                  epochs=DISTILL_EPOCHS):
+    """Öğretmen modelin yumuşak hedefleriyle küçük bir öğrenci model eğitir.
+    
+    Öğrencinin tüm katmanları ImageNet ağırlıklarından başlayarak tek aşamada eğitilir.
+    Derlenmiş (softmax çıkışlı) öğrenci modeli ve eğitim geçmişini döndürür.
+    """
+    print(f"Bilgi damıtma başlatılıyor (T={temperature}, etiket ağırlığı={label_weight})...")
+    
+    student, student_logits = build_student_model(alpha, input_size)
+    distiller = Distiller(student, student_logits, teacher, temperature, label_weight)
+    distiller.compile(optimizer=Adam(learning_rate=0.001))
+    
+    early_stopping = EarlyStopping(
+        monitor='val_accuracy',
+        mode='max',
+        patience=5,
+        restore_best_weights=True,
+        verbose=1
+    )
+    reduce_lr = ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=0.2,
+        patience=3,
+        min_lr=0.00001,
+        verbose=1
+    )
+    
+    history = distiller.fit(
+        fit_input(train_generator),
+        steps_per_epoch=steps_per_epoch(train_generator),
+        epochs=epochs,
+        validation_data=fit_input(validation_generator),
+        validation_steps=validation_generator.samples // BATCH_SIZE,
+        class_weight=class_weight,
+        callbacks=[early_stopping, reduce_lr, EpochTimeCallback()]
+    )
+    
+    # Dışa aktarma ve değerlendirme için öğrenci diğer modellerle aynı şekilde derlenir
+    student.compile(
+        optimizer=Adam(learning_rate=0.001),
+        loss='categorical_crossentropy',
+        metrics=training_metrics()
+    )
+    
+    return student, history
+
+def compare_student_with_teacher(teacher, teacher_path, student, student_path, test_generator, student_accuracy=None,
+                                 teacher_tflite_path=TEACHER_TFLITE_PATH, student_tflite_path=STUDENT_TFLITE_PATH):
+    """Öğretmen ve öğrencinin boyut, CPU gecikmesi ve test doğruluğunu karşılaştırır.
+    
+    Keras modellerinin yanında varsa her ikisinin float32 TFLite modeli de ölçülür.
+    Öğretmen varsayılan model değilse teacher_tflite_path None verilmelidir.
+    Tablo distillation_report.txt dosyasına yazılır.
+    """
+    sample = next(iterate_batches(test_generator))[0][:1].astype(np.float32)
+    
+    candidates = [
+        ('öğretmen (keras)', teacher_path, teacher.predict_on_batch, teacher.count_params(), None),
+        ('öğrenci (keras)', student_path, student.predict_on_batch, student.count_params(), student_accuracy)
+    ]
+    for name, model_path, params in (('öğretmen (tflite)', teacher_tflite_path, teacher.count_params()),
+                                     ('öğrenci (tflite)', student_tflite_path, student.count_params())):
+        if model_path is not None and os.path.exists(model_path):
+            candidates.append((name, model_path, TFLiteBackend(model_path).predict, params, None))
+    
+    results = []
+    for name, model_path, predict_fn, params, accuracy in candidates:
+        latency_mean, latency_p95 = measure_latency(predict_fn, sample)
+        results.append({
+            'name': name,
+            'params': params,
+            'size_mb': os.path.getsize(model_path) / 2**20,
+            'latency_mean': latency_mean,
+            'latency_p95': latency_p95,
+            'accuracy': accuracy if accuracy is not None else evaluate_predict_fn(predict_fn, test_generator)
+        })
+    
+    return write_distillation_report(results)
+
+def write_distillation_report(results):
+    """Öğretmen/öğrenci karşılaştırma tablosunu yazdırır ve distillation_report.txt dosyasına kaydeder.
+    
+    Hızlanma ve doğruluk farkı aynı biçimdeki (keras veya tflite) öğretmen modele göre hesaplanır.
+    """
+    teachers = {r['name'].split(' ', 1)[1]: r for r in results if r['name'].startswith('öğretmen')}
+    
+    lines = [
+        "Bilgi Damıtma Raporu",
+        "",
+        f"{'Model':<20}{'Parametre':>12}{'Boyut (MB)':>12}{'Ort. (ms)':>12}{'p95 (ms)':>12}"
+        f"{'Hızlanma':>10}{'Doğruluk':>10}{'Fark':>10}"
+    ]
+    for r in results:
+        teacher = teachers.get(r['name'].split(' ', 1)[1])
+        speedup = f"{teacher['latency_mean'] / r['latency_mean']:.2f}x" if teacher else '-'
+        delta = f"{r['accuracy'] - teacher['accuracy']:+.4f}" if teacher else '-'
+        lines.append(
+            f"{r['name']:<20}{r['params']:>12,}{r['size_mb']:>12.2f}{r['latency_mean']:>12.2f}{r['latency_p95']:>12.2f}"
+            f"{speedup:>10}{r['accuracy']:>10.4f}{delta:>10}"
+        )
+    
+    report = "\n".join(lines) + "\n"
+    print(report)
+    
+    with open(DISTILLATION_REPORT_PATH, 'w') as f:
+        f.write(report)
+    
+    return report
+
+def run_distillation(args):
+    """--distill modu: eğitilmiş modeli öğretmen olarak kullanarak öğrenci modeli eğitir ve dışa aktarır.
+    
+    Öğrenci, öğretmenle aynı optimize_model yolundan student.tflite ve
+    student_mobilenet.h5 olarak kaydedilir; öğretmenin dosyaları değişmez.
+    """
+    if not os.path.exists(args.teacher):
+        raise FileNotFoundError(f"Öğretmen model bulunamadı: {args.teacher} (önce normal eğitimi çalıştırın)")
+    
+    # Öğretmen yalnızca tahmin için kullanılır; kayıtlı derleme ayarları (özel metrikler) yüklenmez
+    teacher = tf.keras.models.load_model(args.teacher, compile=False)
+    train_generator, validation_generator, test_generator = create_data_loaders(
+        args.loader, args.sampling, args.max_samples_per_class
+    )
+    class_weight = compute_class_weights() if args.class_weights else None
+    
+    student, history = distill_model(
+        teacher, train_generator, validation_generator, class_weight,
+        args.student_alpha, args.student_size, args.temperature
+    )
+    student_accuracy = evaluate_predict_fn(student.predict_on_batch, test_generator)
+    print(f"Öğrenci test doğruluğu: {student_accuracy:.4f}")
+    
+    optimize_model(student, test_generator, args.quantization, keras_accuracy=student_accuracy,
+                   name='student', keras_filename=os.path.basename(STUDENT_MODEL_PATH))
+    # Varsayılan öğretmenin TFLite modeli ana eğitimde model.tflite olarak dışa aktarılmıştır
+    teacher_tflite_path = TEACHER_TFLITE_PATH if os.path.abspath(args.teacher) == TEACHER_MODEL_PATH else None
+    compare_student_with_teacher(teacher, args.teacher, student, STUDENT_MODEL_PATH, test_generator, student_accuracy,
+                                 teacher_tflite_path)
+    
+    return student, history
+
+def parse_args():
+    """Komut satırı argümanlarını ayrıştırır."""
+    parser = argparse.ArgumentParser(description="Kan hücresi tespit modelini eğitir, değerlendirir ve optimize eder.")
+    parser.add_argument('--quantization', nargs='*', choices=QUANTIZATION_MODES, default=[],
+                        help="Ek olarak üretilecek nicelenmiş TFLite modelleri (ör. --quantization dynamic float16 int8)")
+    parser.add_argument('--feature-cache', action='store_true',
+                        help="İlk (dondurulmuş omurga) aşamasında önbelleğe alınmış öznitelikler üzerinde yalnızca başlığı eğit")
+    parser.add_argument('--loader', choices=DATA_LOADERS, default=DATA_LOADER,
+                        help="Veri yükleyici: ImageDataGenerator ('generator'), tf.data hattı ('tfdata') veya veri parçaları ('shards')")
+    parser.add_argument('--sampling', choices=SAMPLING_MODES, default=SAMPLING,
+                        help="Sınıf dengeleme: eşit olasılıklı ('balanced') veya büyük sınıfları sınırlayan ('capped') örnekleme")
+    parser.add_argument('--max-samples-per-class', type=int, default=MAX_SAMPLES_PER_CLASS,
+                        help="'capped' örneklemede bir sınıftan epoch başına alınacak en fazla örnek")
+    parser.add_argument('--class-weights', action='store_true',
+                        help="dataset_info.csv'den hesaplanan sınıf ağırlıklarını kayıp fonksiyonunda kullan")
+    parser.add_argument('--profile', action='store_true',
+                        help="Epoch içinde veri bekleme ve hesaplama sürelerini ayrı ölç")
+    parser.add_argument('--profile-trace', default=None, metavar='BAŞLANGIÇ,BİTİŞ',
+                        help="Bu adım aralığı için TensorBoard profil izi al (ör. 10,20)")
+    parser.add_argument('--precision', choices=PRECISION_MODES, default=PRECISION,
+                        help="Hesaplama hassasiyeti; karma modlarda softmax çıkışı float32 kalır")
+    parser.add_argument('--jit-compile', action='store_true',
+                        help="Eğitim adımlarını XLA ile derle")
+    parser.add_argument('--workers', nargs='*', default=None, metavar='HOST:PORT',
+                        help="Dağıtık eğitimdeki tüm çalışanların adresleri (verilmezse TF_CONFIG kullanılır)")
+    parser.add_argument('--task-index', type=int, default=0,
+                        help="Bu makinenin --workers listesindeki sırası (0 şef çalışandır)")
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help="Dağıtık eğitimi bu makinede verilen sayıda süreçle çalıştır")
+    parser.add_argument('--resume', action='store_true',
+                        help="Önceki çalıştırmanın checkpoint'lerinden kaldığı aşama ve epoch'tan devam et")
+    parser.add_argument('--checkpoint-every', type=int, default=SAVE_EVERY_STEPS,
+                        help="Tam eğitim durumunun kaç adımda bir kaydedileceği (0: yalnızca epoch sonlarında)")
+    parser.add_argument('--prune', nargs='*', type=float, default=None, metavar='SEYREKLİK',
+                        help="İnce ayardan sonra modeli verilen seyreklik seviyelerinde buda ve en iyisini dışa aktar "
+                             f"(değer verilmezse {', '.join(str(s) for s in PRUNING_SPARSITY_LEVELS)})")
+    parser.add_argument('--prune-structure', choices=PRUNING_STRUCTURES, default='unstructured',
+                        help="Budama yapısı: ağırlık bazında ('unstructured') veya her 4 ağırlıkta 2 sıfır ('2:4')")
+    parser.add_argument('--prune-max-drop', type=float, default=PRUNING_MAX_ACCURACY_DROP,
+                        help="Dışa aktarılacak budanmış model için kabul edilen en fazla test doğruluğu kaybı")
+    parser.add_argument('--distill', action='store_true',
+                        help="Eğitilmiş modeli öğretmen olarak kullanıp küçük bir öğrenci modeli damıt ve dışa aktar")
+    parser.add_argument('--teacher', default=TEACHER_MODEL_PATH,
+                        help="Damıtmada kullanılacak öğretmen model (.h5)")
+    parser.add_argument('--student-alpha', type=float, default=STUDENT_ALPHA,
+                        help="Öğrenci MobileNetV2 genişlik çarpanı (ImageNet ağırlıkları: 0.35, 0.5, 0.75, 1.0)")
+    parser.add_argument('--student-size', type=int, choices=STUDENT_IMG_SIZES, default=STUDENT_IMG_SIZE,
+                        help="Öğrencinin omurga giriş boyutu (görüntüler model içinde bu boyuta küçültülür)")
+    parser.add_argument('--temperature', type=float, default=DISTILL_TEMPERATURE,
+                        help="Öğretmen olasılıklarını yumuşatan damıtma sıcaklığı")
+    parser.add_argument('--reevaluate', action='store_true',
+                        help="Eğitim yapmadan, son değerlendirmede kaydedilen test olasılıklarından metrikleri yeniden hesapla")
+    return parser.parse_args()
+
 def main():
     """Ana işlev: Modeli eğitir, değerlendirir ve optimize eder."""
+    args = parse_args()
+    
+    if args.local_workers:
+        # Her çalışan aynı argümanlarla, yalnızca kendi TF_CONFIG değeriyle başlatılır
+        worker_args = []
+        skip = False
+        for arg in sys.argv[1:]:
+            if skip:
+                skip = False
+            elif arg == '--local-workers':
+                skip = True
+            elif not arg.startswith('--local-workers='):
+                worker_args.append(arg)
+        sys.exit(0 if launch_local_workers(args.local_workers, os.path.abspath(__file__), worker_args) else 1)
+    
+    if args.reevaluate:
+        # Model çalıştırılmaz; rapor ve karmaşıklık matrisi kaydedilen olasılıklardan üretilir
+        report_evaluation(*load_test_predictions())
+        return
+    
+    if args.distill:
+        run_distillation(args)
+        end_time = time.time()
+        print(f"Toplam damıtma süresi: {end_time - start_time:.2f} saniye")
+        with open(os.path.join(PROJECT_DIR, 'time_tracking.md'), 'a') as f:
+            f.write(f"- Bilgi damıtma: Başlangıç - {time.strftime('%d Nisan %Y %H:%M:%S', time.localtime(start_time))}, Bitiş - {time.strftime('%d Nisan %Y %H:%M:%S', time.localtime(end_time))}, Süre - {end_time - start_time:.2f} saniye\n")
+        return
+    
     print("Kan hücresi tespit modeli eğitimi başlatılıyor...")
     
+    # Dağıtım stratejisi; çalışan başına batch boyutu sabit, global batch çalışan sayısıyla ölçeklenir
+    strategy = create_strategy(args.workers, args.task_index)
+    workers = num_workers()
+    global_batch_size = BATCH_SIZE * workers
+    
+    if workers > 1:
+        if args.feature_cache:
+            raise ValueError("--feature-cache dağıtık eğitimde kullanılamaz")
+        if args.prune is not None:
+            raise ValueError("--prune dağıtık eğitimde kullanılamaz")
+        if args.loader == 'generator':
+            print("Dağıtık eğitim için veri yükleyici 'tfdata' olarak değiştirildi.")
+            args.loader = 'tfdata'
+        if args.profile:
+            print("Epoch içi veri bekleme ölçümü dağıtık eğitimde kullanılamaz; yalnızca aşama süreleri ölçülecek.")
+            args.profile = False
+        print(f"Global batch boyutu: {global_batch_size} ({workers} x {BATCH_SIZE})")
+    
+    # Aşama süreleri her zaman, epoch içi ayrım --profile ile ölçülür
+    profiler = TrainingProfiler(MODELS_DIR, enabled=args.profile, trace_batches=args.profile_trace)
+    
     # Veri üreteçlerini oluştur
-    train_generator, validation_generator, test_generator = create_data_generators()
+    with profiler.phase('data_loaders'):
+        train_generator, validation_generator, test_generator = create_data_loaders(
+            args.loader, args.sampling, args.max_samples_per_class, workers, worker_index()
+        )
+    
+    # Sınıf ağırlıkları
+    class_weight = compute_class_weights() if args.class_weights else None
+    
+    if workers > 1:
+        # Sınıf ağırlıkları dağıtık hatta örnek ağırlığı olarak eklenir
+        train_generator.distribute(strategy, class_weight)
+        class_weight = None
+    
+    # Hassasiyet politikası model oluşturulmadan önce ayarlanmalı
+    precision = configure_precision(args.precision)
     
     # Modeli oluştur
-    model, base_model = build_model()
+    with profiler.phase('build_model'), strategy.scope():
+        model, base_model = build_model(args.jit_compile)
     
-    # Modeli eğit
-    history = train_model(model, train_generator, validation_generator)
+    # Tam durum checkpoint'leri; dağıtık eğitimde şef dışındaki çalışanlar ayrı dizine yazar
+    checkpoint_dir = CHECKPOINT_DIR if is_chief() else f'{CHECKPOINT_DIR}_worker{worker_index()}'
+    state = TrainingState(checkpoint_dir, args.checkpoint_every)
+    if not args.resume:
+        state.reset()
+    
+    # Modeli eğit (tamamlanmış aşamalar --resume ile atlanır)
+    with profiler.phase('train_model'):
+        if state.is_completed('train'):
+            history = state.completed_history('train')
+            # İnce ayar da tamamlandıysa ağırlıklar aşağıda ince ayardan yüklenir
+            if not state.is_completed('fine_tune'):
+                state.restore_completed('train', model)
+        elif args.feature_cache:
+            history = train_head_on_features(model, base_model, class_weight, profiler, args.jit_compile, state)
+        else:
+            history = train_model(model, train_generator, validation_generator, class_weight, profiler, state)
     
     # Modeli ince ayarla
-    fine_tune_history = fine_tune_model(model, base_model, train_generator, validation_generator)
+    with profiler.phase('fine_tune_model'):
+        if state.is_completed('fine_tune'):
+            fine_tune_history = state.completed_history('fine_tune')
+            state.restore_completed('fine_tune', model)
+        else:
+            fine_tune_history = fine_tune_model(
+                model, base_model, train_generator, validation_generator, class_weight, profiler, args.jit_compile, state
+            )
+    
+    # Dağıtık veya karma hassasiyetli model float32, yerel bir kopyaya aktarılır. Ağırlıkların
+    # okunması çalışanlar arası toplu işlem olduğundan şef olmayanlar dönmeden önce yapılır.
+    if precision != 'float32' or workers > 1:
+        model = to_float32_model(model)
+    
+    # Değerlendirme, raporlar ve dışa aktarma yalnızca şef çalışanda yapılır
+    if not is_chief():
+        print(f"Çalışan {worker_index()} eğitimi tamamladı.")
+        return
+    
+    # İsteğe bağlı budama; seçilen seyreklikteki model değerlendirilir ve dışa aktarılır
+    sparse_export = False
+    if args.prune is not None:
+        with profiler.phase('prune_model'):
+            model, sparse_export = prune_model(
+                model, train_generator, validation_generator, test_generator,
+                args.prune or PRUNING_SPARSITY_LEVELS, args.prune_structure, class_weight, args.prune_max_drop
+            )
     
     # Modeli değerlendir
-    test_accuracy, report, cm = evaluate_model(model, test_generator)
+    with profiler.phase('evaluate_model'):
+        test_accuracy, report, cm = evaluate_model(model, test_generator)
     
     # Eğitim geçmişini görselleştir
-    plot_training_history(history, fine_tune_history)
+    with profiler.phase('plot_training_history'):
+        plot_training_history(history, fine_tune_history)
+    
+    # Epoch süreleri ve sınıf başına duyarlılık raporu
+    save_epoch_report(history, fine_tune_history)
+    record_training_mode(precision, args.jit_compile, args.loader, history, fine_tune_history)
+    
+    # Tek çalışanlı çalıştırmaya göre ölçekleme verimliliği (ince ayar her zaman görüntüler üzerinde çalışır)
+    record_scaling(workers, global_batch_size, fine_tune_history)
     
     # Modeli optimize et
-    optimize_model(model)
+    with profiler.phase('optimize_model'):
+        optimize_model(model, test_generator, args.quantization, keras_accuracy=test_accuracy, sparse=sparse_export)
+    
+    # Aşama ve epoch ölçümlerini kaydet
+    profiler.save()
     
     # İşlem süresini hesapla
     end_time = time.time()
@@ -388,6 +1919,12 @@ def main():
     print(f"Toplam eğitim süresi: {training_time:.2f} saniye")
     print(f"Test doğruluğu: {test_accuracy:.4f}")
     
+    # Ortalama epoch sürelerini yazdır (yükleyicileri karşılaştırmak için)
+    for name, h in (('İlk aşama', history), ('İnce ayar', fine_tune_history)):
+        epoch_times = h.history.get('epoch_time', [])
+        if epoch_times:
+            print(f"{name} ortalama epoch süresi ({args.loader}): {np.mean(epoch_times):.2f} saniye")
+    
     # Zaman bilgisini dosyaya kaydet
     with open(os.path.join(PROJECT_DIR, 'time_tracking.md'), 'a') as f:
         f.write(f"- Model eğitimi: Başlangıç - {time.strftime('%d Nisan %Y %H:%M:%S')}, Bitiş - {time.strftime('%d Nisan %Y %H:%M:%S', time.localtime(end_time))}, Süre - {training_time:.2f} saniye\n")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Tahmin Önbelleği Modülü
+Bu modül, aynı görüntü tekrar analiz edildiğinde modeli çalıştırmadan sonucu döndürmek için tahminleri SQLite veritabanında saklar.
+
+Anahtar, çözülmüş görüntü piksellerinin özeti ile model dosyasının özetinden oluşur.
+optimize_model yeni bir model dışa aktardığında model özeti değişir ve eski kayıtlar
+veritabanı açılırken silinir.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import numpy as np
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
+CACHE_PATH = os.path.join(MODELS_DIR, 'prediction_cache.sqlite')
+
+# Saklanacak en fazla kayıt; aşılırsa en uzun süredir kullanılmayanlar silinir
+MAX_ENTRIES = 10000
+
+# Model dosyası özetlenirken okunan parça boyutu
+HASH_CHUNK_SIZE = 1 << 20
+
+def hash_file(path):
+    """Dosya içeriğinin SHA-256 özetini döndürür."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_image(img):
+    """Çözülmüş görüntünün boyutları ve piksellerinden SHA-256 özeti üretir.
+
+    Dosya adı veya sıkıştırma ayrıntıları yerine pikseller özetlendiği için aynı
+    görüntünün farklı yoldan açılması da önbellekten karşılanır.
+    """
+    img = np.ascontiguousarray(img)
+    digest = hashlib.sha256(f"{img.shape}{img.dtype}".encode('ascii'))
+    digest.update(memoryview(img).cast('B'))
+    return digest.hexdigest()
+
+class PredictionCache:
+    """Görüntü ve model özetine göre anahtarlanan kalıcı tahmin önbelleği.
+
+    Bağlantı oluşturulduğu iş parçacığına bağlıdır; arayüzde yalnızca arka plan
+    iş parçacığından kullanılır.
+    """
+
+    def __init__(self, model_path, db_path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.model_hash = hash_file(model_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                model_hash TEXT NOT NULL,
+                image_hash TEXT NOT NULL,
+                probabilities BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model_hash, image_hash)
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_last_access ON predictions (last_access)"
+        )
+
+        # Başka bir modelle hesaplanmış kayıtlar artık geçersiz
+        with self.connection:
+            self.connection.execute("DELETE FROM predictions WHERE model_hash != ?", (self.model_hash,))
+
+    def get(self, image_hash):
+        """Önbellekteki olasılıkları döndürür; kayıt yoksa None döner."""
+        row = self.connection.execute(
+            "SELECT probabilities FROM predictions WHERE model_hash = ? AND image_hash = ?",
+            (self.model_hash, image_hash)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.connection:
+            self.connection.execute(
+                "UPDATE predictions SET last_access = ? WHERE model_hash = ? AND image_hash = ?",
+                (time.time(), self.model_hash, image_hash)
+            )
+        return np.frombuffer(row[0], dtype=np.float32).copy()
+
+    def put(self, image_hash, probabilities):
+        """Olasılıkları önbelleğe yazar ve kayıt sınırı aşıldıysa eski kayıtları siler."""
+        blob = np.asarray(probabilities, dtype=np.float32).tobytes()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (self.model_hash, image_hash, blob, time.time())
+            )
+            self.connection.execute("""
+                DELETE FROM predictions WHERE rowid IN (
+                    SELECT rowid FROM predictions ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Ortak Ön İşleme Modülü
+Bu modül, eğitim ve çıkarım yollarının aynı yeniden boyutlandırma ve ölçeklendirmeyi kullanmasını sağlar.
+
+Eğitimde flow_from_directory ve tf.data hattı görüntüleri en yakın komşu (nearest)
+enterpolasyonla IMG_SIZE boyutuna getirip 1/255 ile ölçeklendirir. Arayüz, toplu
+çıkarım, hücre tespiti ve sunucu da aynı ayarları buradan alır.
+"""
+
+import numpy as np
+import cv2
+
+# Görüntü boyutu
+IMG_SIZE = 224
+
+# Piksel ölçeklendirme katsayısı (ImageDataGenerator rescale değeri)
+RESCALE = 1. / 255
+
+# Yeniden boyutlandırma yöntemi (flow_from_directory ve tf.image.resize adlandırması).
+# PIL NEAREST ve tf.image.resize piksel merkezlerinden örnekler; cv2.INTER_NEAREST ise
+# taban (floor) indeksleme kullandığı için kaymış pikselleri seçer. Eğitimle aynı
+# pikseller için yeniden boyutlandırmada INTER_NEAREST_EXACT kullanılır.
+INTERPOLATION = 'nearest'
+CV2_INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST_EXACT,
+    'bilinear': cv2.INTER_LINEAR
+}
+# warpAffine INTER_NEAREST_EXACT desteklemez; döndürmede eşdeğeri kullanılır
+CV2_WARP_INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'bilinear': cv2.INTER_LINEAR
+}
+
+# Test zamanı veri artırma (TTA) görünümleri: (yatay çevirme, döndürme açısı).
+# Eğitimdeki artırmalarla (yatay çevirme, en fazla ±20° döndürme) sınırlıdır; ilk
+# num_views görünüm kullanılır, ilk görünüm her zaman özgün görüntüdür.
+TTA_VIEWS = (
+    (False, 0), (True, 0), (False, 10), (False, -10),
+    (True, 10), (True, -10), (False, 20), (False, -20)
+)
+
+def resize_image(img, size=IMG_SIZE, out=None):
+    """uint8 RGB görüntüyü eğitimle aynı enterpolasyonla (size, size) boyutuna getirir.
+
+    out verilirse sonuç bu tampona yazılır.
+    """
+    return cv2.resize(img, (size, size), dst=out, interpolation=CV2_INTERPOLATIONS[INTERPOLATION])
+
+def preprocess_batch(images, out=None, size=IMG_SIZE):
+    """uint8 RGB görüntü listesini modele verilecek (N, size, size, 3) float32 tensöre dönüştürür.
+
+    Görüntüler tek bir ara uint8 tampona yeniden boyutlandırılır ve doğrudan çıkış
+    tensörüne ölçeklenerek yazılır; görüntü başına yeni dizi ayrılmaz. out verilirse
+    en az len(images) satırlık float32 tampon olmalıdır ve ilk len(images) satırı döner.
+    """
+    if out is None:
+        out = np.empty((len(images), size, size, 3), dtype=np.float32)
+
+    resized = np.empty((size, size, 3), dtype=np.uint8)
+    for i, img in enumerate(images):
+        if img.shape[:2] == (size, size):
+            np.multiply(img, RESCALE, out=out[i], casting='unsafe')
+        else:
+            resize_image(img, size, out=resized)
+            np.multiply(resized, RESCALE, out=out[i], casting='unsafe')
+
+    return out[:len(images)]
+
+def tta_view(img, flip=False, angle=0):
+    """Görüntünün yatay çevrilmiş ve/veya merkez etrafında döndürülmüş görünümünü üretir.
+
+    Döndürmede açılan kenarlar, eğitimdeki fill_mode='nearest' gibi kenar pikselleri
+    tekrarlanarak doldurulur.
+    """
+    if flip:
+        img = cv2.flip(img, 1)
+    if angle:
+        h, w = img.shape[:2]
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        img = cv2.warpAffine(img, matrix, (w, h), flags=CV2_WARP_INTERPOLATIONS[INTERPOLATION],
+                             borderMode=cv2.BORDER_REPLICATE)
+    return img
+
+def preprocess_tta_batch(images, num_views, out=None, size=IMG_SIZE):
+    """Her görüntünün ilk num_views TTA görünümünü tek bir (N * num_views, size, size, 3) tensöre yazar.
+
+    Görüntü bir kez yeniden boyutlandırılır, görünümler bu boyutta üretilir. Bir
+    görüntünün görünümleri art arda yer alır; tek model çağrısının sonucu average_tta
+    ile görüntü başına ortalanır.
+    """
+    if not 1 <= num_views <= len(TTA_VIEWS):
+        raise ValueError(f"TTA görünüm sayısı 1 ile {len(TTA_VIEWS)} arasında olmalıdır: {num_views}")
+    if out is None:
+        out = np.empty((len(images) * num_views, size, size, 3), dtype=np.float32)
+
+    resized = np.empty((size, size, 3), dtype=np.uint8)
+    for i, img in enumerate(images):
+        base = img if img.shape[:2] == (size, size) else resize_image(img, size, out=resized)
+        for j, (flip, angle) in enumerate(TTA_VIEWS[:num_views]):
+            np.multiply(tta_view(base, flip, angle), RESCALE, out=out[i * num_views + j], casting='unsafe')
+
+    return out[:len(images) * num_views]
+
+def average_tta(probabilities, num_views):
+    """(N * num_views, sınıf) olasılıkları görüntü başına ortalayarak (N, sınıf) döndürür."""
+    probabilities = np.asarray(probabilities)
+    return probabilities.reshape(-1, num_views, probabilities.shape[-1]).mean(axis=1)
+
+class BatchPreprocessor:
+    """Önceden ayrılmış float32 tamponu yeniden kullanan toplu ön işleyici.
+
+    Dönen tensör tamponun bir görünümüdür ve bir sonraki çağrıda üzerine yazılır;
+    sonuçları saklamak isteyen çağıranlar kopyalamalıdır. Her örnek tek bir iş
+    parçacığından kullanılmalıdır.
+    """
+
+    def __init__(self, max_batch_size=1, size=IMG_SIZE):
+        self.size = size
+        self.buffer = np.empty((max_batch_size, size, size, 3), dtype=np.float32)
+
+    def _reserve(self, rows):
+        if rows > len(self.buffer):
+            self.buffer = np.empty((rows, self.size, self.size, 3), dtype=np.float32)
+
+    def __call__(self, images):
+        self._reserve(len(images))
+        return preprocess_batch(images, out=self.buffer, size=self.size)
+
+    def tta(self, images, num_views):
+        """Görüntülerin TTA görünümlerini tampona yazar (bkz. preprocess_tta_batch)."""
+        self._reserve(len(images) * num_views)
+        return preprocess_tta_batch(images, num_views, out=self.buffer, size=self.size)
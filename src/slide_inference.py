@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Tam Lam Çıkarım Modülü
+Bu modül, tarayıcıdan gelen çok büyük (gigapiksel) lam görüntülerini tamamı belleğe yüklenmeden, örtüşen parçalar halinde tarayarak hücreleri tespit eder ve sınıflandırır.
+
+Lam, biçimine göre parça parça okunur:
+    .npy               np.load(mmap_mode='r') ile bellek eşlemeli
+    .tif/.tiff         tifffile ile bellek eşlemeli (sıkıştırmasız) veya zarr ile
+                       karo karo çözülerek
+    .svs/.ndpi/.mrxs   OpenSlide ile (kuruluysa)
+Diğer biçimler (PNG, JPEG) parça parça çözülemediğinden tamamen okunur.
+
+Her parça cell_detection ile taranır ve adaylar sabit boyutlu gruplar halinde
+sınıflandırılır; aynı anda en fazla iki parça (işlenen ve önceden okunan) bellekte
+tutulur. Parça kenarlarındaki hücreler, merkezinin düştüğü parçaya atanarak ve
+komşu parçaların kabul edilen kutularıyla IoU karşılaştırılarak tekilleştirilir.
+Tarama sırasında arayüz için küçültülmüş bir önizleme piramidi oluşturulur.
+"""
+
+import os
+import csv
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+from cell_detection import CLASS_NAMES, IMG_SIZE, MAX_CELL_SIDE, BOX_MARGIN, propose_cells, draw_detections
+from inference_backend import BACKENDS, DEFAULT_BACKEND, load_backend
+from preprocessing import BatchPreprocessor
+
+# Parça boyutu ve örtüşme; örtüşmenin yarısı propose_cells'in kabul ettiği en uzun kutu
+# kenarından (kenar payları dahil) büyük olmalıdır, böylece merkezi bir parçanın
+# çekirdeğine düşen her hücre o parçada kesilmeden bulunur
+TILE_SIZE = 2048
+TILE_OVERLAP = 2 * (MAX_CELL_SIDE + 2 * BOX_MARGIN) + 16
+
+# Parça başına sınıflandırma grubu boyutu
+BATCH_SIZE = 64
+
+# Komşu parçalardaki aynı hücre kabul edilecek en düşük IoU
+DUPLICATE_IOU = 0.5
+
+# Gri seviye standart sapması bunun altındaki parçalar boş arka plan sayılır
+BLANK_TILE_STD = 6.0
+
+# Önizleme piramidinin en büyük katmanının uzun kenarı ve en küçük katmanının uzun kenarı
+PREVIEW_SIZE = 2048
+PYRAMID_MIN_SIZE = 256
+
+# Parça parça okunabilen biçimler; bu uzantılar veya bu boyuttan büyük dosyalar lam olarak açılır
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+OPENSLIDE_EXTENSIONS = ('.svs', '.ndpi', '.mrxs', '.scn', '.vms', '.vmu', '.bif')
+SLIDE_EXTENSIONS = ('.npy',) + TIFF_EXTENSIONS + OPENSLIDE_EXTENSIONS
+SLIDE_MIN_FILE_BYTES = 64 * 2**20
+
+def _to_rgb(region):
+    """Gri, RGB veya RGBA bölgeyi bitişik uint8 RGB diziye çevirir."""
+    region = np.asarray(region)
+    if region.ndim == 2:
+        return cv2.cvtColor(np.ascontiguousarray(region), cv2.COLOR_GRAY2RGB)
+    return np.ascontiguousarray(region[:, :, :3])
+
+class ArraySlide:
+    """(H, W, C) dizi benzeri nesne (np.memmap, zarr dizisi) üzerinden bölge okuyan lam.
+
+    Yalnızca istenen bölge diskten okunur veya çözülür.
+    """
+
+    def __init__(self, array, path):
+        self.array = array
+        self.path = path
+        self.height, self.width = array.shape[:2]
+
+    def read_region(self, x, y, w, h):
+        return _to_rgb(self.array[y:y + h, x:x + w])
+
+    def thumbnail(self, preview_size=PREVIEW_SIZE, tile_size=TILE_SIZE):
+        """Lamı örtüşmesiz parçalarla okuyarak küçültülmüş önizleme oluşturur."""
+        preview = PreviewBuilder(self.width, self.height, preview_size)
+        for x, y, w, h in iter_tiles(self.width, self.height, tile_size, 0):
+            preview.add(self.read_region(x, y, w, h), x, y, (x, y, x + w, y + h))
+        return preview.canvas
+
+    def close(self):
+        pass
+
+class OpenSlideSlide:
+    """Tarayıcı biçimlerini (SVS, NDPI, MRXS...) OpenSlide ile okuyan lam."""
+
+    def __init__(self, path):
+        import openslide
+
+        self.slide = openslide.OpenSlide(path)
+        self.path = path
+        self.width, self.height = self.slide.dimensions
+
+    def read_region(self, x, y, w, h):
+        # OpenSlide RGBA PIL görüntüsü döndürür
+        return _to_rgb(self.slide.read_region((x, y), 0, (w, h)))
+
+    def thumbnail(self, preview_size=PREVIEW_SIZE):
+        # OpenSlide önizlemeyi lamın düşük çözünürlüklü katmanlarından üretir
+        return _to_rgb(self.slide.get_thumbnail((preview_size, preview_size)))
+
+    def close(self):
+        self.slide.close()
+
+def _open_tiff(path):
+    """TIFF dosyasını bellek eşlemeli, olmazsa zarr ile karo karo çözülecek şekilde açar."""
+    import tifffile
+
+    try:
+        # Sıkıştırmasız ve bitişik TIFF doğrudan bellek eşlenir
+        return ArraySlide(tifffile.memmap(path, mode='r'), path)
+    except ValueError:
+        import zarr
+
+        store = zarr.open(tifffile.imread(path, aszarr=True), mode='r')
+        # Piramitli TIFF'lerde en yüksek çözünürlük 0. katmandır
+        return ArraySlide(store if hasattr(store, 'shape') else store[0], path)
+
+def open_slide(path):
+    """Lamı biçimine uygun okuyucuyla açar.
+
+    İsteğe bağlı okuyucu (tifffile, zarr, openslide) kurulu değilse görüntü OpenCV
+    ile tamamen okunur ve bir uyarı yazdırılır.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.npy':
+        return ArraySlide(np.load(path, mmap_mode='r'), path)
+
+    try:
+        if ext in TIFF_EXTENSIONS:
+            return _open_tiff(path)
+        if ext in OPENSLIDE_EXTENSIONS:
+            return OpenSlideSlide(path)
+    except ImportError as e:
+        print(f"Uyarı: {e.name} kurulu değil; lam parça parça okunamıyor.")
+
+    print(f"Uyarı: {os.path.basename(path)} parça parça okunamıyor, görüntü belleğe tamamen yükleniyor.")
+    img = cv2.imread(path)
+    if img is None:
+        raise IOError(f"Görüntü okunamadı: {path}")
+    return ArraySlide(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), path)
+
+def is_slide(path):
+    """Dosya tam belleğe yüklenmek yerine parça parça taranmalı mı?"""
+    ext = os.path.splitext(path)[1].lower()
+    return ext in SLIDE_EXTENSIONS or os.path.getsize(path) >= SLIDE_MIN_FILE_BYTES
+
+def iter_tiles(width, height, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Lamı örtüşen parçalara böler; her parça için (x, y, w, h) üretir (satır satır)."""
+    stride = tile_size - overlap
+    for y in range(0, max(height - overlap, 1), stride):
+        for x in range(0, max(width - overlap, 1), stride):
+            yield x, y, min(tile_size, width - x), min(tile_size, height - y)
+
+def count_tiles(width, height, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    stride = tile_size - overlap
+    return len(range(0, max(width - overlap, 1), stride)) * len(range(0, max(height - overlap, 1), stride))
+
+def tile_core(x, y, w, h, width, height, overlap=TILE_OVERLAP):
+    """Parçanın sahip olduğu bölge [x0, x1) x [y0, y1).
+
+    Komşu parçaların çekirdekleri örtüşme bandının ortasında birleşir ve lamı
+    boşluksuz, çakışmasız böler; her hücre merkezi tam olarak bir parçaya düşer.
+    """
+    half = overlap // 2
+    x0 = x + half if x > 0 else 0
+    y0 = y + half if y > 0 else 0
+    x1 = x + w - (overlap - half) if x + w < width else width
+    y1 = y + h - (overlap - half) if y + h < height else height
+    return x0, y0, x1, y1
+
+def box_iou(a, b):
+    """(N, 4) ve (M, 4) kutular arasındaki (N, M) IoU matrisini hesaplar."""
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    ix = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    iy = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    intersection = ix * iy
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-6)
+
+def classify_boxes(backend, tile, boxes, preprocessor, batch_size=BATCH_SIZE):
+    """Parçadaki kutuları batch_size'lık gruplar halinde sınıflandırır ve (N, sınıf) olasılıkları döndürür."""
+    probabilities = np.empty((len(boxes), len(CLASS_NAMES)), dtype=np.float32)
+    for start in range(0, len(boxes), batch_size):
+        group = boxes[start:start + batch_size]
+        crops = [tile[ymin:ymax, xmin:xmax] for xmin, ymin, xmax, ymax in group]
+        probabilities[start:start + len(group)] = backend.predict(preprocessor(crops))
+    return probabilities
+
+class PreviewBuilder:
+    """Parçaların çekirdek bölgelerini küçültülmüş önizleme tuvaline yazar."""
+
+    def __init__(self, width, height, preview_size=PREVIEW_SIZE):
+        self.scale = min(1.0, preview_size / max(width, height))
+        self.canvas = np.full(
+            (max(1, round(height * self.scale)), max(1, round(width * self.scale)), 3), 255, dtype=np.uint8
+        )
+
+    def add(self, tile, x, y, core):
+        x0, y0, x1, y1 = core
+        px0, py0, px1, py1 = (int(round(v * self.scale)) for v in core)
+        if px1 <= px0 or py1 <= py0:
+            return
+        region = tile[y0 - y:y1 - y, x0 - x:x1 - x]
+        self.canvas[py0:py1, px0:px1] = cv2.resize(region, (px1 - px0, py1 - py0), interpolation=cv2.INTER_AREA)
+
+def build_pyramid(img, min_size=PYRAMID_MIN_SIZE):
+    """Görüntüden her katmanı yarı boyutta olan bir piramit (büyükten küçüğe liste) oluşturur."""
+    levels = [img]
+    while max(levels[-1].shape[:2]) // 2 >= min_size:
+        levels.append(cv2.pyrDown(levels[-1]))
+    return levels
+
+def select_pyramid_level(levels, max_size):
+    """Uzun kenarı max_size'dan küçük olmayan en küçük katmanı seçer (yoksa en büyük katman)."""
+    for level in reversed(levels):
+        if max(level.shape[:2]) >= max_size:
+            return level
+    return levels[0]
+
+def detect_slide(backend, slide, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, batch_size=BATCH_SIZE,
+                 preview_size=PREVIEW_SIZE, progress_callback=None):
+    """Lamı parça parça tarayarak tüm hücreleri tespit eder ve sınıflandırır.
+
+    Bir sonraki parça arka planda okunurken mevcut parça işlenir. Bellekte piksel
+    olarak yalnızca iki parça ve önizleme tuvali tutulur; lam boyutuyla yalnızca
+    hücre başına birkaç sayıdan oluşan sonuçlar büyür. detect_cells ile aynı
+    anahtarlara ek olarak 'preview' (önizleme piramidi), 'preview_scale' ve
+    'tiles' içeren bir sözlük döndürür.
+    """
+    if overlap >= tile_size:
+        raise ValueError("Örtüşme parça boyutundan küçük olmalıdır.")
+
+    width, height = slide.width, slide.height
+    tiles = list(iter_tiles(width, height, tile_size, overlap))
+    preprocessor = BatchPreprocessor(batch_size, IMG_SIZE)
+    preview = PreviewBuilder(width, height, preview_size)
+
+    boxes, probabilities = [], []
+    # Komşu parçalarla karşılaştırılacak kabul edilmiş kutular (önceki satırın alt bandı ve bu satır)
+    border = np.empty((0, 4), dtype=np.int32)
+    row_y = None
+
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(slide.read_region, *tiles[0])
+        for index, (x, y, w, h) in enumerate(tiles):
+            tile = pending.result()
+            if index + 1 < len(tiles):
+                pending = reader.submit(slide.read_region, *tiles[index + 1])
+
+            if y != row_y:
+                # Yeni satır: yalnızca bu satırın parçalarına uzanan kutular kalır
+                row_y = y
+                border = border[border[:, 3] > y]
+
+            core = tile_core(x, y, w, h, width, height, overlap)
+            preview.add(tile, x, y, core)
+
+            if cv2.cvtColor(tile, cv2.COLOR_RGB2GRAY).std() >= BLANK_TILE_STD:
+                tile_boxes = propose_cells(tile)
+                global_boxes = tile_boxes + np.array([x, y, x, y], dtype=np.int32)
+
+                # Merkezi bu parçanın çekirdeğine düşen kutular bu parçaya aittir
+                cx = (global_boxes[:, 0] + global_boxes[:, 2]) // 2
+                cy = (global_boxes[:, 1] + global_boxes[:, 3]) // 2
+                owned = (cx >= core[0]) & (cx < core[2]) & (cy >= core[1]) & (cy < core[3])
+
+                # Komşu parçada biraz farklı bulunmuş aynı hücreleri ele
+                nearby = border[(border[:, 2] > x) & (border[:, 0] < x + w)]
+                if len(nearby) and owned.any():
+                    duplicate = (box_iou(global_boxes[owned], nearby) >= DUPLICATE_IOU).any(axis=1)
+                    owned[np.flatnonzero(owned)[duplicate]] = False
+
+                if owned.any():
+                    probabilities.append(classify_boxes(backend, tile, tile_boxes[owned], preprocessor, batch_size))
+                    boxes.append(global_boxes[owned])
+                    border = np.concatenate([border, global_boxes[owned]])
+
+            if progress_callback:
+                progress_callback(index + 1, len(tiles))
+
+    boxes = np.concatenate(boxes) if boxes else np.empty((0, 4), dtype=np.int32)
+    probabilities = (np.concatenate(probabilities) if probabilities
+                     else np.empty((0, len(CLASS_NAMES)), dtype=np.float32))
+    pred_indices = np.argmax(probabilities, axis=1)
+    class_counts = np.bincount(pred_indices, minlength=len(CLASS_NAMES))
+
+    return {
+        'boxes': boxes,
+        'labels': [CLASS_NAMES[i] for i in pred_indices],
+        'confidences': probabilities[np.arange(len(boxes)), pred_indices],
+        'probabilities': probabilities,
+        'counts': {c: int(n) for c, n in zip(CLASS_NAMES, class_counts)},
+        'preview': build_pyramid(preview.canvas),
+        'preview_scale': preview.scale,
+        'tiles': len(tiles)
+    }
+
+def annotate_preview(detections, thickness=1):
+    """Tespitleri önizlemenin en büyük katmanına çizer ve işaretlenmiş piramidi döndürür."""
+    scaled = dict(detections, boxes=np.round(detections['boxes'] * detections['preview_scale']).astype(np.int32))
+    return build_pyramid(draw_detections(detections['preview'][0], scaled, thickness))
+
+def save_detections(detections, output_dir):
+    """Hücre listesini CSV'ye, işaretlenmiş önizleme piramidini PNG katmanları olarak kaydeder."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, 'cells.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['xmin', 'ymin', 'xmax', 'ymax', 'predicted_class', 'confidence'])
+        for box, label, confidence in zip(detections['boxes'], detections['labels'], detections['confidences']):
+            writer.writerow([*box, label, f"{confidence:.6f}"])
+
+    for level, img in enumerate(annotate_preview(detections)):
+        cv2.imwrite(os.path.join(output_dir, f'preview_{level}.png'), cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+
+def main():
+    """Ana işlev: Komut satırından bir tam lam görüntüsünü parça parça tarar."""
+    parser = argparse.ArgumentParser(description="Çok büyük lam görüntülerindeki kan hücrelerini parça parça tespit eder ve sayar.")
+    parser.add_argument('slide', help="Lam görüntüsü (.npy, .tif, .svs, ...)")
+    parser.add_argument('--output-dir', default=None, help="Hücre listesi ve önizleme piramidinin kaydedileceği dizin")
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE, help="Parça kenar uzunluğu (piksel)")
+    parser.add_argument('--overlap', type=int, default=TILE_OVERLAP, help="Komşu parçaların örtüşmesi (piksel)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Sınıflandırma grubu boyutu")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help="Çıkarım arka ucu")
+    parser.add_argument('--model', default=None, help="Model dosyası (varsayılan: arka uca göre models/ altındaki model)")
+    parser.add_argument('--num-threads', type=int, default=None, help="TFLite yorumlayıcısının iş parçacığı sayısı")
+    args = parser.parse_args()
+
+    backend = load_backend(args.backend, args.model, args.num_threads)
+    slide = open_slide(args.slide)
+    print(f"Lam: {slide.width}x{slide.height}, "
+          f"{count_tiles(slide.width, slide.height, args.tile_size, args.overlap)} parça")
+
+    def report_progress(done, total):
+        print(f"\r{done}/{total} parça işlendi", end='', flush=True)
+
+    start_time = time.time()
+    try:
+        detections = detect_slide(backend, slide, args.tile_size, args.overlap, args.batch_size,
+                                  progress_callback=report_progress)
+    finally:
+        slide.close()
+    elapsed = time.time() - start_time
+
+    print(f"\nTespit edilen hücre sayısı: {len(detections['boxes'])} ({elapsed:.2f} saniye)")
+    for class_name, count in detections['counts'].items():
+        print(f"{class_name}: {count}")
+
+    if args.output_dir:
+        save_detections(detections, args.output_dir)
+        print(f"Sonuçlar kaydedildi: {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Eğitim Profil Modülü
+Bu modül, eğitim sürecinin aşama sürelerini ve epoch içindeki veri bekleme / hesaplama ayrımını ölçer ve JSON/CSV olarak kaydeder.
+"""
+
+import os
+import csv
+import json
+import time
+from contextlib import contextmanager
+import numpy as np
+import tensorflow as tf
+
+# Bir epoch'ta veri bekleme süresi adım süresinin bu oranını aşarsa epoch girdi sınırlı sayılır
+INPUT_BOUND_RATIO = 0.5
+
+class StepTimingCallback(tf.keras.callbacks.Callback):
+    """Eğitim adımlarının sürelerini ölçer ve epoch sonunda veri bekleme süresinden ayırır.
+
+    input_marker, sarılmış girdinin son batch'i teslim ettiği anı (tf.timestamp) tutan
+    değişkendir. Adımın başlangıcından bu ana kadar geçen süre, adımın veriyi
+    beklediği süredir.
+    """
+
+    def __init__(self, profiler, phase, input_marker=None):
+        super().__init__()
+        self.profiler = profiler
+        self.phase = phase
+        self.input_marker = input_marker
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._step_times = []
+        self._input_waits = []
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.perf_counter()
+        # tf.timestamp ile aynı saat (Unix zamanı)
+        self._step_wall_start = time.time()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._step_times.append(time.perf_counter() - self._step_start)
+        if self.input_marker is not None:
+            delivered = float(self.input_marker.numpy())
+            self._input_waits.append(max(delivered - self._step_wall_start, 0.0))
+
+    def on_epoch_end(self, epoch, logs=None):
+        epoch_time = time.perf_counter() - self._epoch_start
+        step_time = float(np.sum(self._step_times))
+
+        record = {
+            'phase': self.phase,
+            'epoch': epoch + 1,
+            'steps': len(self._step_times),
+            'epoch_time': epoch_time,
+            'train_step_time': step_time,
+            'step_time_p50_ms': float(np.percentile(self._step_times, 50) * 1000) if self._step_times else 0.0,
+            # Eğitim adımları dışında kalan süre (doğrulama ve callback'ler)
+            'other_time': epoch_time - step_time,
+            'input_wait_time': None,
+            'compute_time': None,
+            'bound': None
+        }
+
+        if self.input_marker is not None:
+            # Doğrulama verisi sarılmadığı için yalnızca eğitim adımlarındaki bekleme sayılır
+            input_wait = float(np.sum(self._input_waits))
+            record['input_wait_time'] = input_wait
+            record['compute_time'] = max(step_time - input_wait, 0.0)
+            record['bound'] = 'input' if input_wait > INPUT_BOUND_RATIO * step_time else 'compute'
+
+        self.profiler.epochs.append(record)
+
+        if logs is not None and record['input_wait_time'] is not None:
+            logs['input_wait_time'] = record['input_wait_time']
+            logs['compute_time'] = record['compute_time']
+
+class TrainingProfiler:
+    """Eğitim sürecinin aşamalarını ve epoch'larını ölçer.
+
+    phase() bağlam yöneticisi ile her aşamanın süresi kaydedilir. Etkinleştirilirse
+    eğitim girdisinin sonuna batch'in teslim anını grafik içinde kaydeden bir adım
+    eklenir; böylece her adımda verinin beklenmesi için geçen süre hesaplama
+    süresinden ayrılabilir. İsteğe bağlı olarak
+    seçilen adımlar için TensorBoard profil izi alınır.
+    """
+
+    def __init__(self, output_dir, enabled=False, trace_batches=None, log_dir=None):
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.trace_batches = trace_batches
+        self.log_dir = log_dir or os.path.join(output_dir, 'logs')
+        self.phases = []
+        self.epochs = []
+
+    @contextmanager
+    def phase(self, name):
+        """Bir aşamanın başlangıç zamanını ve süresini kaydeder."""
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - t0
+            self.phases.append({'phase': name, 'start': start, 'duration': duration})
+            print(f"[profil] {name}: {duration:.2f} saniye")
+
+    def wrap_input(self, dataset, batch_shape, num_classes):
+        """Eğitim girdisinin sonuna her batch'in teslim anını kaydeden bir map adımı ekler.
+
+        Zaman damgası grafik içinde (tf.timestamp) alınır; batch'ler Python'dan
+        geçmediği için ölçüm, girdi hattına GIL kaynaklı ek bekleme katmaz.
+        prefetch'ten sonra gelen sıralı map, eğitim adımı batch'i istediğinde çalışır.
+        (veri seti, teslim anı değişkeni) döndürür. Profil kapalıysa veri seti değişmeden döner.
+        """
+        if not self.enabled:
+            return dataset, None
+
+        if not isinstance(dataset, tf.data.Dataset):
+            # ImageDataGenerator zaten Python'da üretir; Keras da onu aynı şekilde sarar.
+            # Kaynak ayrı bir adla tutulur: lambda adı çalıştığında çözer ve dataset
+            # o sırada sarmalayıcının kendisini gösterir.
+            source = dataset
+            dataset = tf.data.Dataset.from_generator(
+                lambda: iter(source),
+                output_signature=(
+                    tf.TensorSpec(shape=(None,) + tuple(batch_shape), dtype=tf.float32),
+                    tf.TensorSpec(shape=(None, num_classes), dtype=tf.float32)
+                )
+            )
+
+        delivered = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+
+        def mark_delivery(x, y):
+            with tf.control_dependencies([delivered.assign(tf.timestamp())]):
+                return tf.identity(x), tf.identity(y)
+
+        return dataset.map(mark_delivery), delivered
+
+    def callbacks(self, phase, input_marker=None):
+        """Bir eğitim aşaması için adım zamanlama ve (istenirse) TensorBoard profil callback'leri."""
+        callbacks = [StepTimingCallback(self, phase, input_marker)]
+        if self.trace_batches:
+            callbacks.append(tf.keras.callbacks.TensorBoard(
+                log_dir=os.path.join(self.log_dir, phase),
+                profile_batch=self.trace_batches
+            ))
+        return callbacks
+
+    def save(self):
+        """Aşama ve epoch ölçümlerini training_profile.json ve training_profile_epochs.csv dosyalarına yazar."""
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with open(os.path.join(self.output_dir, 'training_profile.json'), 'w') as f:
+            json.dump({'phases': self.phases, 'epochs': self.epochs}, f, indent=2)
+
+        if self.epochs:
+            with open(os.path.join(self.output_dir, 'training_profile_epochs.csv'), 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(self.epochs[0].keys()))
+                writer.writeheader()
+                writer.writerows(self.epochs)
+
+        print("Aşama süreleri:")
+        for p in self.phases:
+            print(f"  {p['phase']:<24}{p['duration']:>10.2f} saniye")
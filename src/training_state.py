@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kan Hücresi Tespit Projesi - Eğitim Durumu Modülü
+Bu modül, eğitimin kesildiği aşama ve epoch'tan devam edebilmesi için tam eğitim durumunu tf.train.CheckpointManager ile periyodik olarak kaydeder.
+
+Her aşama (ör. 'train', 'fine_tune') kendi dizininde tutulur:
+    <aşama>/ckpt-*     Model ağırlıkları, optimizer durumu (momentler, öğrenme oranı,
+                       adım sayısı), epoch ve TensorFlow genel RNG durumu
+    <aşama>/state.json Son checkpoint'in aşama içi konumu, o ana kadarki epoch
+                       geçmişi, EarlyStopping/ReduceLROnPlateau sayaçları ve NumPy RNG durumu
+    <aşama>/best_weights_<i>_e<epoch>.npz
+                       restore_best_weights kullanan i. callback'in en iyi ağırlıkları
+    <aşama>/final      Tamamlanan aşamanın son ağırlıkları
+    progress.json      Tamamlanan aşamalar ve geçmişleri
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+import tensorflow as tf
+
+# Proje dizinleri
+PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
+MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
+CHECKPOINT_DIR = os.path.join(MODELS_DIR, 'checkpoints')
+
+# Kaç eğitim adımında bir tam durum kaydedileceği (epoch sonlarında her zaman kaydedilir)
+SAVE_EVERY_STEPS = 200
+MAX_TO_KEEP = 3
+
+# Devam ederken geri yüklenecek callback sayaçları
+CALLBACK_STATE_ATTRS = ('wait', 'best', 'cooldown_counter', 'stopped_epoch', 'best_epoch')
+
+def _write_json(path, data):
+    """JSON dosyasını yarım yazılmış dosya kalmayacak şekilde yazar."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+def _save_weights(path, weights):
+    """Ağırlık listesini sırasıyla .npz dosyasına yarım yazılmış dosya kalmayacak şekilde yazar."""
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, *weights)
+    os.replace(tmp_path, path)
+
+def _load_weights(path):
+    with np.load(path) as data:
+        return [data[f'arr_{i}'] for i in range(len(data.files))]
+
+def _to_builtin(value):
+    """NumPy sayılarını JSON'a yazılabilir Python türlerine çevirir."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+class PhaseCheckpoint(tf.keras.callbacks.Callback):
+    """Bir eğitim aşamasının tam durumunu her save_every_steps adımda ve her epoch sonunda kaydeder.
+
+    Devam edilen bir aşamada on_train_begin içinde son checkpoint geri yüklenir.
+    Keras callback'leri sayaçlarını on_train_begin'de sıfırladığından bu callback
+    listenin sonunda yer almalıdır; böylece kaydedilen sayaçlar sıfırlamadan sonra yazılır.
+    """
+
+    def __init__(self, state, phase, tracked_callbacks=()):
+        super().__init__()
+        self.state = state
+        self.phase = phase
+        self.tracked_callbacks = list(tracked_callbacks)
+        self.phase_dir = state.phase_dir(phase)
+        self.saved = state.resume_point(phase)
+        self.history = dict(self.saved['history']) if self.saved else {}
+        # Her izlenen callback için kaydedilmiş en iyi ağırlık dosyası (yoksa None)
+        self.best_weights_files = list(self.saved.get('best_weights', [])) if self.saved else []
+        self.best_weights_files += [None] * (len(self.tracked_callbacks) - len(self.best_weights_files))
+        self._saved_best_weights = [None] * len(self.tracked_callbacks)
+
+    def on_train_begin(self, logs=None):
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.step_in_epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.checkpoint = tf.train.Checkpoint(
+            model=self.model,
+            optimizer=self.model.optimizer,
+            epoch=self.epoch,
+            step_in_epoch=self.step_in_epoch,
+            rng=tf.random.get_global_generator()
+        )
+        self.manager = tf.train.CheckpointManager(self.checkpoint, self.phase_dir, max_to_keep=MAX_TO_KEEP)
+
+        if self.saved:
+            # Optimizer momentleri ilk adımda oluşturulurken ertelenmiş olarak geri yüklenir
+            self.checkpoint.restore(self.saved['checkpoint'])
+            for callback, attrs in zip(self.tracked_callbacks, self.saved['callbacks']):
+                for name, value in attrs.items():
+                    setattr(callback, name, value)
+            # EarlyStopping(restore_best_weights=True) en iyi epoch'un ağırlıklarını da bilmeli;
+            # aksi halde devam sonrası ya hiçbir şey ya da daha kötü bir epoch geri yüklenir
+            for index, (callback, filename) in enumerate(zip(self.tracked_callbacks, self.best_weights_files)):
+                if filename:
+                    callback.best_weights = _load_weights(os.path.join(self.phase_dir, filename))
+                    self._saved_best_weights[index] = callback.best_weights
+            rng_state = self.saved['numpy_rng']
+            np.random.set_state((rng_state[0], np.array(rng_state[1], dtype=np.uint32), *rng_state[2:]))
+            print(f"{self.phase} aşaması {self.saved['epoch'] + 1}. epoch'tan devam ediyor "
+                  f"(checkpoint: {os.path.basename(self.saved['checkpoint'])}, adım {self.saved['step_in_epoch']})")
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._current_epoch = epoch
+
+    def on_train_batch_end(self, batch, logs=None):
+        if self.state.save_every_steps and (batch + 1) % self.state.save_every_steps == 0:
+            self._save(self._current_epoch, batch + 1)
+
+    def on_epoch_end(self, epoch, logs=None):
+        for key, value in (logs or {}).items():
+            self.history.setdefault(key, []).append(_to_builtin(value))
+        self._save_best_weights(epoch)
+        # Epoch tamamlandı; devam edilirse bir sonraki epoch'tan başlanır
+        self._save(epoch + 1, 0)
+
+    def _save_best_weights(self, epoch):
+        """İzlenen callback'lerin en iyi ağırlıkları bu epoch'ta değiştiyse diske yazar.
+
+        EarlyStopping iyileşme olduğunda best_weights'e yeni bir liste atar; bu
+        callback listenin sonunda olduğundan değişiklik aynı epoch sonunda görülür.
+        Dosya adı epoch içerir, böylece state.json yazılmadan kesilirse önceki kayıt
+        geçerli kalır.
+        """
+        for index, callback in enumerate(self.tracked_callbacks):
+            best_weights = getattr(callback, 'best_weights', None)
+            if best_weights is None or best_weights is self._saved_best_weights[index]:
+                continue
+            filename = f'best_weights_{index}_e{epoch}.npz'
+            _save_weights(os.path.join(self.phase_dir, filename), best_weights)
+            self._saved_best_weights[index] = best_weights
+            self.best_weights_files[index] = filename
+
+    def _save(self, epoch, step_in_epoch):
+        self.epoch.assign(epoch)
+        self.step_in_epoch.assign(step_in_epoch)
+        # Numara checkpoint'in kendi kayıt sayacından gelir; adım sayısı kullanılsaydı
+        # epoch sonundaki kayıt aynı adımdaki ara kayıtla çakışabilirdi. Sayaç checkpoint
+        # ile geri yüklendiği için devam sonrasında da artmaya devam eder.
+        checkpoint_path = self.manager.save()
+
+        rng_state = np.random.get_state()
+        _write_json(os.path.join(self.phase_dir, 'state.json'), {
+            'phase': self.phase,
+            'checkpoint': checkpoint_path,
+            'epoch': epoch,
+            'step_in_epoch': step_in_epoch,
+            'history': self.history,
+            'callbacks': [
+                {name: _to_builtin(getattr(c, name)) for name in CALLBACK_STATE_ATTRS if hasattr(c, name)}
+                for c in self.tracked_callbacks
+            ],
+            'best_weights': self.best_weights_files,
+            'numpy_rng': [rng_state[0], rng_state[1].tolist(), *rng_state[2:]]
+        })
+        self._remove_stale_best_weights()
+
+    def _remove_stale_best_weights(self):
+        """state.json'un artık göstermediği eski en iyi ağırlık dosyalarını siler."""
+        current = set(self.best_weights_files)
+        for filename in os.listdir(self.phase_dir):
+            if filename.startswith('best_weights_') and filename not in current:
+                os.remove(os.path.join(self.phase_dir, filename))
+
+class TrainingState:
+    """Eğitim aşamalarının checkpoint'lerini ve tamamlanma durumunu yönetir.
+
+    Devam edilirken tamamlanmış aşamalar atlanır ve son ağırlıkları yüklenir;
+    yarıda kalan aşama son kaydedilen epoch'tan (initial_epoch) yeniden başlatılır.
+    Yarıda kalan epoch, son adım checkpoint'indeki ağırlıklar ve optimizer durumuyla
+    baştan çalıştırılır.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, save_every_steps=SAVE_EVERY_STEPS):
+        self.directory = directory
+        self.save_every_steps = save_every_steps
+        self.progress_path = os.path.join(directory, 'progress.json')
+        os.makedirs(directory, exist_ok=True)
+        self.progress = _read_json(self.progress_path, {'completed': {}})
+
+    def reset(self):
+        """Önceki çalıştırmanın checkpoint'lerini siler (devam edilmeyen yeni eğitim için)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.progress = {'completed': {}}
+
+    def phase_dir(self, phase):
+        path = os.path.join(self.directory, phase)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def resume_point(self, phase):
+        """Aşamanın son kaydedilen durumunu döndürür; kayıt yoksa None döner."""
+        return _read_json(os.path.join(self.directory, phase, 'state.json'), None)
+
+    def initial_epoch(self, phase):
+        """model.fit için başlangıç epoch'u: yarıda kalan aşamada son tamamlanmış epoch sayısı."""
+        saved = self.resume_point(phase)
+        return saved['epoch'] if saved else 0
+
+    def callback(self, phase, tracked_callbacks=()):
+        """Aşama için checkpoint callback'i; callback listesinin sonuna eklenmelidir."""
+        return PhaseCheckpoint(self, phase, tracked_callbacks)
+
+    def is_completed(self, phase):
+        return phase in self.progress['completed']
+
+    def complete(self, phase, model, history):
+        """Aşamayı tamamlanmış olarak işaretler, son ağırlıkları kaydeder ve birleşik geçmişi döndürür.
+
+        Devam edilen aşamada model.fit yalnızca kalan epoch'ları döndürdüğünden önceki
+        epoch'lar checkpoint callback'inin tuttuğu geçmişten eklenir.
+        """
+        merged = self._merged_history(phase, history)
+        model.save_weights(os.path.join(self.phase_dir(phase), 'final'))
+
+        self.progress['completed'][phase] = {'history': merged.history, 'params': merged.params}
+        _write_json(self.progress_path, self.progress)
+        return merged
+
+    def _merged_history(self, phase, history):
+        saved = self.resume_point(phase)
+        if saved is None:
+            return history
+        # Checkpoint callback'i her epoch'un kayıtlarını (devam öncesi dahil) tutar
+        merged = tf.keras.callbacks.History()
+        merged.history = {k: list(v) for k, v in saved['history'].items()}
+        merged.params = history.params
+        return merged
+
+    def completed_history(self, phase):
+        """Tamamlanmış bir aşamanın kaydedilen geçmişini History nesnesi olarak döndürür."""
+        record = self.progress['completed'][phase]
+        history = tf.keras.callbacks.History()
+        history.history = record['history']
+        history.params = record['params']
+        return history
+
+    def restore_completed(self, phase, model):
+        """Tamamlanmış aşamanın son ağırlıklarını modele yükler."""
+        model.load_weights(os.path.join(self.directory, phase, 'final'))
+        print(f"{phase} aşaması daha önce tamamlanmış; son ağırlıkları yüklendi.")
@@ -4,26 +4,31 @@
 """
 Kan Hücresi Tespit Projesi - Kullanıcı Arayüzü
 Bu modül, eğitilmiş modeli kullanarak kan hücresi tespiti yapan bir arayüz sunar.
+
+Pencerenin hızlı açılması için ağır modüller (TensorFlow, matplotlib, OpenCV, PIL)
+modül düzeyinde değil, ilk kullanıldıkları yerde veya arka planda içe aktarılır.
 """
 
+import time
+
+# Süreç başlangıcından pencerenin açılmasına kadar geçen süre için
+PROCESS_START = time.time()
+
 import os
 import sys
-import time
+import argparse
+import importlib
+import queue
+import threading
 import numpy as np
-import cv2
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
+from tkinter import filedialog, messagebox, ttk
+
+from inference_backend import BACKENDS, DEFAULT_BACKEND, load_backend
 
 # Proje dizinleri
 PROJECT_DIR = '/home/ubuntu/blood_cell_recognition'
 MODELS_DIR = os.path.join(PROJECT_DIR, 'models')
-MODEL_PATH = os.path.join(MODELS_DIR, 'optimized_mobilenet.h5')
 
 # Sınıf isimleri
 CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
@@ -31,22 +36,93 @@ CLASS_NAMES = ['Platelets', 'RBC', 'WBC']
 # Görüntü boyutu
 IMG_SIZE = 224
 
+# Arka plan sonuç kuyruğunun yoklama aralığı (ms)
+POLL_INTERVAL_MS = 100
+
+# Arayüz için gereken ağır modüller (hızlı başlatma modunda arka planda yüklenir)
+UI_MODULES = ('cv2', 'PIL.ImageTk', 'matplotlib.figure', 'matplotlib.backends.backend_tkagg')
+
+def import_modules(modules):
+    """Modülleri sırayla içe aktarır ve her birinin süresini (-X importtime benzeri) döndürür.
+    
+    Süreler kümülatiftir; daha önce yüklenmiş ortak bağımlılıklar sonraki modüllerin
+    süresine tekrar dahil edilmez.
+    """
+    timings = []
+    for name in modules:
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        timings.append((name, time.perf_counter() - t0))
+    return timings
+
+def record_import_times(timings):
+    """İçe aktarma sürelerinin dökümünü time_tracking.md dosyasına ekler."""
+    breakdown = ", ".join(f"{name} {seconds:.2f} s" for name, seconds in timings)
+    with open(os.path.join(PROJECT_DIR, 'time_tracking.md'), 'a') as f:
+        f.write(f"  - İçe aktarma süreleri: {breakdown}\n")
+
+class BackgroundWorker:
+    """Model yükleme ve çıkarım işlerini tek bir arka plan iş parçacığında sırayla çalıştırır.
+    
+    Sonuçlar bir kuyruğa yazılır ve Tk ana iş parçacığında root.after ile okunur;
+    arka plan iş parçacığı hiçbir Tk nesnesine dokunmaz.
+    """
+    
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        # Bekleyen iş sayısı (yalnızca ana iş parçacığında güncellenir)
+        self.pending = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def submit(self, kind, func, *args):
+        """Bir işi kuyruğa ekler; sonuç (kind, 'done' | 'error', değer) olarak bildirilir."""
+        self.pending += 1
+        self.jobs.put((kind, func, args))
+    
+    def report(self, kind, payload):
+        """Çalışan işin ilerlemesini ana iş parçacığına bildirir."""
+        self.results.put((kind, 'progress', payload))
+    
+    def _run(self):
+        while True:
+            kind, func, args = self.jobs.get()
+            try:
+                self.results.put((kind, 'done', func(*args)))
+            except Exception as e:
+                self.results.put((kind, 'error', e))
+
 class BloodCellDetectionApp:
-    def __init__(self, root):
-        """Uygulamayı başlatır ve arayüzü oluşturur."""
+    def __init__(self, root, backend_name=DEFAULT_BACKEND, model_path=None, num_threads=None, fast_start=False,
+                 use_cache=True, tta_views=1):
+        """Uygulamayı başlatır ve arayüzü oluşturur.
+        
+        fast_start True ise grafik ve görüntü modülleri arka planda yüklenir; pencere
+        bu modüller beklenmeden gösterilir ve grafik hazır olduğunda yerleştirilir.
+        use_cache True ise tahminler kalıcı önbellekte saklanır ve aynı görüntü için
+        model yeniden çalıştırılmaz. tta_views > 1 ise her görüntünün çevrilmiş ve
+        döndürülmüş görünümleri tek model çağrısında sınıflandırılıp ortalanır.
+        """
         self.root = root
         self.root.title("Kan Hücresi Tespit Uygulaması")
         self.root.geometry("1000x700")
         self.root.configure(bg="#f0f0f0")
         
-        # Model yükleme
-        try:
-            self.model = load_model(MODEL_PATH)
-            print("Model başarıyla yüklendi.")
-        except Exception as e:
-            print(f"Model yüklenirken hata oluştu: {e}")
-            messagebox.showerror("Hata", f"Model yüklenirken hata oluştu: {e}")
-            self.model = None
+        # Model arka planda yüklenir; pencere hemen gösterilir
+        self.model = None
+        self.model_error = None
+        self.worker = BackgroundWorker()
+        
+        # Tahmin önbelleği model ile birlikte arka plan iş parçacığında açılır
+        self.use_cache = use_cache
+        
+        # Test zamanı veri artırmada görüntü başına görünüm sayısı (1: kapalı)
+        self.tta_views = tta_views
+        self.cache = None
+        
+        # İçe aktarma süreleri (model yüklendiğinde time_tracking.md dosyasına yazılır)
+        self.import_timings = []
         
         # Ana çerçeve
         self.main_frame = tk.Frame(self.root, bg="#f0f0f0")
@@ -97,10 +173,21 @@ class BloodCellDetectionApp:
         )
         self.result_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10)
         
-        # Grafik için figür
-        self.fig, self.ax = plt.subplots(figsize=(5, 4))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.result_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # Grafik alanı; grafik modülleri yüklendiğinde figür buraya yerleştirilir
+        self.plot_frame = tk.Frame(self.result_frame, bg="#f0f0f0")
+        self.plot_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.fig = None
+        self.ax = None
+        self.canvas = None
+        self.pending_plot = [0, 0, 0]
+        self.preprocessor = None
+        
+        if fast_start:
+            self.plot_placeholder = tk.Label(self.plot_frame, text="Grafik yükleniyor...", font=("Arial", 12), bg="#f0f0f0")
+            self.plot_placeholder.pack(fill=tk.BOTH, expand=True)
+        else:
+            self.import_timings += import_modules(UI_MODULES)
+            self.create_plot()
         
         # Sonuç etiketi
         self.result_label = tk.Label(
@@ -143,6 +230,33 @@ class BloodCellDetectionApp:
         )
         self.analyze_button.pack(side=tk.LEFT, padx=10)
         
+        # Hücre tespiti butonu (tam yayma görüntüsü)
+        self.detect_button = tk.Button(
+            self.button_frame,
+            text="Hücreleri Tespit Et",
+            font=("Arial", 12),
+            command=self.detect_cells,
+            bg="#9C27B0",
+            fg="white",
+            padx=20,
+            pady=10,
+            state=tk.DISABLED
+        )
+        self.detect_button.pack(side=tk.LEFT, padx=10)
+        
+        # Klasör analiz butonu
+        self.analyze_folder_button = tk.Button(
+            self.button_frame,
+            text="Klasör Analiz Et",
+            font=("Arial", 12),
+            command=self.analyze_folder,
+            bg="#FF9800",
+            fg="white",
+            padx=20,
+            pady=10
+        )
+        self.analyze_folder_button.pack(side=tk.LEFT, padx=10)
+        
         # Temizle butonu
         self.clear_button = tk.Button(
             self.button_frame,
@@ -179,48 +293,146 @@ class BloodCellDetectionApp:
         )
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # İlerleme çubuğu
+        self.progress = ttk.Progressbar(self.root, mode='determinate')
+        self.progress.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # Görüntü değişkenleri
         self.image_path = None
+        self.image_paths = []
         self.original_image = None
+        self.slide_path = None
         self.processed_image = None
         
         # Başlangıç grafiği
         self.update_plot([0, 0, 0])
+        
+        # Hızlı başlatmada arayüz modüllerini modelden önce arka planda yükle
+        if fast_start:
+            self.worker.submit('import_modules', import_modules, UI_MODULES)
+        
+        # Modeli arka planda yükle ve sonuç kuyruğunu yoklamaya başla
+        self.worker.submit('load_model', self._load_model_job, backend_name, model_path, num_threads)
+        self.status_bar.config(text="Model yükleniyor...")
+        self.update_progress()
+        self.root.after(POLL_INTERVAL_MS, self.poll_results)
     
     def select_image(self):
-        """Kullanıcının bir görüntü seçmesini sağlar."""
-        self.image_path = filedialog.askopenfilename(
+        """Kullanıcının bir veya birden fazla görüntü seçmesini sağlar.
+        
+        İlk görüntü arayüzde gösterilir; "Analiz Et" tüm seçilen görüntüleri kuyruğa ekler.
+        """
+        image_paths = filedialog.askopenfilenames(
             title="Görüntü Seç",
             filetypes=[
                 ("Görüntü Dosyaları", "*.jpg *.jpeg *.png *.bmp"),
+                ("Lam Görüntüleri", "*.tif *.tiff *.svs *.ndpi *.mrxs *.npy"),
                 ("Tüm Dosyalar", "*.*")
             ]
         )
         
-        if self.image_path:
+        if image_paths:
+            from slide_inference import is_slide
+            
             try:
+                self.image_paths = list(image_paths)
+                self.image_path = self.image_paths[0]
+                
+                # Büyük lam görüntüleri belleğe yüklenmez; önizleme arka planda parça parça oluşturulur
+                if is_slide(self.image_path):
+                    self.open_slide(self.image_path)
+                    return
+                self.slide_path = None
+                
                 # Görüntüyü yükle
-                self.original_image = cv2.imread(self.image_path)
-                self.original_image = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2RGB)
+                self.original_image = self.load_image(self.image_path)
                 
                 # Görüntüyü göster
                 self.display_image(self.original_image)
                 
-                # Analiz butonunu etkinleştir
+                # Analiz butonlarını etkinleştir
                 self.analyze_button.config(state=tk.NORMAL)
+                self.detect_button.config(state=tk.NORMAL)
                 
                 # Durum çubuğunu güncelle
-                self.status_bar.config(text=f"Görüntü yüklendi: {os.path.basename(self.image_path)}")
+                if len(self.image_paths) > 1:
+                    self.status_bar.config(text=f"{len(self.image_paths)} görüntü seçildi: {os.path.basename(self.image_path)} gösteriliyor")
+                else:
+                    self.status_bar.config(text=f"Görüntü yüklendi: {os.path.basename(self.image_path)}")
             
             except Exception as e:
                 messagebox.showerror("Hata", f"Görüntü yüklenirken hata oluştu: {e}")
                 self.status_bar.config(text="Hata: Görüntü yüklenemedi")
     
+    def open_slide(self, path):
+        """Lam görüntüsünün önizlemesini arka planda oluşturur; tek hücre analizi lamlar için kapatılır."""
+        self.slide_path = path
+        self.original_image = None
+        self.image_paths = [path]
+        
+        self.analyze_button.config(state=tk.DISABLED)
+        self.detect_button.config(state=tk.NORMAL)
+        
+        self.worker.submit('slide_preview', self._slide_preview_job, path)
+        self.status_bar.config(text=f"Lam önizlemesi oluşturuluyor: {os.path.basename(path)}")
+        self.update_progress()
+    
+    def _slide_preview_job(self, path):
+        """Arka plan işi: lamın önizleme piramidini oluşturur."""
+        from slide_inference import open_slide, build_pyramid
+        
+        slide = open_slide(path)
+        try:
+            return path, slide.width, slide.height, build_pyramid(slide.thumbnail())
+        finally:
+            slide.close()
+    
+    def _on_slide_preview_done(self, result):
+        """Lam önizlemesini gösterir."""
+        path, width, height, pyramid = result
+        
+        # Önizleme hazırlanırken başka bir görüntü seçildiyse gösterme
+        if path != self.slide_path:
+            return
+        
+        self.display_image(pyramid)
+        self.status_bar.config(text=f"Lam yüklendi: {os.path.basename(path)} ({width}x{height})")
+    
+    def create_plot(self):
+        """Olasılık grafiği için matplotlib figürünü oluşturur ve arayüze yerleştirir."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.fig = Figure(figsize=(5, 4))
+        self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    
+    def load_image(self, path):
+        """Görüntüyü diskten RGB olarak okur."""
+        import cv2
+        
+        img = cv2.imread(path)
+        if img is None:
+            raise IOError(f"Görüntü okunamadı: {path}")
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    
     def display_image(self, img):
-        """Seçilen görüntüyü arayüzde gösterir."""
+        """Seçilen görüntüyü arayüzde gösterir.
+        
+        img bir önizleme piramidi (büyükten küçüğe katman listesi) de olabilir; bu durumda
+        gösterim boyutuna en yakın katman küçültülür.
+        """
+        import cv2
+        from PIL import Image, ImageTk
+        
+        max_size = 400
+        if isinstance(img, list):
+            from slide_inference import select_pyramid_level
+            img = select_pyramid_level(img, max_size)
+        
         # Görüntüyü yeniden boyutlandır
         h, w = img.shape[:2]
-        max_size = 400
         
         if h > max_size or w > max_size:
             if h > w:
@@ -230,7 +442,7 @@ class BloodCellDetectionApp:
                 new_w = max_size
                 new_h = int(h * (max_size / w))
             
-            img = cv2.resize(img, (new_w, new_h))
+            img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
         
         # Görüntüyü PIL formatına dönüştür
         pil_img = Image.fromarray(img)
@@ -243,67 +455,347 @@ class BloodCellDetectionApp:
         self.image_label.image = tk_img  # Referansı koru
     
     def preprocess_image(self, img):
-        """Görüntüyü model için hazırlar."""
-        # Görüntüyü yeniden boyutlandır
-        img = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
+        """Görüntüyü eğitimle aynı ön işlemeden geçirerek model için hazırlar.
         
-        # Görüntüyü normalize et
-        img = img.astype(np.float32) / 255.0
+        TTA açıksa görüntünün tüm görünümleri aynı batch'e yazılır.
+        """
+        from preprocessing import BatchPreprocessor
         
-        # Batch boyutunu ekle
-        img = np.expand_dims(img, axis=0)
+        # Tampon bir kez ayrılır; yalnızca arka plan iş parçacığından çağrılır
+        if self.preprocessor is None:
+            self.preprocessor = BatchPreprocessor(self.tta_views, IMG_SIZE)
         
-        return img
+        # (tta_views, IMG_SIZE, IMG_SIZE, 3) boyutlu batch
+        if self.tta_views > 1:
+            return self.preprocessor.tta([img], self.tta_views)
+        return self.preprocessor([img])
+    
+    def check_model(self):
+        """Model yüklenemediyse kullanıcıyı uyarır; model yükleniyorsa işler kuyrukta bekler."""
+        if self.model_error is not None:
+            messagebox.showerror("Hata", f"Model yüklenemedi: {self.model_error}")
+            return False
+        return True
     
     def analyze_image(self):
-        """Seçilen görüntüyü analiz eder ve sonuçları gösterir."""
-        if self.original_image is None or self.model is None:
-            messagebox.showerror("Hata", "Lütfen önce bir görüntü seçin veya model yüklendiğinden emin olun.")
+        """Seçilen görüntüleri analiz kuyruğuna ekler; sonuçlar hazır oldukça gösterilir."""
+        if self.original_image is None:
+            messagebox.showerror("Hata", "Lütfen önce bir görüntü seçin.")
+            return
+        if not self.check_model():
+            return
+        
+        for path in self.image_paths:
+            # Gösterilen görüntü zaten bellekte; diğerleri arka planda okunur
+            img = self.original_image if path == self.image_path else None
+            self.worker.submit('analyze', self._analyze_job, path, img)
+        
+        # Durum çubuğunu güncelle
+        self.status_bar.config(text=f"Görüntü analiz ediliyor... (kuyrukta {self.worker.pending} iş)")
+        self.update_progress()
+    
+    def _analyze_job(self, path, img):
+        """Arka plan işi: tek bir görüntüyü sınıflandırır; sonuç önbellekteyse model çalıştırılmaz."""
+        from prediction_cache import hash_image
+        from preprocessing import average_tta
+        
+        if img is None:
+            img = self.load_image(path)
+        
+        start_time = time.time()
+        
+        # Önbellekte bu görüntü için bu modelle hesaplanmış sonuç var mı?
+        image_hash = None
+        if self.cache is not None:
+            # TTA sonuçları tek görünümlü sonuçlardan ayrı saklanır
+            image_hash = hash_image(img) + (f':tta{self.tta_views}' if self.tta_views > 1 else '')
+            probabilities = self.cache.get(image_hash)
+            if probabilities is not None:
+                return path, probabilities, time.time() - start_time, True
+        
+        # Görüntüyü ön işle
+        processed_img = self.preprocess_image(img)
+        
+        # Tahmin yap (TTA açıksa tüm görünümler tek çağrıda)
+        predictions = self.model.predict(processed_img)
+        probabilities = np.array(average_tta(predictions, self.tta_views)[0])
+        end_time = time.time()
+        
+        if image_hash is not None:
+            self.cache.put(image_hash, probabilities)
+        
+        return path, probabilities, end_time - start_time, False
+    
+    def _on_analysis_done(self, result):
+        """Tek görüntü analizinin sonucunu arayüzde gösterir."""
+        path, pred_probabilities, elapsed, cached = result
+        
+        # Tahmin sonuçlarını al
+        pred_class_idx = np.argmax(pred_probabilities)
+        pred_class = CLASS_NAMES[pred_class_idx]
+        confidence = pred_probabilities[pred_class_idx] * 100
+        
+        # Sonuç metnini oluştur
+        result_text = f"Görüntü: {os.path.basename(path)}\n"
+        result_text += f"Tespit Edilen Hücre: {pred_class}\n"
+        result_text += f"Güven Oranı: {confidence:.2f}%\n"
+        result_text += f"İşlem Süresi: {elapsed:.4f} saniye{' (önbellekten)' if cached else ''}\n"
+        if self.tta_views > 1:
+            result_text += f"TTA: {self.tta_views} görünümün ortalaması\n"
+        result_text += "\n"
+        
+        # Tüm sınıflar için olasılıkları ekle
+        for i, class_name in enumerate(CLASS_NAMES):
+            result_text += f"{class_name}: {pred_probabilities[i] * 100:.2f}%\n"
+        
+        # Sonuç etiketini güncelle
+        self.result_label.config(text=result_text)
+        
+        # Grafiği güncelle
+        self.update_plot(pred_probabilities * 100)
+        
+        # Durum çubuğunu güncelle
+        self.status_bar.config(text=f"Analiz tamamlandı: {pred_class} tespit edildi ({confidence:.2f}% güven)")
+    
+    def detect_cells(self):
+        """Seçilen yayma görüntüsündeki veya lamdaki tüm hücrelerin tespitini kuyruğa ekler."""
+        if self.original_image is None and self.slide_path is None:
+            messagebox.showerror("Hata", "Lütfen önce bir görüntü seçin.")
             return
+        if not self.check_model():
+            return
+        
+        if self.slide_path is not None:
+            self.worker.submit('detect', self._slide_detect_job, self.slide_path)
+        else:
+            self.worker.submit('detect', self._detect_job, self.original_image)
+        
+        # Durum çubuğunu güncelle
+        self.status_bar.config(text="Hücreler tespit ediliyor...")
+        self.update_progress()
+    
+    def _detect_job(self, img):
+        """Arka plan işi: aday hücreleri bulur ve tek bir toplu çağrıyla sınıflandırır."""
+        from cell_detection import detect_cells, draw_detections
+        
+        start_time = time.time()
+        detections = detect_cells(self.model, img)
+        end_time = time.time()
         
+        return detections, draw_detections(img, detections), end_time - start_time
+    
+    def _slide_detect_job(self, path):
+        """Arka plan işi: lamı parça parça tarar ve ilerlemeyi kuyruğa bildirir."""
+        from slide_inference import open_slide, detect_slide, annotate_preview
+        
+        def report_progress(done, total):
+            self.worker.report('detect', (done, total))
+        
+        start_time = time.time()
+        slide = open_slide(path)
         try:
-            # Durum çubuğunu güncelle
-            self.status_bar.config(text="Görüntü analiz ediliyor...")
-            self.root.update()
-            
-            # Görüntüyü ön işle
-            processed_img = self.preprocess_image(self.original_image)
-            
-            # Tahmin yap
-            start_time = time.time()
-            predictions = self.model.predict(processed_img)
-            end_time = time.time()
-            
-            # Tahmin sonuçlarını al
-            pred_probabilities = predictions[0]
-            pred_class_idx = np.argmax(pred_probabilities)
-            pred_class = CLASS_NAMES[pred_class_idx]
-            confidence = pred_probabilities[pred_class_idx] * 100
+            detections = detect_slide(self.model, slide, progress_callback=report_progress)
+        finally:
+            slide.close()
+        end_time = time.time()
+        
+        return detections, annotate_preview(detections), end_time - start_time
+    
+    def _on_slide_progress(self, progress):
+        """Lam taramasının ilerlemesini gösterir."""
+        done, total = progress
+        self.progress.stop()
+        self.progress.config(mode='determinate', maximum=total, value=done)
+        self.status_bar.config(text=f"Lam taranıyor: {done}/{total} parça")
+    
+    def _on_detection_done(self, result):
+        """Hücre tespiti sonuçlarını arayüzde gösterir."""
+        detections, annotated, elapsed = result
+        total = len(detections['boxes'])
+        counts = detections['counts']
+        
+        # İşaretlenmiş görüntüyü göster
+        self.display_image(annotated)
+        
+        # Sonuç metnini oluştur
+        result_text = f"Tespit Edilen Hücre Sayısı: {total}\n"
+        result_text += f"İşlem Süresi: {elapsed:.4f} saniye\n\n"
+        
+        for class_name in CLASS_NAMES:
+            result_text += f"{class_name}: {counts[class_name]}\n"
+        
+        # Sonuç etiketini güncelle
+        self.result_label.config(text=result_text)
+        
+        # Grafikte hücre tipi dağılımını göster
+        self.update_plot([counts[c] / total * 100 if total else 0 for c in CLASS_NAMES])
+        
+        # Durum çubuğunu güncelle
+        self.status_bar.config(text=f"Hücre tespiti tamamlandı: {total} hücre bulundu")
+    
+    def analyze_folder(self):
+        """Seçilen klasördeki tüm görüntülerin toplu analizini kuyruğa ekler; sonuçlar CSV'ye yazılır."""
+        if not self.check_model():
+            return
+        
+        folder = filedialog.askdirectory(title="Klasör Seç")
+        if not folder:
+            return
+        
+        output_csv = filedialog.asksaveasfilename(
+            title="Sonuçları Kaydet",
+            initialdir=folder,
+            initialfile="predictions.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV Dosyaları", "*.csv")]
+        )
+        if not output_csv:
+            return
+        
+        self.worker.submit('folder', self._folder_job, folder, output_csv)
+        
+        self.status_bar.config(text="Klasör analiz ediliyor...")
+        self.update_progress()
+    
+    def _folder_job(self, folder, output_csv):
+        """Arka plan işi: klasörü toplu olarak analiz eder ve ilerlemeyi kuyruğa bildirir."""
+        from batch_inference import predict_folder
+        
+        def report_progress(done, total):
+            self.worker.report('folder', (done, total))
+        
+        return predict_folder(self.model, folder, output_csv, progress_callback=report_progress,
+                              tta_views=self.tta_views)
+    
+    def _on_folder_progress(self, progress):
+        """Klasör analizinin ilerlemesini gösterir."""
+        done, total = progress
+        self.progress.stop()
+        self.progress.config(mode='determinate', maximum=total, value=done)
+        self.status_bar.config(text=f"Klasör analiz ediliyor: {done}/{total} görüntü")
+    
+    def _on_folder_done(self, summary):
+        """Klasör analizinin özetini arayüzde gösterir."""
+        output_csv = summary['output_csv']
+        processed = summary['processed_images']
+        if processed == 0:
+            messagebox.showwarning("Uyarı", "Seçilen klasörde analiz edilecek görüntü bulunamadı.")
+            self.status_bar.config(text="Hazır")
+            return
+        
+        # Sonuç metnini oluştur
+        result_text = f"Analiz Edilen Görüntü: {processed}\n"
+        result_text += f"İşlem Süresi: {summary['elapsed']:.2f} saniye "
+        result_text += f"({summary['images_per_second']:.1f} görüntü/saniye)\n\n"
+        
+        for class_name in CLASS_NAMES:
+            result_text += f"{class_name}: {summary['class_counts'][class_name]}\n"
+        
+        result_text += f"\nSonuçlar: {os.path.basename(output_csv)}"
+        
+        # Sonuç etiketini güncelle
+        self.result_label.config(text=result_text)
+        
+        # Grafikte sınıf dağılımını göster
+        self.update_plot([summary['class_counts'][c] / processed * 100 for c in CLASS_NAMES])
+        
+        # Durum çubuğunu güncelle
+        self.status_bar.config(text=f"Klasör analizi tamamlandı: {processed} görüntü, sonuçlar {output_csv} dosyasına kaydedildi")
+    
+    def _load_model_job(self, backend_name, model_path, num_threads):
+        """Arka plan işi: çıkarım arka ucunu yükler.
+        
+        self.model burada atanır; böylece kuyruktaki sonraki işler modeli hemen kullanabilir.
+        """
+        timings = import_modules(('tensorflow',))
+        t0 = time.perf_counter()
+        self.model = load_backend(backend_name, model_path, num_threads)
+        timings.append(('model', time.perf_counter() - t0))
+        
+        if self.use_cache:
+            from prediction_cache import PredictionCache
             
-            # Sonuç metnini oluştur
-            result_text = f"Tespit Edilen Hücre: {pred_class}\n"
-            result_text += f"Güven Oranı: {confidence:.2f}%\n"
-            result_text += f"İşlem Süresi: {(end_time - start_time):.4f} saniye\n\n"
+            # Önbellek açılamazsa analizler önbelleksiz devam eder
+            try:
+                self.cache = PredictionCache(self.model.model_path)
+            except Exception as e:
+                print(f"Tahmin önbelleği açılamadı, önbelleksiz devam ediliyor: {e}")
+        
+        return self.model, timings
+    
+    def _on_modules_imported(self, timings):
+        """Hızlı başlatmada arka planda yüklenen modüllerle grafiği oluşturur."""
+        self.import_timings += timings
+        self.plot_placeholder.destroy()
+        self.create_plot()
+        self.update_plot(self.pending_plot)
+    
+    def _on_model_loaded(self, result):
+        """Model yüklendiğinde içe aktarma sürelerini kaydeder ve durum çubuğunu günceller."""
+        model, timings = result
+        self.import_timings += timings
+        record_import_times(self.import_timings)
+        print(f"Model başarıyla yüklendi ({model.name} arka ucu).")
+        if self.worker.pending == 0:
+            self.status_bar.config(text="Hazır")
+    
+    def poll_results(self):
+        """Arka plan işlerinin sonuçlarını ana iş parçacığında işler ve kendini yeniden zamanlar."""
+        handlers = {
+            'import_modules': (self._on_modules_imported, "Modüller yüklenirken hata oluştu"),
+            'load_model': (self._on_model_loaded, "Model yüklenirken hata oluştu"),
+            'analyze': (self._on_analysis_done, "Görüntü analiz edilirken hata oluştu"),
+            'detect': (self._on_detection_done, "Hücreler tespit edilirken hata oluştu"),
+            'folder': (self._on_folder_done, "Klasör analiz edilirken hata oluştu"),
+            'slide_preview': (self._on_slide_preview_done, "Lam önizlemesi oluşturulurken hata oluştu")
+        }
+        progress_handlers = {
+            'folder': self._on_folder_progress,
+            'detect': self._on_slide_progress
+        }
+        
+        while True:
+            try:
+                kind, status, payload = self.worker.results.get_nowait()
+            except queue.Empty:
+                break
             
-            # Tüm sınıflar için olasılıkları ekle
-            for i, class_name in enumerate(CLASS_NAMES):
-                result_text += f"{class_name}: {pred_probabilities[i] * 100:.2f}%\n"
+            if status == 'progress':
+                progress_handlers[kind](payload)
+                continue
             
-            # Sonuç etiketini güncelle
-            self.result_label.config(text=result_text)
+            self.worker.pending -= 1
+            on_done, error_message = handlers[kind]
             
-            # Grafiği güncelle
-            self.update_plot(pred_probabilities * 100)
+            if status == 'done':
+                on_done(payload)
+            else:
+                if kind == 'load_model':
+                    self.model_error = payload
+                print(f"{error_message}: {payload}")
+                messagebox.showerror("Hata", f"{error_message}: {payload}")
+                self.status_bar.config(text=f"Hata: {error_message}")
             
-            # Durum çubuğunu güncelle
-            self.status_bar.config(text=f"Analiz tamamlandı: {pred_class} tespit edildi ({confidence:.2f}% güven)")
+            self.update_progress()
         
-        except Exception as e:
-            messagebox.showerror("Hata", f"Görüntü analiz edilirken hata oluştu: {e}")
-            self.status_bar.config(text="Hata: Görüntü analiz edilemedi")
+        self.root.after(POLL_INTERVAL_MS, self.poll_results)
+    
+    def update_progress(self):
+        """Kuyrukta iş varken ilerleme çubuğunu çalıştırır, yoksa durdurur."""
+        if self.worker.pending > 0:
+            self.progress.config(mode='indeterminate')
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+            self.progress.config(mode='determinate', value=0)
     
     def update_plot(self, probabilities):
         """Tahmin olasılıklarını gösteren çubuk grafiği günceller."""
+        # Grafik henüz oluşturulmadıysa değerleri sakla; grafik hazır olunca çizilir
+        if self.canvas is None:
+            self.pending_plot = probabilities
+            return
+        
         # Grafiği temizle
         self.ax.clear()
         
@@ -335,7 +827,9 @@ class BloodCellDetectionApp:
         # Görüntüyü temizle
         self.image_label.config(image='')
         self.original_image = None
+        self.slide_path = None
         self.image_path = None
+        self.image_paths = []
         
         # Sonuç etiketini sıfırla
         self.result_label.config(text="Henüz bir görüntü analiz edilmedi.")
@@ -343,20 +837,46 @@ class BloodCellDetectionApp:
         # Grafiği sıfırla
         self.update_plot([0, 0, 0])
         
-        # Analiz butonunu devre dışı bırak
+        # Analiz butonlarını devre dışı bırak
         self.analyze_button.config(state=tk.DISABLED)
+        self.detect_button.config(state=tk.DISABLED)
         
         # Durum çubuğunu güncelle
         self.status_bar.config(text="Hazır")
 
+def parse_args():
+    """Komut satırı argümanlarını ayrıştırır."""
+    parser = argparse.ArgumentParser(description="Kan hücresi tespit arayüzünü başlatır.")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help="Çıkarım arka ucu")
+    parser.add_argument('--model', default=None, help="Model dosyası (varsayılan: arka uca göre models/ altındaki model)")
+    parser.add_argument('--num-threads', type=int, default=None, help="TFLite yorumlayıcısının iş parçacığı sayısı")
+    parser.add_argument('--fast-start', action='store_true',
+                        help="Pencereyi hemen göster; grafik ve görüntü modüllerini arka planda yükle")
+    parser.add_argument('--tta', type=int, default=1, metavar='N',
+                        help="Görüntü başına ortalanacak çevrilmiş/döndürülmüş görünüm sayısı (1: kapalı)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Tahmin önbelleğini kullanma; her analizde model yeniden çalıştırılır")
+    args = parser.parse_args()
+    
+    if args.tta != 1:
+        # preprocessing cv2'yi yüklediğinden başlangıçta değil, yalnızca TTA istendiğinde içe aktarılır
+        from preprocessing import TTA_VIEWS
+        if args.tta not in range(1, len(TTA_VIEWS) + 1):
+            parser.error(f"--tta 1 ile {len(TTA_VIEWS)} arasında olmalıdır")
+    
+    return args
+
 def main():
     """Ana işlev: Uygulamayı başlatır."""
+    args = parse_args()
+    
     # Zaman takibi için başlangıç zamanını kaydet
     start_time = time.time()
     
     # Tkinter uygulamasını başlat
     root = tk.Tk()
-    app = BloodCellDetectionApp(root)
+    app = BloodCellDetectionApp(root, args.backend, args.model, args.num_threads, args.fast_start,
+                                use_cache=not args.no_cache, tta_views=args.tta)
     
     # İşlem süresini hesapla
     end_time = time.time()
@@ -365,6 +885,7 @@ def main():
     # Zaman bilgisini dosyaya kaydet
     with open(os.path.join(PROJECT_DIR, 'time_tracking.md'), 'a') as f:
         f.write(f"- Kullanıcı arayüzü başlatma: Başlangıç - {time.strftime('%d Nisan %Y %H:%M:%S')}, Bitiş - {time.strftime('%d Nisan %Y %H:%M:%S', time.localtime(end_time))}, Süre - {ui_init_time:.2f} saniye\n")
+        f.write(f"  - Süreç başlangıcından pencereye: {end_time - PROCESS_START:.2f} saniye ({'hızlı başlatma' if args.fast_start else 'normal başlatma'})\n")
     
     # Uygulamayı çalıştır
     root.mainloop()
@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+tf = pytest.importorskip('tensorflow')
+Image = pytest.importorskip('PIL.Image')
+
+from preprocessing import IMG_SIZE, INTERPOLATION, resize_image
+
+# Tamsayı olmayan ölçek katsayıları (büyütme ve küçültme)
+SOURCE_SHAPES = [(37, 53), (301, 257), (150, 97)]
+
+def random_image(shape, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=shape + (3,), dtype=np.uint8)
+
+@pytest.mark.parametrize('shape', SOURCE_SHAPES)
+def test_resize_matches_tf_data_decoder(shape):
+    """Çıkarım yeniden boyutlandırması tf.data eğitim hattındaki (_decode_image) ile aynı pikselleri seçmeli."""
+    img = random_image(shape)
+
+    expected = tf.cast(tf.image.resize(img, (IMG_SIZE, IMG_SIZE), method=INTERPOLATION), tf.uint8).numpy()
+
+    np.testing.assert_array_equal(resize_image(img), expected)
+
+@pytest.mark.parametrize('shape', SOURCE_SHAPES)
+def test_resize_matches_flow_from_directory(shape):
+    """Çıkarım yeniden boyutlandırması flow_from_directory'nin PIL NEAREST sonucuyla aynı olmalı."""
+    img = random_image(shape)
+
+    expected = np.asarray(Image.fromarray(img).resize((IMG_SIZE, IMG_SIZE), Image.NEAREST))
+
+    np.testing.assert_array_equal(resize_image(img), expected)
@@ -0,0 +1,29 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+tf = pytest.importorskip('tensorflow')
+
+from training_profiler import TrainingProfiler
+
+def test_wrap_input_reads_python_iterator(tmp_path):
+    """ImageDataGenerator gibi düz bir Python yineleyicisi sarılırken kaynak batch'ler aynen gelmeli."""
+    batches = [
+        (np.full((2, 4, 4, 3), i, dtype=np.float32), np.eye(3, dtype=np.float32)[[i % 3, (i + 1) % 3]])
+        for i in range(3)
+    ]
+    profiler = TrainingProfiler(str(tmp_path), enabled=True)
+
+    wrapped, marker = profiler.wrap_input(iter(batches), (4, 4, 3), 3)
+    received = list(wrapped.as_numpy_iterator())
+
+    assert len(received) == len(batches)
+    for (x, y), (expected_x, expected_y) in zip(received, batches):
+        np.testing.assert_array_equal(x, expected_x)
+        np.testing.assert_array_equal(y, expected_y)
+    assert marker.numpy() > 0
+
+def test_wrap_input_disabled_returns_input(tmp_path):
+    profiler = TrainingProfiler(str(tmp_path), enabled=False)
+    source = object()
+
+    assert profiler.wrap_input(source, (4, 4, 3), 3) == (source, None)